@@ -0,0 +1,406 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kwartiergrid import KWARTIEREN_PER_DAG
+
+try:
+    from numba import njit
+except ImportError:  # numba is optioneel; zonder numba draait dezelfde kernel als Python-lus
+    njit = None
+
+KWARTIER_UUR = 0.25  # kW per kwartier -> kWh
+
+
+@dataclass(frozen=True)
+class AccuResultaat:
+    """
+    Resultaat per kwartier van simuleer_accu (alle arrays float32):
+    - soc: accustand in kWh na het kwartier
+    - laden / ontladen: vermogen in kW aan de aansluitingskant
+    - tekort: kWh afname boven max_afname die de accu niet kon leveren
+    - afgetopt: kWh teruglevering boven max_teruglevering die niet in de accu paste
+    - netwerk: kW uitwisseling met het net na accu (+ afname, − teruglevering), begrensd op de limieten
+    """
+    soc: np.ndarray
+    laden: np.ndarray
+    ontladen: np.ndarray
+    tekort: np.ndarray
+    afgetopt: np.ndarray
+    netwerk: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.soc)
+
+    def slice(self, rijen: slice) -> "AccuResultaat":
+        """Zero-copy view op een deel van de periode (bijv. één week)."""
+        return AccuResultaat(*(getattr(self, f)[rijen] for f in self.__dataclass_fields__))
+
+
+def _accu_kernel_py(netto, capaciteit, max_laden, max_ontladen, eta_laden, eta_ontladen,
+                    max_afname, soc_start, soc, laden, ontladen):
+    """
+    Sequentiële SOC-recursie (het enige deel dat niet te vectoriseren is):
+    - overschot (netto < 0) laadt de accu, begrensd door laadvermogen en vrije ruimte
+    - netto afname boven max_afname ontlaadt de accu, begrensd door ontlaadvermogen en stand
+    """
+    stand = soc_start
+    dt = 0.25
+    for i in range(len(netto)):
+        s = netto[i]
+        if s < 0.0:
+            p = min(-s, max_laden, (capaciteit - stand) / (eta_laden * dt))
+            if p > 0.0:
+                stand += p * eta_laden * dt
+                laden[i] = p
+        elif s > max_afname:
+            p = min(s - max_afname, max_ontladen, stand * eta_ontladen / dt)
+            if p > 0.0:
+                stand -= p / eta_ontladen * dt
+                ontladen[i] = p
+        soc[i] = stand
+    return stand
+
+
+_accu_kernel = njit(cache=True, nogil=True)(_accu_kernel_py) if njit is not None else None
+
+
+def _limiet(x) -> float:
+    # None/0 = geen begrenzing
+    return float(x) if x else np.inf
+
+
+def simuleer_accu(verbruik, opbrengst, capaciteit: float, max_afname: float, max_teruglevering: float,
+                  max_laden: float | None = None, max_ontladen: float | None = None,
+                  rendement: float = 1.0, soc_start: float = 0.0) -> AccuResultaat:
+    """
+    Simuleer de accustand per kwartier over de hele periode (jaar of langer).
+    verbruik/opbrengst in kW per kwartier, capaciteit in kWh, vermogens in kW.
+    rendement is het round-trip rendement; het wordt gelijk verdeeld over laden en ontladen.
+    """
+    netto = np.asarray(verbruik, dtype=np.float64) - np.asarray(opbrengst, dtype=np.float64)
+    netto = np.nan_to_num(netto, nan=0.0)
+    n = len(netto)
+    eta = float(np.sqrt(rendement)) if rendement > 0 else 1.0
+    args = (float(capaciteit), _limiet(max_laden), _limiet(max_ontladen), eta, eta,
+            _limiet(max_afname), float(min(soc_start, capaciteit)))
+
+    if _accu_kernel is not None:
+        soc, laden, ontladen = np.zeros(n), np.zeros(n), np.zeros(n)
+        _accu_kernel(netto, *args, soc, laden, ontladen)
+    else:
+        soc, laden, ontladen = [0.0] * n, [0.0] * n, [0.0] * n
+        _accu_kernel_py(netto.tolist(), *args, soc, laden, ontladen)
+        soc, laden, ontladen = np.asarray(soc), np.asarray(laden), np.asarray(ontladen)
+
+    return _resultaat(netto, soc, laden, ontladen, max_afname, max_teruglevering)
+
+
+def _resultaat(netto, soc, laden, ontladen, max_afname, max_teruglevering) -> AccuResultaat:
+    # alles na de SOC-recursie is elementgewijs
+    net = netto + laden - ontladen
+    afname_limiet, terug_limiet = _limiet(max_afname), _limiet(max_teruglevering)
+    tekort = np.maximum(net - afname_limiet, 0.0) * KWARTIER_UUR
+    afgetopt = np.maximum(-net - terug_limiet, 0.0) * KWARTIER_UUR
+    netwerk = np.clip(net, -terug_limiet, afname_limiet)
+
+    f32 = lambda a: np.asarray(a, dtype=np.float32)
+    return AccuResultaat(f32(soc), f32(laden), f32(ontladen), f32(tekort), f32(afgetopt), f32(netwerk))
+
+
+
+# --- dimensionering: veel configuraties in één run ---
+
+def _sweep_kernel_py(netto, capaciteit, max_vermogen, eta, max_afname, max_teruglevering,
+                     piek, ontladen_tot, teruglevering, afgetopt):
+    """
+    Dezelfde recursie als _accu_kernel_py voor K configuraties na elkaar; per configuratie
+    worden alleen de jaartotalen bijgehouden (geen (K, n)-arrays).
+    """
+    dt = 0.25
+    for k in range(len(capaciteit)):
+        stand = 0.0
+        cap = capaciteit[k]
+        for i in range(len(netto)):
+            net = netto[i]
+            if net < 0.0:
+                p = min(-net, max_vermogen[k], (cap - stand) / (eta * dt))
+                if p > 0.0:
+                    stand += p * eta * dt
+                    net += p
+                teruglevering[k] -= net * dt
+                if -net > max_teruglevering:
+                    afgetopt[k] += (-net - max_teruglevering) * dt
+            elif net > max_afname:
+                p = min(net - max_afname, max_vermogen[k], stand * eta / dt)
+                if p > 0.0:
+                    stand -= p / eta * dt
+                    net -= p
+                    ontladen_tot[k] += p * dt
+            if net > piek[k]:
+                piek[k] = net
+
+
+_sweep_kernel = njit(cache=True, nogil=True)(_sweep_kernel_py) if njit is not None else None
+
+
+def _sweep_numpy(netto, capaciteit, max_vermogen, eta, max_afname, max_teruglevering,
+                 piek, ontladen_tot, teruglevering, afgetopt):
+    # zonder numba: lus over de tijd, gevectoriseerd over de toestandsdimensie (K configuraties)
+    dt = 0.25
+    stand = np.zeros(len(capaciteit))
+    for s in netto.tolist():
+        if s < 0.0:
+            p = np.maximum(np.minimum(np.minimum(-s, max_vermogen), (capaciteit - stand) / (eta * dt)), 0.0)
+            stand += p * eta * dt
+            net = s + p
+            teruglevering -= net * dt
+            afgetopt += np.maximum(-net - max_teruglevering, 0.0) * dt
+            np.maximum(piek, net, out=piek)
+        elif s > max_afname:
+            p = np.maximum(np.minimum(np.minimum(s - max_afname, max_vermogen), stand * eta / dt), 0.0)
+            stand -= p / eta * dt
+            ontladen_tot += p * dt
+            np.maximum(piek, s - p, out=piek)
+        else:
+            np.maximum(piek, s, out=piek)
+
+
+def sweep_accu(verbruik, opbrengst, capaciteiten, vermogens, max_afname: float, max_teruglevering: float,
+               rendement: float = 1.0) -> pd.DataFrame:
+    """
+    Simuleer alle combinaties capaciteit (kWh) × laad/ontlaadvermogen (kW, 0 = onbeperkt) over de
+    hele periode, met dezelfde regels als simuleer_accu. Eén rij per configuratie met:
+    - piek_afname_kw: hoogste netafname na accu
+    - tekort_kwh: afname boven max_afname die de accu niet kon opvangen
+    - teruglevering_kwh / afgetopt_kwh: teruglevering na accu, en het deel boven max_teruglevering
+    - zelfconsumptie_pct: deel van de opbrengst dat niet het net op gaat
+    - cycli: equivalente volle cycli (ontladen energie / capaciteit)
+    """
+    netto = np.nan_to_num(np.asarray(verbruik, dtype=np.float64) - np.asarray(opbrengst, dtype=np.float64), nan=0.0)
+    cap, verm = np.meshgrid(np.asarray(capaciteiten, dtype=np.float64), np.asarray(vermogens, dtype=np.float64), indexing="ij")
+    cap, verm = cap.ravel(), verm.ravel()
+    eta = float(np.sqrt(rendement)) if rendement > 0 else 1.0
+    afname_limiet = _limiet(max_afname)
+
+    k = len(cap)
+    piek = np.full(k, -np.inf)
+    ontladen, teruglevering, afgetopt = np.zeros(k), np.zeros(k), np.zeros(k)
+    kernel = _sweep_kernel if _sweep_kernel is not None else _sweep_numpy
+    kernel(netto, cap, np.where(verm > 0, verm, np.inf), eta, afname_limiet, _limiet(max_teruglevering),
+           piek, ontladen, teruglevering, afgetopt)
+
+    # ontladen gebeurt alleen boven de afnamelimiet en nooit verder dan de limiet:
+    # tekort = overschrijding zonder accu − wat de accu daarvan heeft geleverd
+    tekort = np.maximum(netto - afname_limiet, 0.0).sum() * KWARTIER_UUR - ontladen
+    opbrengst_totaal = float(np.nansum(np.asarray(opbrengst, dtype=np.float64))) * KWARTIER_UUR
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zelfconsumptie = 100 * (1 - teruglevering / opbrengst_totaal)
+        cycli = np.where(cap > 0, ontladen / cap, 0.0)
+    return pd.DataFrame({
+        "capaciteit_kwh": cap,
+        "vermogen_kw": verm,
+        "piek_afname_kw": piek,
+        "tekort_kwh": np.maximum(tekort, 0.0),
+        "teruglevering_kwh": teruglevering,
+        "afgetopt_kwh": afgetopt,
+        "zelfconsumptie_pct": zelfconsumptie,
+        "cycli": cycli,
+    })
+
+
+# --- strategieën: samenstelbare dispatch-signalen ---
+
+@dataclass(frozen=True)
+class DispatchSignalen:
+    """
+    Per kwartier (float64-arrays van lengte n) wat de accu mag/moet doen; elke strategie vult alleen
+    de signalen in die ze nodig heeft, combineer_signalen legt ze over elkaar:
+    - piekgrens: ontlaad alles boven deze netafname (kW), tot de accu leeg is (peak shaving)
+    - ontlaad_boven / soc_reserve: ontlaad netafname boven ontlaad_boven, maar alleen tot soc_reserve (kWh)
+    - laad_pv: 1.0 = laad met PV-overschot
+    - soc_doel / max_netladen / laad_grens: laad uit het net tot soc_doel (kWh) met max. max_netladen kW,
+      zolang de netafname inclusief laden onder laad_grens (kW) blijft
+    """
+    piekgrens: np.ndarray
+    ontlaad_boven: np.ndarray
+    soc_reserve: np.ndarray
+    laad_pv: np.ndarray
+    soc_doel: np.ndarray
+    max_netladen: np.ndarray
+    laad_grens: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.piekgrens)
+
+
+def neutrale_signalen(n: int) -> DispatchSignalen:
+    """Accu doet niets: geen ontladen, geen laden."""
+    return DispatchSignalen(
+        piekgrens=np.full(n, np.inf), ontlaad_boven=np.full(n, np.inf), soc_reserve=np.zeros(n),
+        laad_pv=np.zeros(n), soc_doel=np.zeros(n), max_netladen=np.zeros(n), laad_grens=np.full(n, np.inf),
+    )
+
+
+def combineer_signalen(*signalen: DispatchSignalen) -> DispatchSignalen:
+    """
+    Leg strategieën over elkaar: de strengste ontlaad- en laadgrens, de hoogste reserve en het hoogste laaddoel winnen.
+    De reserve geldt alleen voor gewoon ontladen; peak shaving mag de reserve altijd gebruiken.
+    In kwartieren met een netlaaddoel is de reserve minstens dat doel: wat de ene strategie uit het net laadt,
+    mag een andere (bv. ontlaad_boven=0 van pv-zelfconsumptie) in hetzelfde venster niet weer ontladen.
+    """
+    if not signalen:
+        raise ValueError("Geef minstens één strategie op.")
+    eerste, *rest = signalen
+    uit = {f: np.array(getattr(eerste, f), dtype=np.float64) for f in DispatchSignalen.__dataclass_fields__}
+    for s in rest:
+        np.minimum(uit["piekgrens"], s.piekgrens, out=uit["piekgrens"])
+        np.minimum(uit["ontlaad_boven"], s.ontlaad_boven, out=uit["ontlaad_boven"])
+        np.maximum(uit["soc_reserve"], s.soc_reserve, out=uit["soc_reserve"])
+        np.maximum(uit["laad_pv"], s.laad_pv, out=uit["laad_pv"])
+        np.maximum(uit["soc_doel"], s.soc_doel, out=uit["soc_doel"])
+        np.maximum(uit["max_netladen"], s.max_netladen, out=uit["max_netladen"])
+        # laden uit het net mag geen nieuwe piek boven de grens van een andere strategie maken
+        np.minimum(uit["laad_grens"], s.laad_grens, out=uit["laad_grens"])
+    netladen = uit["max_netladen"] > 0
+    uit["soc_reserve"][netladen] = np.maximum(uit["soc_reserve"][netladen], uit["soc_doel"][netladen])
+    return DispatchSignalen(**uit)
+
+
+def peak_shave_beleid(n: int, grenswaarde: float, reserve_kwh: float = 0.0, max_netladen: float = 0.0) -> DispatchSignalen:
+    """
+    Peak shaving: ontlaad alles boven grenswaarde (kW). Laadt met PV-overschot en houdt reserve_kwh
+    achter de hand door met max. max_netladen kW uit het net bij te laden zolang de afname onder grenswaarde blijft.
+    """
+    s = neutrale_signalen(n)
+    s.piekgrens[:] = grenswaarde
+    s.soc_reserve[:] = reserve_kwh
+    s.laad_pv[:] = 1.0
+    if max_netladen > 0 and reserve_kwh > 0:
+        s.soc_doel[:] = reserve_kwh
+        s.max_netladen[:] = max_netladen
+        s.laad_grens[:] = grenswaarde
+    return s
+
+
+def pv_zelfconsumptie_beleid(n: int) -> DispatchSignalen:
+    """PV-zelfconsumptie: overschot opslaan in plaats van terugleveren, en gebruiken zodra er netafname is."""
+    s = neutrale_signalen(n)
+    s.laad_pv[:] = 1.0
+    s.ontlaad_boven[:] = 0.0
+    return s
+
+
+def soc_nacht_beleid(grid, doel_kwh: float, van_uur: int = 0, tot_uur: int = 6, max_netladen: float = np.inf,
+                     laad_grens: float = np.inf) -> DispatchSignalen:
+    """'s Nachts (van_uur..tot_uur) uit het net bijladen tot doel_kwh om de ochtendpiek op te vangen."""
+    s = neutrale_signalen(len(grid))
+    uur = grid.kwartier_van_dag // 4
+    nacht = (uur >= van_uur) & (uur < tot_uur) if van_uur <= tot_uur else (uur >= van_uur) | (uur < tot_uur)
+    s.soc_doel[nacht] = doel_kwh
+    s.max_netladen[nacht] = max_netladen
+    s.laad_grens[nacht] = laad_grens
+    return s
+
+
+def _tarief_per_kwartier(grid, tarieven) -> np.ndarray:
+    tarieven = np.asarray(tarieven, dtype=np.float64)
+    if len(tarieven) == len(grid):
+        return tarieven
+    if len(tarieven) == 96:
+        return tarieven[grid.kwartier_van_dag]
+    if len(tarieven) == 24:
+        return tarieven[grid.kwartier_van_dag // 4]
+    raise ValueError("Tarieven moeten per kwartier van de periode, per kwartier van de dag (96) of per uur (24) zijn.")
+
+
+def tarief_arbitrage_beleid(grid, tarieven, capaciteit: float, laag_kwantiel: float = 0.25, hoog_kwantiel: float = 0.75,
+                            max_netladen: float = np.inf, laad_grens: float = np.inf) -> DispatchSignalen:
+    """
+    Variabele tarieven: per dag laden uit het net in de goedkoopste kwartieren (onder laag_kwantiel van die dag)
+    en ontladen in de duurste (boven hoog_kwantiel). Kwantielen per dag via een (n_dagen, 96)-matrix in float64:
+    dezelfde precisie als `prijs`, anders valt bv. 0.3 (float32 > float64) nooit op of boven het kwantiel.
+    Een kwartier dat goedkoop is (bv. een vlak tarief, laag == hoog) wordt nooit ook als duur ontladen.
+    """
+    prijs = _tarief_per_kwartier(grid, tarieven)
+    m = np.full((grid.n_dagen, KWARTIEREN_PER_DAG), np.nan)
+    m[grid.dag_code, grid.kwartier_van_dag] = prijs
+    with np.errstate(all="ignore"):
+        laag = np.nanquantile(m, laag_kwantiel, axis=1)[grid.dag_code]
+        hoog = np.nanquantile(m, hoog_kwantiel, axis=1)[grid.dag_code]
+    s = neutrale_signalen(len(grid))
+    goedkoop = prijs <= laag
+    s.soc_doel[goedkoop] = capaciteit
+    s.max_netladen[goedkoop] = max_netladen
+    s.laad_grens[goedkoop] = laad_grens
+    s.ontlaad_boven[(prijs >= hoog) & ~goedkoop] = 0.0
+    s.laad_pv[:] = 1.0
+    return s
+
+
+def _dispatch_kernel_py(netto, capaciteit, max_laden, max_ontladen, eta, piekgrens, ontlaad_boven, soc_reserve,
+                        laad_pv, soc_doel, max_netladen, laad_grens, soc_start, soc, laden, ontladen):
+    """
+    SOC-recursie voor willekeurige dispatch-signalen; volgorde per kwartier:
+    1. peak shaving boven piekgrens (hele accu)  2. ontladen boven ontlaad_boven (tot soc_reserve)
+    3. laden met PV-overschot                     4. laden uit het net tot soc_doel
+    """
+    stand = soc_start
+    dt = 0.25
+    for i in range(len(netto)):
+        s = netto[i]
+        po = 0.0
+        if s > piekgrens[i]:
+            po = max(min(s - piekgrens[i], max_ontladen, stand * eta / dt), 0.0)
+        if s - po > ontlaad_boven[i]:
+            beschikbaar = (stand - po / eta * dt - soc_reserve[i]) * eta / dt
+            po += max(min(s - po - ontlaad_boven[i], max_ontladen - po, beschikbaar), 0.0)
+        if po > 0.0:
+            stand -= po / eta * dt
+            ontladen[i] = po
+        else:
+            pl = 0.0
+            if s < 0.0 and laad_pv[i] > 0.0:
+                pl = max(min(-s, max_laden, (capaciteit - stand) / (eta * dt)), 0.0)
+            ruimte = (min(soc_doel[i], capaciteit) - stand) / (eta * dt) - pl
+            if ruimte > 0.0 and max_netladen[i] > 0.0:
+                pl += max(min(ruimte, max_laden - pl, max_netladen[i], laad_grens[i] - (s + pl)), 0.0)
+            if pl > 0.0:
+                stand += pl * eta * dt
+                laden[i] = pl
+        soc[i] = stand
+    return stand
+
+
+_dispatch_kernel = njit(cache=True, nogil=True)(_dispatch_kernel_py) if njit is not None else None
+
+
+def simuleer_strategie(verbruik, opbrengst, signalen: DispatchSignalen, capaciteit: float, max_afname: float,
+                       max_teruglevering: float, max_laden: float | None = None, max_ontladen: float | None = None,
+                       rendement: float = 1.0, soc_start: float = 0.0) -> AccuResultaat:
+    """
+    Simuleer de accu over de hele periode volgens (gecombineerde) dispatch-signalen.
+    Laden uit het net blijft altijd onder max_afname; het resultaat is hetzelfde AccuResultaat als simuleer_accu.
+    """
+    netto = np.nan_to_num(np.asarray(verbruik, dtype=np.float64) - np.asarray(opbrengst, dtype=np.float64), nan=0.0)
+    n = len(netto)
+    if len(signalen) != n:
+        raise ValueError(f"Signalen hebben lengte {len(signalen)}, data {n}.")
+    eta = float(np.sqrt(rendement)) if rendement > 0 else 1.0
+    s = signalen
+    # expliciet in de argumentvolgorde van _dispatch_kernel, niet in de veldvolgorde van DispatchSignalen
+    sig = [np.ascontiguousarray(a, dtype=np.float64) for a in (
+        s.piekgrens, s.ontlaad_boven, s.soc_reserve, s.laad_pv, s.soc_doel, s.max_netladen,
+        np.minimum(s.laad_grens, _limiet(max_afname)))]
+    args = (float(capaciteit), _limiet(max_laden), _limiet(max_ontladen), eta, *sig, float(min(soc_start, capaciteit)))
+
+    if _dispatch_kernel is not None:
+        soc, laden, ontladen = np.zeros(n), np.zeros(n), np.zeros(n)
+        _dispatch_kernel(netto, *args, soc, laden, ontladen)
+    else:
+        soc, laden, ontladen = [0.0] * n, [0.0] * n, [0.0] * n
+        lijsten = [a.tolist() if isinstance(a, np.ndarray) else a for a in args]
+        _dispatch_kernel_py(netto.tolist(), *lijsten, soc, laden, ontladen)
+        soc, laden, ontladen = np.asarray(soc), np.asarray(laden), np.asarray(ontladen)
+    return _resultaat(netto, soc, laden, ontladen, max_afname, max_teruglevering)
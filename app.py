@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 from plot_manager import PlotManager
-from plot_weektrends import plot_weektrends, plot_weektrends_summary, plot_weektrends_per_quartile_stats, plot_accu_week_simulatie, plot_accu_week_simulatie_select
-from pvlib_init import Initialize_Systeem1, Initialize_Systeem2, get_parameters
-from ml_clustering import cluster_typical_profiles
+from plot_weektrends import plot_weektrends, plot_weektrends_summary, plot_weektrends_per_quartile_stats, plot_accu_week_simulatie, plot_accu_week_simulatie_select, plot_accu_sweep
+from pvlib_init import get_parameters
+from pv_simulatie import PVResultaat, PVVlak, simuleer_vlakken
+from ml_clustering import cluster_typical_profiles, dag_features, evalueer_aantal_clusters, aanbevolen_aantal_clusters, plot_aantal_clusters
 import time 
 import matplotlib.pyplot as plt
 import matplotlib.image as mpimg
@@ -15,8 +16,16 @@ from functools import lru_cache
 import numpy as np
 from pathlib import Path
 import seaborn as sns
-from plots import plot_dag_en_maand, plot_max_dagpiek_heatmap
-from utils import read_excel_smart, align_to_common_15min_grid, angle_picker, tilt_picker, PV_MODULETYPES
+from plots import plot_dag_en_maand, plot_max_dagpiek_heatmap, dag_met_grootste_piek, plot_orientatie_heatmap, plot_weerjaren, ORIENTATIE_KENGETALLEN, kiezer_graden
+from pv_optimalisatie import optimaliseer_orientatie
+from pv_scenariobatch import MIN_SCENARIOS_PER_WORKER, PVScenario, vergelijk_scenarios
+from kwartierdata_io import lees_kwartierdata
+from kwartiergrid import QuarterGrid
+from zonnepanelen_scenarios import SCENARIO_NAMEN, pas_scenario_toe
+from weerjaren import simuleer_weerjaren
+from utils import align_to_common_15min_grid, angle_picker, tilt_picker
+from pv_catalogus import power_to_types, MODULE_KEUZE
+from zonnemodel_empirisch import simuleer_vlakken_empirisch
 
 #from dotenv import load_dotenv
 
@@ -38,8 +47,49 @@ def rss_mb():
     return psutil.Process(os.getpid()).memory_info().rss / 1e6
 
 
+@st.fragment
+def dag_bladeren(plotter, data_verbruik, data_opbrengst, grid, max_afname, max_teruglevering, plot_opties, start_dag):
+    """
+    Door dagen bladeren als fragment: vorige/volgende of de schuif herlaadt alleen dit blok,
+    niet het hele script. Elke dag is een O(1) slice op de dag-offsets van de grid.
+    """
+    codes = grid.dagen_met_data
+    if len(codes) == 0:
+        st.info("Geen dagen met data.")
+        return
+    labels = grid.dagen[codes].strftime("%a %d-%m-%Y")
+    if "blader_dag" not in st.session_state:
+        start = grid.dag_code_van(start_dag)
+        st.session_state.blader_dag = int(np.clip(np.searchsorted(codes, max(start, 0)), 0, len(codes) - 1))
+
+    def stap(delta):
+        st.session_state.blader_dag = int(np.clip(st.session_state.blader_dag + delta, 0, len(codes) - 1))
+
+    c1, c2, c3 = st.columns([1, 6, 1])
+    c1.button("◀ Vorige", key="blader_vorige", on_click=stap, args=(-1,))
+    c3.button("Volgende ▶", key="blader_volgende", on_click=stap, args=(1,))
+    i = c2.select_slider("Dag", options=range(len(codes)), format_func=lambda i: labels[i], key="blader_dag")
+
+    dag_rijen = grid.dag_slice_code(int(codes[i]))
+    plotter.plot_energiebalans_dag(data_verbruik.iloc[dag_rijen], data_opbrengst.iloc[dag_rijen], max_afname, max_teruglevering, **plot_opties)
+
+
+# Widgets in een tab die niet open is worden niet getekend en Streamlit ruimt dan hun status op. Door de
+# waarde vóór st.tabs opnieuw toe te kennen blijven de instellingen bewaard tot de tab weer open gaat.
+TAB_WIDGET_PREFIXEN = ("aantal_clusters", "auto_k", "dag_", "blader_dag", "reeksen_", "weerjaren", "duurkromme_",
+                       "accu_", "sweep_", "orientatie_", "scenario_", "jaar_", "heatmap_")
+
+
+def behoud_tabstatus():
+    for k in list(st.session_state.keys()):
+        if isinstance(k, str) and k.startswith(TAB_WIDGET_PREFIXEN):
+            st.session_state[k] = st.session_state[k]
+
+
 BASE_DIR = Path(__file__).parent
 LOGO_PATH = BASE_DIR / "LO-Bind-FC-RGB.png"
+# Typisch dagprofiel dynamisch tarief (€/kWh per uur 00..23) als startwaarde voor de accustrategie
+STANDAARD_UURTARIEVEN = "0.22,0.21,0.20,0.20,0.21,0.23,0.27,0.30,0.28,0.24,0.20,0.17,0.15,0.15,0.17,0.21,0.26,0.32,0.35,0.33,0.29,0.26,0.24,0.23"
 
 @st.cache_data(show_spinner=False)
 def load_logo_bytes(path: str | Path) -> bytes | None:
@@ -120,7 +170,14 @@ with st.sidebar:
     max_teruglevering = st.number_input("Max teruglevering (kW)(positief getal)", min_value=0.0, value=20.0)
     vermogen_omvormer = st.number_input("Vermogen omvormer (kW)", min_value=0.0, value=2.0)
     type_omvormer = "Enphase" #st.selectbox("Type omvormer", options=["Enphase", "SolarEdge", "Fronius"], index=0)
-    type_paneel = st.selectbox("Vermogen paneel", options=[400, 420, 440, 460, 475, 480, 500], index=0)
+    try:
+        POWER_TO_TYPES = power_to_types()  # uit de gedeelde CEC-catalogus, alleen modules die echt bestaan
+    except Exception:
+        # geen CEC-database: keuzelijst zonder controle, berekenen gaat dan via het empirische model
+        POWER_TO_TYPES = {}
+        for naam, wp in sorted(MODULE_KEUZE.items(), key=lambda kv: kv[1]):
+            POWER_TO_TYPES.setdefault(wp, []).append(naam)
+    type_paneel = st.selectbox("Vermogen paneel", options=list(POWER_TO_TYPES), index=0)
     #vermogen_paneel = st.selectbox("Vermogen paneel (Wp)", options=[300, 350, 400, 450, 500], index=3)
     
     
@@ -129,7 +186,10 @@ with st.sidebar:
     begin_datum = st.date_input("Startdatum", value=pd.to_datetime('2023-01-01'))
     
     zonnedata_pos_neg = "positief"
-    weer_scenario = "goed weer" #st.selectbox("Weer scenario", options=["goed_weer", "slecht_weer", "bewolkt", "wisselvallig"], index=0)
+    weer_scenario = st.selectbox("Weer scenario (bij berekende opbrengst)", options=list(SCENARIO_NAMEN), index=0)
+    grafiek_weergave = st.radio("Grafieken reeksen en dagbalans", options=["Statisch", "Interactief"], horizontal=True,
+                                key="grafiek_weergave",
+                                help="Interactief: reeksen aan/uit, zoomen en pannen in de browser, zonder herberekening")
     st.title("Paneel orientatie 1")
     orientatie1 = angle_picker("Oriëntatie (°)", default=90, key="ori1") - 180
     Hellingshoek1 = tilt_picker("Hellingshoek 1 (°)", key="tilt1")
@@ -144,21 +204,38 @@ with st.sidebar:
     Reeksen2 = st.number_input("Aantal reeksen", min_value=0, value=0)
     Reeksen_per_omvormer2 = st.number_input("Reeksen per omvormer", min_value=0, value=1)
     #WP2 = st.number_input("Watt Pieks 2", value=0)
+    dakvlakken = [
+        PVVlak(Hellingshoek1, orientatie1, Panelen_per_reeks1, Reeksen_per_omvormer1, aantal=Reeksen1, naam="zijde 1"),
+        PVVlak(Hellingshoek2, orientatie2, Panelen_per_reeks2, Reeksen_per_omvormer2, aantal=Reeksen2, naam="zijde 2"),
+    ]
+    with st.expander("Extra dakvlakken"):
+        aantal_extra = st.number_input("Aantal extra dakvlakken", min_value=0, max_value=6, value=0, key="extra_vlakken")
+        for i in range(3, 3 + int(aantal_extra)):
+            st.markdown(f"**Dakvlak {i}**")
+            # kompasrichting = pvlib-azimut, dus zonder de −180 van de oriëntatiekiezers van zijde 1 en 2
+            azimuth = st.number_input("Oriëntatie (°, N=0 O=90 Z=180 W=270)", min_value=0, max_value=359, value=180, key=f"ori{i}")
+            helling = st.number_input("Hellingshoek (°)", min_value=0, max_value=90, value=30, key=f"tilt{i}")
+            panelen = st.number_input("Panelen per reeks", min_value=0, value=1, key=f"panelen{i}")
+            reeksen = st.number_input("Aantal reeksen", min_value=0, value=1, key=f"reeksen{i}")
+            per_omvormer = st.number_input("Reeksen per omvormer", min_value=1, value=1, key=f"per_omvormer{i}")
+            dakvlakken.append(PVVlak(helling, azimuth, panelen, per_omvormer, aantal=reeksen, naam=f"zijde {i}"))
     st.title("Locatie")
     breedtegraad = st.number_input("Breedtegraad", value=52.13)
     lengtegraad = st.number_input("Lengtegraad", value=6.54)
-    POWER_TO_TYPES = {}
-    for module, vermogen in PV_MODULETYPES.items():
-        POWER_TO_TYPES.setdefault(vermogen, []).append(module) 
-    type_paneel =POWER_TO_TYPES[type_paneel]  
+    wp_paneel = type_paneel
+    type_paneel = POWER_TO_TYPES[type_paneel]
+interactief = grafiek_weergave == "Interactief"
+INTERACTIEF_UITLEG = "Klik in de legenda om reeksen aan/uit te zetten; scrollen/slepen = zoomen/pannen, dubbelklik = terug."
 st.markdown('<div class="section-header">1. Upload je kwartierdata</div>', unsafe_allow_html=True)
 
-uploaded_verbruik = st.file_uploader("Upload verbruik kwartierdata (excel, index=datetime)", type=["xlsx"], key="verbruik")
+N = 35040  # max 1 jaar kwartierdata
+
+uploaded_verbruik = st.file_uploader("Upload verbruik kwartierdata (excel/csv, index=datetime)", type=["xlsx", "csv"], key="verbruik")
 data_type = st.selectbox("Type opbrengst data", options=["Aanleveren", "Berekenen"], index=0)
 if data_type == "Berekenen":
     uploaded_opbrengst = "Processor"
 else:
-    uploaded_opbrengst = st.file_uploader("Upload opbrengst kwartierdata (excel, index=datetime)", type=["xlsx"], key="opbrengst")
+    uploaded_opbrengst = st.file_uploader("Upload opbrengst kwartierdata (excel/csv, index=datetime)", type=["xlsx", "csv"], key="opbrengst")
 
 df_verbruik = None
 df_opbrengst = None
@@ -168,39 +245,28 @@ if uploaded_verbruik and uploaded_opbrengst:
         start = time.time()
         with st.spinner("Berekenen kwartierdata..."):
             plt.clf()
-            location, module, inverter, temperature_parameters = get_parameters(_breedtegraad=breedtegraad, _lengtegraad=lengtegraad, _tijdzone="Europe/Amsterdam", _hoogte=42, _type_paneel=type_paneel)
-            
-            df_opbrengst1 = Initialize_Systeem1(
-                _location=location, 
-                _module=module, 
-                _inverter=inverter, 
-                _temperature_parameters=temperature_parameters, 
-                _hellingshoek=Hellingshoek1, 
-                _azimuth=orientatie1, 
-                _panelen_per_reeks=Panelen_per_reeks1, 
-                _reeksen_per_omvormer=Reeksen_per_omvormer1, 
-                _start_date=begin_datum, 
-                _end_date=begin_datum + pd.DateOffset(years=1)) * 0.65
-           
-            df_opbrengst2 = Initialize_Systeem2(
-                _location = location, 
-                _module = module, 
-                _inverter = inverter, 
-                _temperature_parameters = temperature_parameters, 
-                _hellingshoek=Hellingshoek2, 
-                _azimuth=orientatie2, 
-                _panelen_per_reeks=Panelen_per_reeks2, 
-                _reeksen_per_omvormer=Reeksen_per_omvormer2, 
-                _start_date=begin_datum, 
-                _end_date=begin_datum + pd.DateOffset(years=1)) * 0.65
-            
-            df_opbrengst = (df_opbrengst1*Reeksen1 + df_opbrengst2*Reeksen2) 
-
-            st.write(f"opbrengst over een jaar totaal: {df_opbrengst.sum()/4} kWh, zijde 1: {df_opbrengst1.sum()/4*Reeksen1} kWh, zijde 2: {df_opbrengst2.sum()/4*Reeksen2} kWh")
+            eind_datum = begin_datum + pd.DateOffset(years=1)
+            try:
+                location, module, inverter, temperature_parameters = get_parameters(_breedtegraad=breedtegraad, _lengtegraad=lengtegraad, _tijdzone="Europe/Amsterdam", _hoogte=42, _type_paneel=type_paneel)
+
+                # alle dakvlakken in één doorrekening; 0.65 = verliesfactor t.o.v. clear-sky
+                resultaat = simuleer_vlakken(location, module, inverter, temperature_parameters, dakvlakken,
+                                             start=begin_datum, end=eind_datum, verliesfactor=0.65)
+            except Exception as e:
+                # CEC-database laden of pvlib-simulatie mislukt: empirisch kwartiermodel, begrensd op het omvormervermogen
+                st.warning(f"pvlib-berekening niet mogelijk ({e}); empirisch model gebruikt.")
+                module = None
+                per_vlak = simuleer_vlakken_empirisch(breedtegraad, lengtegraad, dakvlakken, wp_paneel, begin_datum, eind_datum,
+                                                      max_omvormer_kw=vermogen_omvormer or np.inf, verliesfactor=0.65)
+                resultaat = PVResultaat(per_vlak=per_vlak, totaal=per_vlak.sum(axis=1).rename("ac"))
+            df_opbrengst = resultaat.totaal
+
+            per_vlak = ", ".join(f"{naam}: {kwh:.0f} kWh" for naam, kwh in resultaat.jaaropbrengst_kwh().items())
+            st.write(f"opbrengst over een jaar totaal: {df_opbrengst.sum()/4:.0f} kWh, {per_vlak}")
         st.write("Duur:", time.time() - start)
     else: 
-        df_opbrengst = read_excel_smart(uploaded_opbrengst, index_col=0, parse_dates=True)
-    df_verbruik = read_excel_smart(uploaded_verbruik, index_col=0, parse_dates=True)
+        df_opbrengst = lees_kwartierdata(uploaded_opbrengst, index_col=0, max_rijen=N)
+    df_verbruik = lees_kwartierdata(uploaded_verbruik, index_col=0, max_rijen=N)
     
     st.success("✅ Data succesvol geladen!")
     light_mode = rss_mb() > LIGHT_RSS_MB
@@ -220,7 +286,6 @@ if uploaded_verbruik and uploaded_opbrengst:
     col_opbrengst = st.text_input("Kolom opbrengstdata:", value=default_col or "Opbrengst")
 
     # Begin direct met verwerken en visualiseren, geen button meer
-    N = 35040  # max 1 jaar kwartierdata
 
     # --- Verbruik ---
     s_v = pd.to_numeric(df_verbruik[col_verbruik].iloc[:N], errors="coerce").astype("float32") * 4.0
@@ -240,6 +305,13 @@ if uploaded_verbruik and uploaded_opbrengst:
         s_o = pd.to_numeric(raw_o.iloc[:N], errors="coerce").astype("float32")
 
     data_verbruik, data_opbrengst = align_to_common_15min_grid(s_v, s_o)
+    # Kalenderindex één keer opbouwen; alle analyses slicen/bincount'en hierop
+    grid = QuarterGrid.from_index(data_verbruik.index)
+    opbrengst_goed_weer = data_opbrengst
+    if data_type == "Berekenen" and weer_scenario != "goed_weer":
+        # berekende opbrengst is goed weer; andere scenario's als factor per kwartier t.o.v. goed weer
+        data_opbrengst = pd.Series(pas_scenario_toe(data_opbrengst.to_numpy(), weer_scenario, grid),
+                                   index=data_opbrengst.index, name=data_opbrengst.name)
 
     st.caption("Voorbeeld verbruik (eerste 500 rijen)")
     st.dataframe(data_verbruik.head(500).to_frame(name=col_verbruik), use_container_width=True)
@@ -251,7 +323,10 @@ if uploaded_verbruik and uploaded_opbrengst:
     plotter = PlotManager()
 
     # Nieuwe tabvolgorde
-    tab3, tab6, tab7, tab4, tab5, tab2, tab1 = st.tabs([
+    # Alleen de open tab rekent en tekent (on_change="rerun" + tab.open); widgetinstellingen van
+    # de andere tabs blijven bewaard, hun berekeningen staan in de st.cache_data caches.
+    behoud_tabstatus()
+    tab3, tab6, tab7, tab4, tab5, tab2, tab1, tab8, tab9 = st.tabs([
         "Dagbalans jaar",        # 1
         "Weekoverzicht",         # 2
         "Typische Dagprofielen", # 3
@@ -259,83 +334,221 @@ if uploaded_verbruik and uploaded_opbrengst:
         "Energiebalans dag",     # 5
         "Opbrengst vs Verbruik", # 6
         "Belastingduurkromme",   # 7
-    ])
+        "Accu simulatie",        # 8
+        "Oriëntatie optimalisatie", # 9
+    ], key="analyse_tab", on_change="rerun")
 
     # 1. Dagbalans jaar
     with tab3:
-        st.markdown("#### Dagbalans over gehele periode")
+        if tab3.open:
+            st.markdown("#### Dagbalans over gehele periode")
 
-        
+            
 
-        # AANROEP
-        plot_dag_en_maand(data_verbruik, data_opbrengst)
-        st.markdown("""
-        **Toelichting:**
-        - Daglijnen: verbruik (boven 0), opbrengst (onder 0) en verschil (verbruik - opbrengst)
-        - Maandstaven: verbruik, opbrengst en overschot (alleen positieve delen van opbrengst - verbruik per kwartier)
-        - Alle waarden in kWh (kwartierdata in kW * 0,25)
-        """)
+            # AANROEP
+            plot_dag_en_maand(data_verbruik, data_opbrengst, grid=grid)
+            st.markdown("""
+            **Toelichting:**
+            - Daglijnen: verbruik (boven 0), opbrengst (onder 0) en verschil (verbruik - opbrengst)
+            - Maandstaven: verbruik, opbrengst en overschot (alleen positieve delen van opbrengst - verbruik per kwartier)
+            - Alle waarden in kWh (kwartierdata in kW * 0,25)
+            """)
+            plotter.plot_dagbalans_jaar(data_verbruik, data_opbrengst, max_afname, max_teruglevering, grid=grid)
 
     # 2. Weekoverzicht
     with tab6:
-        st.markdown("#### Weekoverzicht")
-        plot_weektrends(data_verbruik, title="Weektrends verbruik kwartierdata")
-        
-        plot_weektrends_summary(data_verbruik, title="Gemiddelde, max en min week verbruik (kwartierdata)")
-        plot_weektrends_per_quartile_stats(data_verbruik, title="Gemiddelde, max en min per kwartier van de week")
+        if tab6.open:
+            st.markdown("#### Weekoverzicht")
+            plot_weektrends(data_verbruik, title="Weektrends verbruik kwartierdata", grid=grid)
+            
+            plot_weektrends_summary(data_verbruik, title="Gemiddelde, max en min week verbruik (kwartierdata)", grid=grid)
+            plot_weektrends_per_quartile_stats(data_verbruik, title="Gemiddelde, max en min per kwartier van de week", grid=grid)
 
     # 3. Typische Dagprofielen
     with tab7:
-        st.markdown("#### Typische Dagprofielen")
-        clusters = st.number_input("Aantal clusters voor verbruiksprofielen", min_value=2, max_value=10, value=4, key="aantal_clusters_typische_dag")
-        cluster_typical_profiles(data_verbruik, n_clusters=clusters, use_weekend=True)
+        if tab7.open:
+            st.markdown("#### Typische Dagprofielen")
+            if st.toggle("Aantal clusters automatisch bepalen (k = 2..10)", key="auto_k"):
+                features = dag_features(data_verbruik, use_weekend=True, _grid=grid)
+                with st.spinner("Alle k doorrekenen..."):
+                    k_scores = evalueer_aantal_clusters(features[0], features[3])
+                plot_aantal_clusters(k_scores)
+                k_opties = list(k_scores.index)
+                clusters = st.select_slider("Aantal clusters voor verbruiksprofielen", options=k_opties,
+                                            value=aanbevolen_aantal_clusters(k_scores), key="auto_k_keuze")
+            else:
+                clusters = st.number_input("Aantal clusters voor verbruiksprofielen", min_value=2, max_value=10, value=4, key="aantal_clusters_typische_dag")
+            cluster_typical_profiles(data_verbruik, n_clusters=clusters, use_weekend=True, _grid=grid)
 
     # 4. Heatmap
     with tab4:
-        st.markdown("#### Heatmap: Max kwartierverbruik per dag (% van limiet)")
-        grootste_overschrijding_dag = None
-        
-
-        grootste_overschrijding_dag = plot_max_dagpiek_heatmap(data_verbruik, data_opbrengst, max_afname)
+        if tab4.open:
+            st.markdown("#### Heatmap: Max kwartierverbruik per dag (% van limiet)")
+            heatmap_weergave = st.radio("Weergave", options=["Maand × dag (dagpiek)", "Dag × kwartier (elk kwartier)"],
+                                        horizontal=True, key="heatmap_weergave")
+            # bij meer dan één jaar: jaren onder elkaar, of gevouwen op de kalender (maximum over de jaren)
+            per_jaar = True
+            if grid.dagen[0].year != grid.dagen[-1].year:
+                per_jaar = not st.checkbox("Jaren samenvoegen (maximum over de jaren)", value=False, key="heatmap_samenvoegen")
+            plot_max_dagpiek_heatmap(data_verbruik, data_opbrengst, max_afname, grid=grid,
+                                     weergave="maand_dag" if heatmap_weergave.startswith("Maand") else "dag_kwartier",
+                                     per_jaar=per_jaar)
 
     # 5. Energiebalans dag
     with tab5:
-        st.markdown("#### Energiebalans op een dag")
-        # Gebruik de dag met grootste overschrijding als default
-        default_dag = grootste_overschrijding_dag if grootste_overschrijding_dag is not None else data_verbruik.index[0].date()
-        dag = st.date_input("Kies een dag", value=default_dag)
-        st.write(f"🔍 Gekozen dag: {dag}")
-
-        dag = pd.to_datetime(dag)
-        mask_v = data_verbruik.index.normalize() == dag
-        mask_o = data_opbrengst.index.normalize() == dag
-        verbruik_op_dag = data_verbruik[mask_v]
-        opbrengst_op_dag = data_opbrengst[mask_o]
-        toon_verbruik = st.checkbox("Toon verbruik", value=True, key="dag_verbruik")
-        toon_opbrengst = st.checkbox("Toon opbrengst", value=True, key="dag_opbrengst")
-        toon_saldo = st.checkbox("Toon saldo", value=False, key="dag_saldo")
-        toon_saldo_beperkt = st.checkbox("Toon saldo (beperkt)", value=True, key="dag_saldo_beperkt")
-        toon_limieten = st.checkbox("Toon limieten", value=True, key="dag_limieten")
-        toon_limiet_overschrijdingen = st.checkbox("Toon limiet overschrijdingen", value=False, key="dag_limiet_overschrijdingen")
-
-        if mask_v.sum() > 0 and mask_o.sum() > 0:
-            plotter.plot_energiebalans_dag(data_verbruik[mask_v], data_opbrengst[mask_o], max_afname, max_teruglevering, _positief=zonnedata_pos_neg, _toon_verbruik=toon_verbruik, _toon_opbrengst=toon_opbrengst, _toon_saldo=toon_saldo, _toon_saldo_beperkt=toon_saldo_beperkt, _toon_limieten=toon_limieten, _toon_limiet_overschrijdingen=toon_limiet_overschrijdingen)
-        else:
-            st.info("Geen data voor deze dag.")
+        if tab5.open:
+            st.markdown("#### Energiebalans op een dag")
+            # Gebruik de dag met grootste overschrijding als default (zonder de heatmap-tab te hoeven tekenen)
+            grootste_overschrijding_dag = dag_met_grootste_piek(data_verbruik, data_opbrengst, grid=grid)
+            default_dag = grootste_overschrijding_dag if grootste_overschrijding_dag is not None else data_verbruik.index[0].date()
+            if interactief:
+                # aan/uit gebeurt in de legenda; dit is de beginstand
+                st.caption(INTERACTIEF_UITLEG)
+                toon_verbruik, toon_opbrengst, toon_saldo, toon_saldo_beperkt, toon_limieten, toon_limiet_overschrijdingen = True, True, False, True, True, False
+            else:
+                toon_verbruik = st.checkbox("Toon verbruik", value=True, key="dag_verbruik")
+                toon_opbrengst = st.checkbox("Toon opbrengst", value=True, key="dag_opbrengst")
+                toon_saldo = st.checkbox("Toon saldo", value=False, key="dag_saldo")
+                toon_saldo_beperkt = st.checkbox("Toon saldo (beperkt)", value=True, key="dag_saldo_beperkt")
+                toon_limieten = st.checkbox("Toon limieten", value=True, key="dag_limieten")
+                toon_limiet_overschrijdingen = st.checkbox("Toon limiet overschrijdingen", value=False, key="dag_limiet_overschrijdingen")
+            plot_opties = dict(_positief=zonnedata_pos_neg, _toon_verbruik=toon_verbruik, _toon_opbrengst=toon_opbrengst, _toon_saldo=toon_saldo, _toon_saldo_beperkt=toon_saldo_beperkt, _toon_limieten=toon_limieten, _toon_limiet_overschrijdingen=toon_limiet_overschrijdingen, _interactief=interactief)
+
+            if st.toggle("Bladermodus (dagen doorlopen zonder volledige herberekening)", key="dag_bladermodus"):
+                dag_bladeren(plotter, data_verbruik, data_opbrengst, grid, max_afname, max_teruglevering, plot_opties, default_dag)
+            else:
+                dag = st.date_input("Kies een dag", value=default_dag, key="dag_keuze")
+                st.write(f"🔍 Gekozen dag: {dag}")
+
+                # Beide reeksen delen de grid: de dag is één positionele slice (view, 96 rijen)
+                dag_rijen = grid.dag_slice(dag)
+                verbruik_op_dag = data_verbruik.iloc[dag_rijen]
+                opbrengst_op_dag = data_opbrengst.iloc[dag_rijen]
+
+                if len(verbruik_op_dag) > 0:
+                    plotter.plot_energiebalans_dag(verbruik_op_dag, opbrengst_op_dag, max_afname, max_teruglevering, **plot_opties)
+                else:
+                    st.info("Geen data voor deze dag.")
 
     # 6. Opbrengst vs Verbruik
     with tab2:
-        st.markdown("#### Opbrengst vs Verbruik (kies kolommen)")
-        show_opbrengst = st.checkbox("Toon opbrengst", value=True, key="reeksen_opbrengst")
-        show_verbruik = st.checkbox("Toon verbruik", value=True, key="reeksen_verbruik")
-        show_verschil = st.checkbox("Toon verschil", value=True, key="reeksen_verschil")
-        plotter.plot_reeksen_en_verschil(_verbruik=data_verbruik, _opbrengst=data_opbrengst, show_opbrengst=show_opbrengst, show_verbruik=show_verbruik, show_verschil=show_verschil, _max_afname=max_afname, _max_teruglevering=max_teruglevering)
+        if tab2.open:
+            st.markdown("#### Opbrengst vs Verbruik (kies kolommen)")
+            if interactief:
+                st.caption(INTERACTIEF_UITLEG)
+                show_opbrengst = show_verbruik = show_verschil = True
+                bereik = None
+            else:
+                show_opbrengst = st.checkbox("Toon opbrengst", value=True, key="reeksen_opbrengst")
+                show_verbruik = st.checkbox("Toon verbruik", value=True, key="reeksen_verbruik")
+                show_verschil = st.checkbox("Toon verschil", value=True, key="reeksen_verschil")
+                # inzoomen: de gekozen periode wordt opnieuw verdund, dus met meer detail getekend
+                eerste_dag, laatste_dag = grid.dagen[0].date(), grid.dagen[-1].date()
+                bereik = st.slider("Periode", min_value=eerste_dag, max_value=laatste_dag, value=(eerste_dag, laatste_dag),
+                                   format="DD-MM-YYYY", key="reeksen_bereik") if laatste_dag > eerste_dag else None
+            plotter.plot_reeksen_en_verschil(_verbruik=data_verbruik, _opbrengst=data_opbrengst, show_opbrengst=show_opbrengst, show_verbruik=show_verbruik, show_verschil=show_verschil, _max_afname=max_afname, _max_teruglevering=max_teruglevering, _bereik=bereik, _interactief=interactief)
+
+            with st.expander("Weerjaren (Monte Carlo): spreiding opbrengst en overschrijdingen"):
+                if data_type != "Berekenen":
+                    st.info("Alleen voor berekende opbrengst (goed weer); kies 'Berekenen' als type opbrengst data.")
+                else:
+                    n_weerjaren = st.number_input("Aantal gesimuleerde jaren", min_value=100, max_value=20000, value=2000, step=100, key="weerjaren_n")
+                    weerjaren_seed = st.number_input("Seed", min_value=0, value=0, key="weerjaren_seed")
+                    if st.toggle("Simuleer weerjaren", key="weerjaren"):
+                        with st.spinner("Weerjaren simuleren..."):
+                            weer = simuleer_weerjaren(data_verbruik.to_numpy(), opbrengst_goed_weer.to_numpy(), grid, max_afname,
+                                                      max_teruglevering, n_jaren=int(n_weerjaren), seed=int(weerjaren_seed))
+                        plot_weerjaren(weer, max_afname, max_teruglevering)
+                        st.dataframe(weer.samenvatting().round(1), use_container_width=True)
 
     # 7. Belastingduurkromme
     with tab1:
-        st.markdown("#### Belastingduurkromme (op basis van verbruik)")
-        plotter.plot_belastingduurkromme(data_verbruik)
-        
+        if tab1.open:
+            st.markdown("#### Belastingduurkromme (op basis van verbruik)")
+            toon_netto = st.checkbox("Toon ook netto belasting (verbruik − opbrengst)", value=False, key="duurkromme_netto")
+            plotter.plot_belastingduurkromme(data_verbruik.rename("Verbruik"), _opbrengst=data_opbrengst if toon_netto else None)
+
+    # 8. Accu simulatie
+    with tab8:
+        if tab8.open:
+            st.markdown("#### Accu simulatie (hele periode, week als uitsnede)")
+            c1, c2, c3 = st.columns(3)
+            accu_capaciteit = c1.number_input("Accucapaciteit (kWh)", min_value=0.0, value=100.0, step=10.0, key="accu_capaciteit")
+            accu_vermogen = c2.number_input("Max. laad-/ontlaadvermogen (kW, 0 = onbeperkt)", min_value=0.0, value=50.0, step=5.0, key="accu_vermogen")
+            accu_rendement = c3.slider("Round-trip rendement (%)", min_value=50, max_value=100, value=90, key="accu_rendement") / 100
+
+            strategie = None
+            if st.toggle("Strategie instellen (anders: alleen pieken boven de afnamelimiet opvangen)", key="accu_strategie"):
+                c1, c2 = st.columns(2)
+                peak_shaven = c1.checkbox("Peak shaven", value=True, key="accu_peak_shaven")
+                grenswaarde = c1.number_input("Grenswaarde peak shaven (kW)", min_value=0.0, value=float(max_afname), key="accu_grenswaarde")
+                reserve = c1.number_input("Reserve voor pieken (kWh)", min_value=0.0, value=0.0, key="accu_reserve")
+                pv_zelf = c1.checkbox("PV-zelfconsumptie", value=False, key="accu_pv_zelf")
+                soc_nacht = c2.checkbox("'s Nachts bijladen (00:00–06:00)", value=False, key="accu_soc_nacht")
+                soc_doel = c2.number_input("Doel accustand 's nachts (kWh)", min_value=0.0, value=float(accu_capaciteit), key="accu_soc_doel")
+                var_tarieven = c2.checkbox("Variabele tarieven (laden goedkoop, ontladen duur)", value=False, key="accu_var_tarieven")
+                tarief_tekst = c2.text_input("Tarief per uur 00..23 (€/kWh, komma-gescheiden)", value=STANDAARD_UURTARIEVEN, key="accu_tarieven")
+                max_laden_net = c2.number_input("Max. laden uit het net (kW, 0 = niet)", min_value=0.0, value=0.0, key="accu_max_laden_net")
+                if soc_nacht and max_laden_net == 0:
+                    st.warning("'s Nachts bijladen vraagt laden uit het net; zet 'Max. laden uit het net' boven 0 kW, anders staat het uit.")
+                try:
+                    tarieven = [float(t) for t in tarief_tekst.split(",")]
+                except ValueError:
+                    tarieven = None
+                if var_tarieven and (tarieven is None or len(tarieven) != 24):
+                    st.warning("Geef precies 24 uurtarieven op.")
+                    tarieven = None
+                strategie = dict(peak_shaven=peak_shaven, grenswaarde=grenswaarde, min_vermogen_accu=reserve,
+                                 pv_zelf_consumption=pv_zelf, state_of_charge=soc_nacht, soc_doel=soc_doel,
+                                 var_tarieven=var_tarieven, tarieven=tarieven, max_laden=max_laden_net)
+
+            plot_accu_week_simulatie_select(data_verbruik, data_opbrengst, accu_capaciteit, max_afname, max_teruglevering,
+                                            grid=grid, max_laden=accu_vermogen, max_ontladen=accu_vermogen, rendement=accu_rendement,
+                                            strategie=strategie)
+
+            with st.expander("Dimensionering: capaciteit × vermogen over de hele periode"):
+                c1, c2 = st.columns(2)
+                cap_min, cap_max = c1.slider("Capaciteit (kWh)", min_value=0, max_value=2000, value=(0, 500), step=10, key="sweep_capaciteit")
+                n_cap = c2.number_input("Aantal capaciteiten", min_value=2, max_value=100, value=20, key="sweep_n_capaciteit")
+                vermogens = st.multiselect("Vermogens (kW, 0 = onbeperkt)", options=[0, 10, 25, 50, 75, 100, 150, 200, 250, 300, 400, 500],
+                                           default=[25, 50, 100, 200], key="sweep_vermogens")
+                if vermogens:
+                    plot_accu_sweep(data_verbruik, data_opbrengst, np.linspace(cap_min, cap_max, int(n_cap)), vermogens,
+                                    max_afname, max_teruglevering, rendement=accu_rendement, grid=grid)
+            
+
+    # 9. Oriëntatie optimalisatie
+    with tab9:
+        if tab9.open:
+            st.markdown("#### Oriëntatie en hellingshoek optimaliseren (tegen het werkelijke verbruik)")
+            if data_type != "Berekenen":
+                st.info("Kies 'Berekenen' als type opbrengst data om de oriëntatie te optimaliseren.")
+            elif module is None:
+                st.info("Oriëntatie optimaliseren vereist pvlib en de CEC-database.")
+            elif st.toggle("Bereken raster (stappen van 5°)", key="orientatie_optimalisatie"):
+                with st.spinner("Raster doorrekenen..."):
+                    raster = optimaliseer_orientatie(location, module, inverter, temperature_parameters, data_verbruik, dakvlakken[0],
+                                                     start=begin_datum, end=begin_datum + pd.DateOffset(years=1),
+                                                     max_teruglevering=max_teruglevering, verliesfactor=0.65)
+                kengetal = st.selectbox("Kengetal", options=list(ORIENTATIE_KENGETALLEN),
+                                        format_func=lambda k: ORIENTATIE_KENGETALLEN[k][0], key="orientatie_kengetal")
+                beste = plot_orientatie_heatmap(raster, kengetal, huidig=(orientatie1, Hellingshoek1))
+                st.caption("Stringopbouw van zijde 1; PVWatts-benadering voor het raster, de beste cel exact nagerekend:")
+                exact = simuleer_vlakken(location, module, inverter, temperature_parameters,
+                                         [PVVlak(beste["hellingshoek"], beste["azimuth"], Panelen_per_reeks1, Reeksen_per_omvormer1, aantal=Reeksen1)],
+                                         start=begin_datum, end=begin_datum + pd.DateOffset(years=1), verliesfactor=0.65)
+                st.write(f"Beste oriëntatie: {kiezer_graden(beste['azimuth']):.0f}° op de oriëntatiekiezer, hellingshoek {beste['hellingshoek']:.0f}° — "
+                         f"{exact.jaaropbrengst_kwh().iloc[0]:.0f} kWh/jaar, zelfconsumptie {beste['zelfconsumptie_pct']:.1f}%, "
+                         f"{beste['uren_boven_teruglevering']:.1f} uur boven max teruglevering")
+
+            if data_type == "Berekenen" and module is not None and st.toggle("Paneeltypes vergelijken (huidige dakvlakken)", key="scenario_vergelijking"):
+                scenarios = [PVScenario(f"{wp} Wp – {naam}", naam, tuple(dakvlakken)) for wp, namen in POWER_TO_TYPES.items() for naam in namen]
+                with st.spinner(f"{len(scenarios)} scenario's doorrekenen..."):
+                    vergelijking = vergelijk_scenarios(location, scenarios, begin_datum, begin_datum + pd.DateOffset(years=1),
+                                                       temperature_parameters, data_verbruik, max_teruglevering=max_teruglevering)
+                st.dataframe(vergelijking.round(1), use_container_width=True)
+                st.caption(f"Vanaf {2 * MIN_SCENARIOS_PER_WORKER} scenario's wordt over meerdere processen verdeeld; "
+                           "kleinere vergelijkingen rekenen in dit proces (sneller dan workers opstarten).")
 
     try:
         df_out = pd.DataFrame({"Verbruik (kWh)": data_verbruik/4, "Opbrengst (kWh)": data_opbrengst/4})
@@ -0,0 +1,80 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SLEUTEL_PERCENTAGES = (0, 1, 5, 10, 25, 50, 75, 90, 95, 99, 100)
+
+
+@dataclass(frozen=True)
+class Belastingduurkromme:
+    """
+    Array-resultaat van bereken_belastingduurkromme:
+    - duur: float32 (n_punten,) percentage van de tijd (0..100)
+    - waarden: float32 (n_reeksen, n_punten) aflopend gesorteerde belasting per reeks
+    - sleutelwaarden: exacte belasting per sleutelpercentage (index) en reeks (kolom)
+    """
+    duur: np.ndarray
+    waarden: np.ndarray
+    namen: tuple
+    sleutelwaarden: pd.DataFrame
+
+    def reeks(self, naam) -> np.ndarray:
+        return self.waarden[self.namen.index(naam)]
+
+
+def netto_belasting(verbruik, opbrengst) -> np.ndarray:
+    """Netto belasting per kwartier (verbruik − opbrengst) als float32."""
+    return np.asarray(verbruik, dtype=np.float32) - np.asarray(opbrengst, dtype=np.float32)
+
+
+def _als_reeksen(reeksen) -> dict:
+    if isinstance(reeksen, pd.DataFrame):
+        return {str(c): reeksen[c].to_numpy() for c in reeksen.columns}
+    if isinstance(reeksen, dict):
+        return dict(reeksen)
+    naam = getattr(reeksen, "name", None)
+    return {"Verbruik" if naam is None else str(naam): reeksen}
+
+
+def _aflopend(x) -> np.ndarray:
+    x = np.array(x, dtype=np.float32)  # kopie: in-place sorteren mag de bron niet raken
+    x = x[~np.isnan(x)]
+    x.sort()
+    return x[::-1]
+
+
+def bereken_belastingduurkromme(reeksen, n_punten: int | None = 1000, opbrengst=None,
+                                sleutel_percentages=SLEUTEL_PERCENTAGES) -> Belastingduurkromme:
+    """
+    Belastingduurkromme voor één of meer reeksen (Series/array, dict naam -> reeks of DataFrame met één kolom per meter):
+    - np.sort in-place op float32, duur-as via linspace
+    - n_punten: aantal punten op de duur-as (None = alle kwartieren); elk punt is een echte meetwaarde,
+      de waarde die gedurende duur% van de tijd wordt gehaald of overschreden
+    - opbrengst: optioneel, voegt per reeks ook de netto belasting (reeks − opbrengst) toe
+    """
+    reeksen = _als_reeksen(reeksen)
+    if opbrengst is not None:
+        for naam, x in list(reeksen.items()):
+            reeksen[f"{naam} − opbrengst"] = netto_belasting(x, opbrengst)
+
+    gesorteerd = {naam: _aflopend(x) for naam, x in reeksen.items()}
+    gesorteerd = {naam: x for naam, x in gesorteerd.items() if len(x)}
+    if not gesorteerd:
+        leeg = np.empty(0, dtype=np.float32)
+        return Belastingduurkromme(leeg, leeg.reshape(0, 0), (), pd.DataFrame())
+
+    n_max = max(len(x) for x in gesorteerd.values())
+    n_punten = n_max if not n_punten else min(int(n_punten), n_max)
+    duur = np.linspace(0, 100, n_punten, dtype=np.float32)
+    sleutel = np.asarray(sleutel_percentages, dtype=np.float64)
+
+    def op_duur(x, perc):
+        # punt i van de aflopende reeks hoort bij duur i/n*100
+        i = np.minimum((perc / 100 * len(x)).astype(np.int64), len(x) - 1)
+        return x[i]
+
+    waarden = np.stack([op_duur(x, duur.astype(np.float64)) for x in gesorteerd.values()]).astype(np.float32)
+    sleutelwaarden = pd.DataFrame({naam: op_duur(x, sleutel) for naam, x in gesorteerd.items()},
+                                  index=pd.Index(sleutel_percentages, name="duur (%)"))
+    return Belastingduurkromme(duur, waarden, tuple(gesorteerd), sleutelwaarden)
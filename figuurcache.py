@@ -0,0 +1,185 @@
+import dataclasses
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import matplotlib
+import matplotlib.image as mpimg
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Gerenderde figuren (PNG/SVG-bytes) op een vingerafdruk van de invoerarrays plus de plotopties.
+# Een rerun met dezelfde invoer toont de bytes in plaats van de matplotlib-figuur opnieuw op te bouwen
+# en te rasteren. De bytes staan in een LRU in het procesgeheugen, begrensd op het totaal aantal bytes;
+# wat eruit valt gaat naar schijf, zodat een later verzoek nog zonder renderen bediend wordt.
+CACHE_DIR = Path(os.environ.get("FIGUURCACHE_DIR", Path(__file__).parent / ".cache" / "figuren"))
+CACHE_VERSIE = 2  # ophogen als de figuren zelf veranderen (opmaak, labels)
+MAX_BYTES_IN_GEHEUGEN = 64 * 2**20
+MAX_BYTES_OP_SCHIJF = 512 * 2**20
+SAVEFIG_OPTIES = {"bbox_inches": "tight"}  # zelfde als st.pyplot
+MAX_DPI = 200  # st.pyplot rendert op 200 dpi
+# st.image verkleint (en hercodeert) bij elke aanroep alles wat breder is dan dit. Figuren worden daarom op
+# een dpi gerenderd die (ongeveer) op deze breedte uitkomt: geen dubbel zo grote PNG coderen om hem daarna te
+# verkleinen, en de gecachete bytes gaan ongewijzigd naar de browser.
+MAX_BREEDTE_PX = 2 * 730
+
+LOGO_PATH = Path(__file__).parent / "LO-Bind-FC-RGB.png"
+
+
+@lru_cache(maxsize=None)
+def logo() -> np.ndarray:
+    """Het logo als (alleen-lezen) RGB(A)-array, één keer per proces ingelezen."""
+    beeld = mpimg.imread(LOGO_PATH)
+    beeld.flags.writeable = False
+    return beeld
+
+
+def _voeg_toe(h, deel) -> None:
+    if deel is None or isinstance(deel, (bool, int, float, str)):
+        h.update(f"{type(deel).__name__}:{deel!r};".encode())
+    elif isinstance(deel, bytes):
+        h.update(f"b:{len(deel)};".encode())
+        h.update(deel)
+    elif isinstance(deel, np.ndarray):
+        a = np.ascontiguousarray(deel)
+        h.update(f"nd:{a.dtype.str}:{a.shape};".encode())
+        h.update(a.view(np.uint8) if a.dtype != object else repr(a.tolist()).encode())
+    elif isinstance(deel, pd.Index):
+        if isinstance(deel, pd.DatetimeIndex):
+            h.update(f"dt:{deel.tz};".encode())
+            _voeg_toe(h, deel.as_unit("ns").asi8)
+        else:
+            _voeg_toe(h, np.asarray(deel))
+    elif isinstance(deel, pd.Series):
+        h.update(f"s:{deel.name!r};".encode())
+        _voeg_toe(h, deel.index)
+        _voeg_toe(h, deel.to_numpy())
+    elif isinstance(deel, pd.DataFrame):
+        h.update(b"df;")
+        _voeg_toe(h, deel.index)
+        for kolom in deel.columns:
+            _voeg_toe(h, str(kolom))
+            _voeg_toe(h, deel[kolom].to_numpy())
+    elif isinstance(deel, (list, tuple)):
+        h.update(f"{type(deel).__name__}[{len(deel)}];".encode())
+        for d in deel:
+            _voeg_toe(h, d)
+    elif isinstance(deel, dict):
+        h.update(f"dict[{len(deel)}];".encode())
+        for k in sorted(deel, key=repr):
+            _voeg_toe(h, k)
+            _voeg_toe(h, deel[k])
+    elif dataclasses.is_dataclass(deel):
+        h.update(f"dc:{type(deel).__qualname__};".encode())
+        for veld in dataclasses.fields(deel):
+            _voeg_toe(h, getattr(deel, veld.name))
+    else:
+        h.update(f"{type(deel).__qualname__}:{deel!r};".encode())
+
+
+def vingerafdruk(*delen, **opties) -> str:
+    """Hash van de invoer (arrays, Series/DataFrames incl. index, scalars, tuples, dataclasses) en plotopties."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"v{CACHE_VERSIE}|mpl{matplotlib.__version__};".encode())
+    _voeg_toe(h, delen)
+    _voeg_toe(h, opties)
+    return h.hexdigest()
+
+
+_GEHEUGEN = OrderedDict()
+_BYTES = 0
+_LOCK = threading.Lock()
+
+
+def _cache_pad(sleutel: str, formaat: str) -> Path:
+    return CACHE_DIR / f"{sleutel}.{formaat}"
+
+
+def _spill(items) -> None:
+    """Uit het geheugen gevallen figuren naar schijf; daarna de oudste bestanden opruimen boven de grens."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for (sleutel, formaat), data in items:
+            pad = _cache_pad(sleutel, formaat)
+            if not pad.exists():
+                tmp = pad.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, pad)  # atomair: andere sessies zien nooit een half bestand
+        bestanden = sorted((p.stat().st_mtime, p.stat().st_size, p) for p in CACHE_DIR.iterdir() if p.suffix in (".png", ".svg"))
+        totaal = sum(b[1] for b in bestanden)
+        for _, grootte, pad in bestanden:
+            if totaal <= MAX_BYTES_OP_SCHIJF:
+                break
+            pad.unlink(missing_ok=True)
+            totaal -= grootte
+    except OSError:
+        pass  # schijfcache is een optimalisatie; zonder (bv. alleen-lezen map) wordt gewoon opnieuw gerenderd
+
+
+def _bewaar(sleutel: str, formaat: str, data: bytes) -> None:
+    global _BYTES
+    uitgevallen = []
+    with _LOCK:
+        if (sleutel, formaat) not in _GEHEUGEN:
+            _GEHEUGEN[(sleutel, formaat)] = data
+            _BYTES += len(data)
+        while _BYTES > MAX_BYTES_IN_GEHEUGEN and len(_GEHEUGEN) > 1:
+            item = _GEHEUGEN.popitem(last=False)
+            _BYTES -= len(item[1])
+            uitgevallen.append(item)
+    if uitgevallen:
+        _spill(uitgevallen)
+
+
+def _verklein_png(data: bytes) -> bytes:
+    """Zelfde verkleining als st.image (bilineair naar MAX_BREEDTE_PX), maar één keer bij het renderen.
+    Alleen nog nodig als de tight bbox breder uitvalt dan de figuur (bv. een legenda buiten de assen)."""
+    from PIL import Image
+    beeld = Image.open(io.BytesIO(data))
+    if beeld.width <= MAX_BREEDTE_PX:
+        return data
+    beeld = beeld.resize((MAX_BREEDTE_PX, int(beeld.height * MAX_BREEDTE_PX / beeld.width)), resample=Image.BILINEAR)
+    buffer = io.BytesIO()
+    beeld.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_figuur(sleutel: str, teken, formaat: str = "png") -> bytes:
+    """
+    Bytes van de figuur bij `sleutel` (zie vingerafdruk). Volgorde: procesgeheugen, schijf, renderen.
+    `teken()` bouwt alleen bij een miss de matplotlib-figuur; die wordt na het opslaan gesloten.
+    """
+    with _LOCK:
+        data = _GEHEUGEN.get((sleutel, formaat))
+        if data is not None:
+            _GEHEUGEN.move_to_end((sleutel, formaat))
+            return data
+
+    pad = _cache_pad(sleutel, formaat)
+    try:
+        data = pad.read_bytes()
+    except OSError:
+        fig = teken()
+        buffer = io.BytesIO()
+        try:
+            dpi = min(MAX_DPI, MAX_BREEDTE_PX / fig.get_figwidth())
+            fig.savefig(buffer, format=formaat, dpi=dpi, **SAVEFIG_OPTIES)
+        finally:
+            plt.close(fig)
+        data = buffer.getvalue()
+        if formaat == "png":
+            data = _verklein_png(data)
+    _bewaar(sleutel, formaat, data)
+    return data
+
+
+def toon_figuur(sleutel: str, teken, formaat: str = "png") -> None:
+    """Als st.pyplot, maar via de figuurcache: bij dezelfde sleutel wordt niet opnieuw getekend."""
+    data = render_figuur(sleutel, teken, formaat)
+    st.image(data.decode() if formaat == "svg" else data, width="stretch")
@@ -0,0 +1,106 @@
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Interactieve variant van de reeksplots: de data gaat één keer als DataFrame (float32-kolommen, breed:
+# één kolom per reeks) naar de browser. Streamlit verstuurt die als Arrow-bytes; het omvouwen naar
+# reeks/waarde gebeurt in Vega-Lite zelf. Reeksen aan/uit (klik in de legenda) en zoomen/pannen
+# (scrollen/slepen, dubbelklik = terug) zijn daarmee puur client-side: geen rerun, geen nieuwe PNG.
+ZICHTBAAR_ONZICHTBAAR = (1.0, 0.06)  # lijndekking van aan- en uitgezette reeksen
+
+
+def _tijdas(index: pd.Index) -> pd.DatetimeIndex:
+    # kloktijd zonder tijdzone; met een UTC-schaal toont de browser precies deze tijden (geen omrekening
+    # naar de tijdzone van de gebruiker)
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def _data(index: pd.Index, reeksen: dict) -> pd.DataFrame:
+    df = pd.DataFrame({naam: np.asarray(waarden, dtype=np.float32) for naam, waarden in reeksen.items()})
+    df.insert(0, "tijd", _tijdas(index))
+    return df
+
+
+def _lijnen(data: pd.DataFrame, kleuren: dict, zichtbaar, y_titel: str, titel: str, x_titel: str = "Tijd"):
+    """Gevouwen lijnlaag met legenda-schakelaars; `zichtbaar` = reeksen die bij openen aan staan."""
+    namen = list(kleuren)
+    legenda = alt.selection_point(fields=["reeks"], bind="legend", toggle="true",
+                                  value=[{"reeks": n} for n in zichtbaar])
+    zoom = alt.selection_interval(bind="scales", encodings=["x"])
+    kleur = alt.Color("reeks:N", scale=alt.Scale(domain=namen, range=[kleuren[n] for n in namen]),
+                      legend=alt.Legend(title="Klik om aan/uit te zetten", orient="top"))
+    aan, uit = ZICHTBAAR_ONZICHTBAAR
+    return (
+        alt.Chart(data, title=titel)
+        .transform_fold(namen, as_=["reeks", "waarde"])
+        .mark_line(strokeWidth=1)
+        .encode(
+            x=alt.X("tijd:T", title=x_titel, scale=alt.Scale(type="utc"), axis=alt.Axis(format="%d-%m %H:%M")),
+            y=alt.Y("waarde:Q", title=y_titel),
+            color=kleur,
+            opacity=alt.condition(legenda, alt.value(aan), alt.value(uit), empty=False),
+            tooltip=[alt.Tooltip("utcyearmonthdatehoursminutes(tijd):T", title="Tijd"), "reeks:N",
+                     alt.Tooltip("waarde:Q", format=".2f")],
+        )
+        .add_params(legenda, zoom)
+    )
+
+
+def _limieten(limieten: dict):
+    """Horizontale limietlijnen (naam -> (waarde, kleur)), gestippeld."""
+    df = pd.DataFrame({"limiet": list(limieten), "waarde": [w for w, _ in limieten.values()]})
+    return alt.Chart(df).mark_rule(strokeDash=[4, 3], strokeWidth=1).encode(
+        y="waarde:Q",
+        color=alt.Color("limiet:N", scale=alt.Scale(domain=list(limieten), range=[k for _, k in limieten.values()]),
+                        legend=alt.Legend(title="Limieten", orient="top")),
+    )
+
+
+def reeksen_grafiek(opbrengst: pd.Series, verbruik: pd.Series, max_afname=0, max_teruglevering=0,
+                    titel="Opbrengst vs Verbruik", zichtbaar=("Opbrengst", "Verbruik", "Verschil")):
+    """Interactieve tegenhanger van PlotManager.plot_reeksen_en_verschil (opbrengst negatief getekend)."""
+    min_len = min(len(opbrengst), len(verbruik))
+    o = opbrengst.to_numpy(np.float32)[:min_len]
+    v = verbruik.to_numpy(np.float32)[:min_len]
+    data = _data(opbrengst.index[:min_len], {"Opbrengst": -o, "Verbruik": v, "Verschil": v - o})
+    kleuren = {"Opbrengst": "green", "Verbruik": "red", "Verschil": "blue"}
+    grafiek = _lijnen(data, kleuren, zichtbaar, "Energie (kW)", titel)
+    grafiek = alt.layer(grafiek, _limieten({"Max afname": (max_afname, "red"),
+                                            "Max teruglevering": (-max_teruglevering, "purple")}))
+    st.altair_chart(grafiek.resolve_scale(color="independent"), width="stretch")
+
+
+def energiebalans_dag_grafiek(verbruik: pd.Series, opbrengst: pd.Series, max_afname, max_teruglevering, pos=1,
+                              zichtbaar=("Verbruik", "Opbrengst", "Saldo (beperkt)"), toon_limieten=True,
+                              toon_limiet_overschrijdingen=False):
+    """
+    Interactieve tegenhanger van PlotManager.plot_energiebalans_dag. Overschrijdingen (saldo buiten de
+    limieten) zijn een vlak tussen saldo en saldo (beperkt), met een eigen legenda-schakelaar.
+    """
+    min_len = min(len(verbruik), len(opbrengst))
+    v = verbruik.to_numpy(np.float32)[:min_len]
+    o = opbrengst.to_numpy(np.float32)[:min_len]
+    saldo = v - o
+    beperkt = np.clip(saldo, -max_teruglevering, max_afname)
+    data = _data(verbruik.index[:min_len], {"Verbruik": v, "Opbrengst": pos * o, "Saldo (beperkt)": beperkt, "Saldo": saldo})
+    kleuren = {"Verbruik": "red", "Opbrengst": "green", "Saldo (beperkt)": "blue", "Saldo": "orange"}
+    lagen = [_lijnen(data, kleuren, zichtbaar, "Energie", "Energiebalans dag", x_titel="Tijdstip")]
+
+    overschrijding = data.assign(beperkt=beperkt)[saldo != beperkt]
+    if len(overschrijding):
+        schakelaar = alt.selection_point(fields=["laag"], bind="legend", toggle="true",
+                                         value=[{"laag": "Overschrijding"}] if toon_limiet_overschrijdingen else None)
+        lagen.append(
+            alt.Chart(overschrijding).transform_calculate(laag="'Overschrijding'")
+            .mark_bar(width=4)
+            .encode(x=alt.X("tijd:T", scale=alt.Scale(type="utc")), y="Saldo:Q", y2="beperkt:Q",
+                    color=alt.Color("laag:N", scale=alt.Scale(domain=["Overschrijding"], range=["gold"]),
+                                    legend=alt.Legend(title="Klik om aan/uit te zetten", orient="top")),
+                    opacity=alt.condition(schakelaar, alt.value(0.6), alt.value(0.0), empty=False))
+            .add_params(schakelaar)
+        )
+    if toon_limieten:
+        lagen.append(_limieten({"Max afname": (max_afname, "red"), "Max teruglevering": (pos * max_teruglevering, "purple")}))
+    st.altair_chart(alt.layer(*lagen).resolve_scale(color="independent"), width="stretch")
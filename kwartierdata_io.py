@@ -0,0 +1,173 @@
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Elke upload wordt één keer geparsed en als ongecomprimeerd Arrow IPC-bestand
+# (feather v2) weggeschreven onder de hash van de inhoud. Alle volgende reruns,
+# sessies en tabs memory-mappen dat bestand in plaats van de Excel opnieuw te lezen.
+CACHE_DIR = Path(os.environ.get("KWARTIERDATA_CACHE_DIR", Path(__file__).parent / ".cache" / "kwartierdata"))
+CACHE_VERSIE = 2  # ophogen als de opslagindeling verandert
+CHUNK_RIJEN = 8192  # rijen per blok bij het streamend inlezen; bepaalt het piekgeheugen
+
+
+def _upload_bytes(file) -> bytes:
+    """Bytes van een Streamlit UploadedFile, file-object of pad."""
+    if isinstance(file, bytes):
+        return file
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    if isinstance(file, (str, Path)):
+        return Path(file).read_bytes()
+    pos = file.tell()
+    data = file.read()
+    file.seek(pos)
+    return data
+
+
+def upload_hash(data: bytes, **opties) -> str:
+    """Inhoudshash van de upload plus de inleesopties (andere opties = ander cachebestand)."""
+    h = hashlib.sha256(data)
+    h.update(f"v{CACHE_VERSIE}|{sorted(opties.items())}".encode())
+    return h.hexdigest()
+
+
+def schrijf_arrow(df: pd.DataFrame, pad: Path) -> None:
+    """DataFrame (met index) atomair als ongecomprimeerd Arrow/Feather-bestand; ook gebruikt door de andere schijfcaches."""
+    # NaN blijft NaN (geen null-bitmap), zodat inlezen zero-copy kan blijven
+    kolommen = {"__index__": pa.array(df.index.values)}
+    for c in df.columns:
+        kolommen[str(c)] = pa.array(df[c].values, from_pandas=False) if df[c].dtype.kind == "f" else pa.array(df[c])
+    table = pa.table(kolommen)
+    pad.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pad.with_suffix(f".{os.getpid()}.tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, pad)  # atomair: andere sessies zien nooit een half bestand
+
+
+def lees_arrow(pad: Path) -> pd.DataFrame:
+    """Tegenhanger van schrijf_arrow: memory-mapped inlezen, float-kolommen zonder kopie."""
+    table = feather.read_table(pad, memory_map=True)
+    df = table.to_pandas(split_blocks=True)
+    df = df.set_index("__index__")
+    df.index.name = None
+    return df
+
+
+def _is_csv(data: bytes) -> bool:
+    # .xlsx is een zip-archief; alles wat niet met de zip-signatuur begint behandelen we als CSV
+    return not data[:4].startswith(b"PK\x03\x04")
+
+
+def _naar_float32(waarden: list) -> np.ndarray:
+    try:
+        return np.array(waarden, dtype=np.float32)
+    except (TypeError, ValueError):
+        # tekst/gemengde cellen: per waarde converteren, ongeldig -> NaN
+        return pd.to_numeric(pd.Series(waarden, dtype=object), errors="coerce").to_numpy(np.float32)
+
+
+def _iter_excel_chunks(data: bytes, index_col: int, chunk_rijen: int):
+    """Lever (kolomnamen, index, waarden[float32]) per blok van max. chunk_rijen rijen."""
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        rijen = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rijen, None)
+        if header is None:
+            return
+        namen = [f"Unnamed: {j}" if h is None else str(h) for j, h in enumerate(header)]
+        waarde_cols = [j for j in range(len(namen)) if j != index_col]
+        kolomnamen = [namen[j] for j in waarde_cols]
+
+        buffer = []
+        for rij in rijen:
+            if all(c is None for c in rij):
+                continue
+            buffer.append(rij)
+            if len(buffer) == chunk_rijen:
+                yield kolomnamen, *_excel_blok(buffer, index_col, waarde_cols)
+                buffer = []
+        if buffer:
+            yield kolomnamen, *_excel_blok(buffer, index_col, waarde_cols)
+    finally:
+        wb.close()
+
+
+def _excel_blok(buffer: list, index_col: int, waarde_cols: list):
+    breedte = max(waarde_cols + [index_col]) + 1
+    buffer = [r if len(r) >= breedte else tuple(r) + (None,) * (breedte - len(r)) for r in buffer]
+    index = pd.to_datetime([r[index_col] for r in buffer], errors="coerce").values
+    waarden = np.empty((len(buffer), len(waarde_cols)), dtype=np.float32)
+    for k, j in enumerate(waarde_cols):
+        waarden[:, k] = _naar_float32([r[j] for r in buffer])
+    return index, waarden
+
+
+def _iter_csv_chunks(data: bytes, index_col: int, chunk_rijen: int, max_rijen: int | None):
+    eerste_regel = data.split(b"\n", 1)[0].decode("utf-8", errors="ignore")
+    # NL-exports gebruiken vaak ';' als scheidingsteken en ',' als decimaalteken
+    sep, decimal = (";", ",") if eerste_regel.count(";") > eerste_regel.count(",") else (",", ".")
+    reader = pd.read_csv(io.BytesIO(data), sep=sep, decimal=decimal, index_col=index_col,
+                         chunksize=chunk_rijen, nrows=max_rijen)
+    with reader:
+        for blok in reader:
+            index = pd.to_datetime(blok.index, errors="coerce").values
+            waarden = np.empty(blok.shape, dtype=np.float32)
+            for k, c in enumerate(blok.columns):
+                waarden[:, k] = pd.to_numeric(blok[c], errors="coerce").to_numpy(np.float32)
+            yield [str(c) for c in blok.columns], index, waarden
+
+
+def lees_kwartierdata_stream(file, index_col=0, max_rijen=None, chunk_rijen=CHUNK_RIJEN) -> pd.DataFrame:
+    """
+    Streamend inlezen van een Excel- (openpyxl read_only) of CSV-export:
+    - rijen worden per blok van chunk_rijen geparsed en direct naar float32 omgezet
+    - stopt zodra max_rijen rijen gelezen zijn (rest van het bestand wordt niet geparsed)
+    - piekgeheugen = resultaat + één blok, onafhankelijk van de bestandsgrootte
+    Alle waardekolommen worden float32 (niet-numerieke cellen -> NaN), de index datetime.
+    """
+    data = _upload_bytes(file)
+    if _is_csv(data):
+        blokken = _iter_csv_chunks(data, index_col, chunk_rijen, max_rijen)
+    else:
+        blokken = _iter_excel_chunks(data, index_col, chunk_rijen)
+
+    kolomnamen, index_delen, waarde_delen = [], [], []
+    gevuld = 0
+    for kolomnamen, index, waarden in blokken:
+        if max_rijen is not None:
+            over = max_rijen - gevuld
+            index, waarden = index[:over], waarden[:over]
+        index_delen.append(index)
+        waarde_delen.append(waarden)
+        gevuld += len(index)
+        if max_rijen is not None and gevuld >= max_rijen:
+            blokken.close()  # vroeg stoppen: workbook/reader netjes sluiten
+            break
+
+    if not index_delen:
+        return pd.DataFrame(columns=kolomnamen, dtype="float32")
+    index = pd.DatetimeIndex(np.concatenate(index_delen))
+    waarden = np.concatenate(waarde_delen) if len(waarde_delen) > 1 else waarde_delen[0]
+    return pd.DataFrame(waarden, index=index, columns=kolomnamen, copy=False)
+
+
+def lees_kwartierdata(file, index_col=0, max_rijen=None) -> pd.DataFrame:
+    """
+    Lees een geüploade kwartierdata-export (Excel of CSV) via de Arrow-cache:
+    - cache hit: memory-map het bestaande .arrow-bestand (geen parse)
+    - cache miss: streamend inlezen (float32, datetime-index) en één keer wegschrijven
+    """
+    data = _upload_bytes(file)
+    sleutel = upload_hash(data, index_col=index_col, max_rijen=max_rijen)
+    pad = CACHE_DIR / f"{sleutel}.arrow"
+    if not pad.exists():
+        df = lees_kwartierdata_stream(data, index_col=index_col, max_rijen=max_rijen)
+        schrijf_arrow(df, pad)
+    return lees_arrow(pad)
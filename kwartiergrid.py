@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+KWARTIEREN_PER_DAG = 96
+KWARTIEREN_PER_WEEK = 7 * KWARTIEREN_PER_DAG
+_KWARTIER_NS = 900_000_000_000
+_DAG_NS = 86_400_000_000_000
+
+
+def _alleen_lezen(a: np.ndarray) -> np.ndarray:
+    a.flags.writeable = False
+    return a
+
+
+@dataclass(frozen=True, eq=False)
+class QuarterGrid:
+    """
+    Kalenderindex van een gealigneerde kwartierreeks, één keer opgebouwd na
+    align_to_common_15min_grid en gedeeld door alle analyses:
+    - dag_code / week_code / maand_code: int32 bucket per kwartier (0 = eerste dag/week/maand
+      van de periode; lege dagen/weken houden hun code, zoals resample dat doet)
+    - kwartier_van_dag: int32 0..95, weekdag: int32 0=maandag..6=zondag
+    - dag_offsets: n_dagen+1 grenzen, dag d = rijen dag_offsets[d]:dag_offsets[d+1]
+    Analyses slicen of bincount'en hierop in plaats van de datetime-componenten opnieuw af te leiden.
+    """
+    index: pd.DatetimeIndex
+    dag_code: np.ndarray
+    week_code: np.ndarray
+    maand_code: np.ndarray
+    kwartier_van_dag: np.ndarray
+    weekdag: np.ndarray
+    dag_offsets: np.ndarray
+    week_offsets: np.ndarray
+    maand_offsets: np.ndarray
+    eerste_dag: int    # dagen sinds 1970-01-01 van dag_code 0
+    eerste_week: int   # dagen sinds 1970-01-01 van de maandag van week_code 0
+    eerste_maand: int  # maanden sinds 1970-01 van maand_code 0
+
+    @classmethod
+    def from_index(cls, index) -> "QuarterGrid":
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)  # kalender op lokale wandkloktijd
+        if getattr(index, "unit", "ns") != "ns":
+            index = index.as_unit("ns")
+        if len(index) and not index.is_monotonic_increasing:
+            raise ValueError("QuarterGrid verwacht een oplopend gesorteerde index (gebruik align_to_common_15min_grid).")
+
+        ns = index.asi8
+        dagnr = ns // _DAG_NS
+        eerste_dag = int(dagnr[0]) if len(ns) else 0
+        # 1970-01-01 was een donderdag: +3 maakt maandag dag 0 van de week
+        weeknr = (dagnr + 3) // 7
+        eerste_week = int(weeknr[0]) if len(ns) else 0
+        maandnr = index.values.astype("datetime64[M]").astype(np.int64)
+        eerste_maand = int(maandnr[0]) if len(ns) else 0
+
+        dag_code = (dagnr - eerste_dag).astype(np.int32)
+        week_code = (weeknr - eerste_week).astype(np.int32)
+        maand_code = (maandnr - eerste_maand).astype(np.int32)
+        kwartier = ((ns - dagnr * _DAG_NS) // _KWARTIER_NS).astype(np.int32)
+        weekdag = ((dagnr + 3) % 7).astype(np.int32)
+
+        def grenzen(codes):
+            n = int(codes[-1]) + 1 if len(codes) else 0
+            return np.searchsorted(codes, np.arange(n + 1)).astype(np.int64)
+
+        return cls(
+            index=index,
+            dag_code=_alleen_lezen(dag_code),
+            week_code=_alleen_lezen(week_code),
+            maand_code=_alleen_lezen(maand_code),
+            kwartier_van_dag=_alleen_lezen(kwartier),
+            weekdag=_alleen_lezen(weekdag),
+            dag_offsets=_alleen_lezen(grenzen(dag_code)),
+            week_offsets=_alleen_lezen(grenzen(week_code)),
+            maand_offsets=_alleen_lezen(grenzen(maand_code)),
+            eerste_dag=eerste_dag,
+            eerste_week=eerste_week,
+            eerste_maand=eerste_maand,
+        )
+
+    # --- afmetingen & labels ---
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def n_dagen(self) -> int:
+        return len(self.dag_offsets) - 1
+
+    @property
+    def n_weken(self) -> int:
+        return len(self.week_offsets) - 1
+
+    @property
+    def n_maanden(self) -> int:
+        return len(self.maand_offsets) - 1
+
+    @property
+    def dagen(self) -> pd.DatetimeIndex:
+        """Datum (00:00) per dag_code."""
+        d = np.arange(self.eerste_dag, self.eerste_dag + self.n_dagen, dtype=np.int64)
+        return pd.DatetimeIndex(d.astype("datetime64[D]").astype("datetime64[ns]"))
+
+    @property
+    def weken(self) -> pd.DatetimeIndex:
+        """Maandag (00:00) per week_code."""
+        w = np.arange(self.eerste_week, self.eerste_week + self.n_weken, dtype=np.int64) * 7 - 3
+        return pd.DatetimeIndex(w.astype("datetime64[D]").astype("datetime64[ns]"))
+
+    @property
+    def maanden(self) -> pd.DatetimeIndex:
+        """Eerste dag van de maand per maand_code."""
+        m = np.arange(self.eerste_maand, self.eerste_maand + self.n_maanden, dtype=np.int64)
+        return pd.DatetimeIndex(m.astype("datetime64[M]").astype("datetime64[ns]"))
+
+    @property
+    def iso_weeknummers(self) -> np.ndarray:
+        """ISO-weeknummer per week_code (alleen n_weken datums, niet de hele reeks)."""
+        return self.weken.isocalendar().week.to_numpy(np.int32)
+
+    @property
+    def dagen_met_data(self) -> np.ndarray:
+        """dag_codes die minstens één kwartier bevatten (voor navigatie langs dagen)."""
+        return np.flatnonzero(self.dag_offsets[1:] > self.dag_offsets[:-1]).astype(np.int32)
+
+    # --- slicing ---
+    def dag_code_van(self, dag) -> int:
+        """dag_code van een datum (date/str/Timestamp); -1 als de dag buiten de periode valt."""
+        d = int(pd.Timestamp(dag).normalize().value // _DAG_NS) - self.eerste_dag
+        return d if 0 <= d < self.n_dagen else -1
+
+    def dag_slice(self, dag) -> slice:
+        """O(1): positionele slice van de kwartieren van één dag (leeg als er geen data is)."""
+        d = self.dag_code_van(dag)
+        if d < 0:
+            return slice(0, 0)
+        return self.dag_slice_code(d)
+
+    def dag_slice_code(self, d: int) -> slice:
+        """Als dag_slice, maar direct op dag_code (Series.iloc[slice] is een view, geen kopie)."""
+        return slice(int(self.dag_offsets[d]), int(self.dag_offsets[d + 1]))
+
+    # --- reducties ---
+    def _reduceer(self, codes, offsets, values, how: str) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float32)
+        n = len(offsets) - 1
+        geldig = ~np.isnan(values)
+        aantal = np.bincount(codes, weights=geldig, minlength=n)
+        if how in ("sum", "mean"):
+            som = np.bincount(codes, weights=np.where(geldig, values, 0.0), minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                uit = som if how == "sum" else som / aantal
+        elif how in ("max", "min"):
+            uit = np.full(n, np.nan)
+            gevuld = np.flatnonzero(offsets[1:] > offsets[:-1])
+            if len(gevuld):
+                ufunc = np.fmax if how == "max" else np.fmin  # fmax/fmin negeren NaN
+                uit[gevuld] = ufunc.reduceat(values, offsets[:-1][gevuld])
+        else:
+            raise ValueError(f"Onbekende reductie '{how}', kies uit sum/mean/max/min.")
+        # net als resample(...).sum(min_count=1): buckets zonder geldige waarde -> NaN
+        uit = np.where(aantal > 0, uit, np.nan)
+        return uit.astype(np.float32)
+
+    def per_dag(self, values, how: str = "sum") -> np.ndarray:
+        return self._reduceer(self.dag_code, self.dag_offsets, values, how)
+
+    def per_week(self, values, how: str = "sum") -> np.ndarray:
+        return self._reduceer(self.week_code, self.week_offsets, values, how)
+
+    def per_maand(self, values, how: str = "sum") -> np.ndarray:
+        return self._reduceer(self.maand_code, self.maand_offsets, values, how)
+
+    # --- matrices ---
+    def dag_matrix(self, values) -> np.ndarray:
+        """(n_dagen, 96) float32, ontbrekende kwartieren NaN."""
+        m = np.full((self.n_dagen, KWARTIEREN_PER_DAG), np.nan, dtype=np.float32)
+        m[self.dag_code, self.kwartier_van_dag] = np.asarray(values, dtype=np.float32)
+        return m
+
+    def week_matrix(self, values) -> np.ndarray:
+        """(n_weken, 672) float32, kolom 0 = maandag 00:00, ontbrekende kwartieren NaN."""
+        m = np.full((self.n_weken, KWARTIEREN_PER_WEEK), np.nan, dtype=np.float32)
+        m[self.week_code, self.weekdag * KWARTIEREN_PER_DAG + self.kwartier_van_dag] = np.asarray(values, dtype=np.float32)
+        return m
+
+
+def uitlijnen_met_grid(verbruik: pd.Series, opbrengst: pd.Series, grid: QuarterGrid | None = None):
+    """
+    Float32-arrays van verbruik en opbrengst op dezelfde tijdstempels plus de bijbehorende QuarterGrid.
+    Met een grid die al bij beide reeksen hoort (na align_to_common_15min_grid) wordt er niets herberekend.
+    """
+    if grid is not None and len(grid) == len(verbruik) == len(opbrengst):
+        return (np.asarray(verbruik, dtype=np.float32), np.asarray(opbrengst, dtype=np.float32), grid)
+
+    v = verbruik.copy()
+    o = opbrengst.copy()
+    if not isinstance(v.index, pd.DatetimeIndex):
+        v.index = pd.to_datetime(v.index)
+    if not isinstance(o.index, pd.DatetimeIndex):
+        o.index = pd.to_datetime(o.index)
+    v = v.sort_index()
+    o = o.sort_index()
+
+    # Neem alleen overlappende timestamps (inner join)
+    common_idx = v.index.intersection(o.index)
+    if common_idx.empty:
+        raise ValueError("Geen overlappende timestamps tussen verbruik en opbrengst.")
+    return (v.loc[common_idx].to_numpy(np.float32), o.loc[common_idx].to_numpy(np.float32),
+            QuarterGrid.from_index(common_idx))
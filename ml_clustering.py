@@ -1,46 +1,155 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
 from sklearn.cluster import KMeans
-import gc
+from sklearn.metrics import silhouette_score
+from figuurcache import toon_figuur, vingerafdruk
+from kwartiergrid import QuarterGrid
 
-@st.cache_data
-def cluster_typical_profiles(verbruik: pd.Series, n_clusters=7, use_weekend=True, random_state=42):
+@st.cache_data(show_spinner=False, max_entries=4)
+def dag_features(verbruik: pd.Series, use_weekend=True, _grid: QuarterGrid | None = None):
     """
-    Voer clustering uit op dagelijkse verbruiksprofielen (96 kwartieren per dag).
-    Optioneel: voeg weekend/weekdag als feature toe.
-    Toont typische profielen en clusterverdeling.
+    Featurematrix voor clustering: één rij per volledige dag (96 kwartieren), optioneel plus een
+    weekendkolom. Los gecachet van het model, zodat een ander aantal clusters de reeks niet opnieuw
+    hasht of omvormt. Geeft (X, dagen, weekend, sleutel); sleutel = hash van X voor de modelcache.
+    _grid: QuarterGrid van verbruik (niet gehasht; hoort bij de gehashte reeks).
     """
-    # Zorg dat index datetime is
-    verbruik = verbruik.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    # Maak matrix: elke rij = 1 dag, 96 kolommen = kwartieren
-    df = verbruik.groupby(verbruik.index.date).apply(lambda x: x.values[:96])
-    df = pd.DataFrame(df.tolist(), index=df.index)
+    grid = _grid
+    if grid is None or len(grid) != len(verbruik):
+        verbruik = verbruik.copy()
+        verbruik.index = pd.to_datetime(verbruik.index)
+        verbruik = verbruik.sort_index()
+        grid = QuarterGrid.from_index(verbruik.index)
+    # Maak matrix: elke rij = 1 dag, 96 kolommen = kwartieren (ontbrekend = NaN)
+    dagmatrix = grid.dag_matrix(verbruik.to_numpy(np.float32))
     # Filter incomplete dagen
-    df = df[df.apply(lambda r: len(r.dropna())==96, axis=1)]
-    X = np.stack(df.values)
+    volledig = ~np.isnan(dagmatrix).any(axis=1)
+    X = dagmatrix[volledig]
+    dagen = grid.dagen[volledig]
+    weekend = (np.asarray(dagen.dayofweek) >= 5).astype(int)
     # Voeg weekend/weekdag toe als feature
     if use_weekend:
-        is_weekend = pd.Series(df.index).apply(lambda d: pd.Timestamp(d).weekday() >= 5).astype(int).values
-        X = np.hstack([X, is_weekend.reshape(-1, 1)])
-    # Clustering
-    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state)
-    labels = kmeans.fit_predict(X)
+        X = np.hstack([X, weekend.reshape(-1, 1).astype(np.float32)])
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    sleutel = hashlib.blake2b(X.tobytes(), digest_size=16).hexdigest()
+    return X, dagen, weekend, sleutel
+
+
+# Gefitte modellen per (matrixsleutel, k, random_state), procesbreed en gedeeld door de handmatige keuze en de
+# automatische k-selectie: elk k wordt per dagmatrix maar één keer gefit.
+MAX_MODELLEN = 64
+K_BEREIK = range(2, 11)  # zelfde bereik als de invoer in de app
+SILHOUETTE_STEEKPROEF = 1000  # silhouette is O(n²): scoren op een steekproef van dagen
+_MODELLEN = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _fit(X: np.ndarray, n_clusters: int, random_state) -> tuple:
+    model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init="auto")
+    labels = model.fit_predict(X)
+    return labels, model.cluster_centers_, float(model.inertia_)
+
+
+def fit_clusters(X: np.ndarray, sleutel: str, n_clusters: int, random_state=42):
+    """
+    KMeans op de featurematrix, gecachet per (sleutel, n_clusters): terugschakelen naar een eerder
+    aantal clusters kost niets, een nieuw aantal alleen de fit zelf. Geeft (labels, cluster_centers_, inertia_).
+    """
+    cache_sleutel = (sleutel, int(n_clusters), random_state)
+    with _LOCK:
+        fit = _MODELLEN.get(cache_sleutel)
+        if fit is not None:
+            _MODELLEN.move_to_end(cache_sleutel)
+            return fit
+    fit = _fit(X, int(n_clusters), random_state)
+    with _LOCK:
+        _MODELLEN[cache_sleutel] = fit
+        while len(_MODELLEN) > MAX_MODELLEN:
+            _MODELLEN.popitem(last=False)
+    return fit
+
+
+def _score_k(X: np.ndarray, sleutel: str, k: int, random_state, steekproef: np.ndarray) -> dict:
+    labels, _, inertia = fit_clusters(X, sleutel, k, random_state)
+    sub = labels[steekproef]
+    silhouette = silhouette_score(X[steekproef], sub) if len(np.unique(sub)) > 1 else np.nan
+    return {"k": k, "inertia": inertia, "silhouette": float(silhouette)}
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def evalueer_aantal_clusters(_X: np.ndarray, sleutel: str, k_bereik=K_BEREIK, random_state=42,
+                             max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Fit alle k uit k_bereik parallel (threads; de KMeans-kern geeft de GIL vrij) en scoor elk model op
+    inertia (hele matrix) en silhouette (op een vaste steekproef van dagen). Alle modellen blijven in de
+    modelcache, dus daarna wisselen tussen k is gratis. Geeft een tabel per k; aanbevolen = hoogste silhouette.
+    _X: featurematrix bij `sleutel` (niet gehasht).
+    """
+    X = _X
+    k_bereik = [k for k in k_bereik if 2 <= k < len(X)]
+    rng = np.random.default_rng(random_state)
+    steekproef = np.sort(rng.choice(len(X), size=min(len(X), SILHOUETTE_STEEKPROEF), replace=False))
+    workers = min(len(k_bereik), max_workers or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        rijen = list(pool.map(lambda k: _score_k(X, sleutel, k, random_state, steekproef), k_bereik))
+    return pd.DataFrame(rijen).set_index("k")
+
+
+def aanbevolen_aantal_clusters(scores: pd.DataFrame) -> int:
+    return int(scores["silhouette"].idxmax())
+
+
+def plot_aantal_clusters(scores: pd.DataFrame):
+    """Elleboog (inertia) en silhouette per k, met het aanbevolen aantal clusters gemarkeerd."""
+    k_best = aanbevolen_aantal_clusters(scores)
+
+    def teken():
+        fig, ax1 = plt.subplots(figsize=(16, 4))
+        ax1.plot(scores.index, scores["inertia"], marker="o", color="tab:blue", label="Inertia (elleboog)")
+        ax1.set_xlabel("Aantal clusters (k)")
+        ax1.set_ylabel("Inertia", color="tab:blue")
+        ax2 = ax1.twinx()
+        ax2.plot(scores.index, scores["silhouette"], marker="s", color="tab:orange", label="Silhouette")
+        ax2.set_ylabel("Silhouette (steekproef)", color="tab:orange")
+        ax2.axvline(k_best, color="tab:orange", linestyle="--", alpha=0.6)
+        ax1.set_title(f"Keuze aantal clusters — aanbevolen k = {k_best}")
+        ax1.set_xticks(list(scores.index))
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("aantal_clusters", scores), teken)
+
+
+def cluster_typical_profiles(verbruik: pd.Series, n_clusters=7, use_weekend=True, random_state=42, _grid: QuarterGrid | None = None):
+    """
+    Voer clustering uit op dagelijkse verbruiksprofielen (96 kwartieren per dag).
+    Optioneel: voeg weekend/weekdag als feature toe.
+    Toont typische profielen en clusterverdeling.
+    _grid: QuarterGrid van verbruik (niet gehasht; hoort bij de gehashte reeks).
+    """
+    X, dagen, weekend, sleutel = dag_features(verbruik, use_weekend=use_weekend, _grid=_grid)
+    labels, centra, _ = fit_clusters(X, sleutel, int(n_clusters), random_state=random_state)
     # Plot typische profielen
-    fig, ax = plt.subplots(figsize=(16, 8))
-    for i in range(n_clusters):
-        mean_profile = kmeans.cluster_centers_[i][:96]
-        ax.plot(mean_profile, label=f"Cluster {i+1}")
-    ax.set_xlabel("Kwartier van de dag (0=00:00)")
-    ax.set_ylabel("Gemiddeld verbruik (kW)")
-    ax.set_title("Typische dagelijkse verbruiksprofielen (clusters)")
-    ax.legend()
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
+    def teken():
+        fig, ax = plt.subplots(figsize=(16, 8))
+        for i in range(n_clusters):
+            mean_profile = centra[i][:96]
+            ax.plot(mean_profile, label=f"Cluster {i+1}")
+        ax.set_xlabel("Kwartier van de dag (0=00:00)")
+        ax.set_ylabel("Gemiddeld verbruik (kW)")
+        ax.set_title("Typische dagelijkse verbruiksprofielen (clusters)")
+        ax.legend()
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("cluster_profielen", centra[:, :96]), teken)
     # Clusterverdeling
     unique, counts = np.unique(labels, return_counts=True)
     cluster_counts = {int(k)+1: int(v) for k, v in zip(unique, counts)}  # cast keys & values
@@ -48,8 +157,8 @@ def cluster_typical_profiles(verbruik: pd.Series, n_clusters=7, use_weekend=True
 
     # Optioneel: toon clusterlabel per dag
     df_result = pd.DataFrame({
-        "datum": df.index.astype(str),      # naar string voor JSON-veiligheid
+        "datum": dagen.strftime("%Y-%m-%d"), # naar string voor JSON-veiligheid
         "cluster": (labels + 1).astype(int), # labels naar Python int
-        "weekdag?": pd.Series(df.index).apply(lambda d: pd.Timestamp(d).weekday() >= 5).astype(int).values
+        "weekdag?": weekend
     })
     st.dataframe(df_result)
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from kwartiergrid import KWARTIEREN_PER_DAG, QuarterGrid
+
+# Piekmatrices voor de heatmaps, rechtstreeks op de dag-/kwartiercodes van QuarterGrid: per waarde een
+# rij- en kolomcode, daarna het maximum per cel in één gesorteerde reduceat naar een dichte 2-D array
+# (geen pivot_table, geen groupby). Met per_jaar=True krijgt elke maand/dag van de periode een eigen rij;
+# met per_jaar=False worden jaren op de kalender gevouwen en telt het maximum over de jaren, nooit het
+# gemiddelde (een piek in 2023 mag niet uitmiddelen tegen een rustige dag in 2024).
+MAANDEN = ("jan", "feb", "mrt", "apr", "mei", "jun", "jul", "aug", "sep", "okt", "nov", "dec")
+# eerste dag van elke maand in een schrikkeljaar: 29 februari heeft zo een vaste rij bij het vouwen
+_MAAND_START_SCHRIKKEL = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+DAGEN_SCHRIKKELJAAR = 366
+
+
+@dataclass(frozen=True)
+class PiekMatrix:
+    """Dichte matrix (rijen × kolommen, NaN = geen data) plus de as-ticks voor de heatmap."""
+    waarden: np.ndarray
+    rij_posities: np.ndarray
+    rij_labels: tuple
+    kolom_posities: np.ndarray
+    kolom_labels: tuple
+    rij_titel: str
+    kolom_titel: str
+
+    @property
+    def n_cellen(self) -> int:
+        return self.waarden.size
+
+
+def max_per_cel(rij: np.ndarray, kolom: np.ndarray, waarden: np.ndarray, n_rijen: int, n_kolommen: int) -> np.ndarray:
+    """
+    (n_rijen, n_kolommen) float32 met per cel het maximum van de waarden met die (rij, kolom); NaN wordt
+    genegeerd, cellen zonder waarde blijven NaN. Oplopende, unieke celcodes (de gewone tijdas) worden direct
+    geschreven; anders één stabiele sortering en np.fmax.reduceat per groep.
+    """
+    uit = np.full(n_rijen * n_kolommen, np.nan, dtype=np.float32)
+    cel = np.asarray(rij, dtype=np.int64) * n_kolommen + np.asarray(kolom, dtype=np.int64)
+    waarden = np.asarray(waarden, dtype=np.float32)
+    if len(cel) == 0:
+        return uit.reshape(n_rijen, n_kolommen)
+    if np.all(cel[1:] > cel[:-1]):
+        uit[cel] = waarden
+    else:
+        volgorde = np.argsort(cel, kind="stable")
+        cel, waarden = cel[volgorde], waarden[volgorde]
+        starts = np.flatnonzero(np.r_[True, cel[1:] != cel[:-1]])
+        uit[cel[starts]] = np.fmax.reduceat(waarden, starts)
+    return uit.reshape(n_rijen, n_kolommen)
+
+
+def _kalender(grid: QuarterGrid):
+    """Per dag_code: maandnummer sinds 1970-01 en dag van de maand (0-gebaseerd)."""
+    dagen = np.arange(grid.eerste_dag, grid.eerste_dag + grid.n_dagen, dtype=np.int64).astype("datetime64[D]")
+    maanden = dagen.astype("datetime64[M]")
+    dag_van_maand = (dagen - maanden.astype("datetime64[D]")).astype(np.int64)
+    return maanden.astype(np.int64), dag_van_maand
+
+
+def _maandlabel(maandnr: int, met_jaar: bool) -> str:
+    jaar, maand = divmod(int(maandnr), 12)
+    return f"{MAANDEN[maand]} {1970 + jaar}" if met_jaar else MAANDEN[maand]
+
+
+def _meerdere_jaren(maandnr: np.ndarray) -> bool:
+    return len(maandnr) > 0 and maandnr[0] // 12 != maandnr[-1] // 12
+
+
+def dagpieken_maand_x_dag(piek_per_dag: np.ndarray, grid: QuarterGrid, per_jaar: bool = True) -> PiekMatrix:
+    """
+    Dagpieken (per dag_code, bv. grid.per_dag(verschil, "max")) als maand × dag-van-maand (31 kolommen).
+    per_jaar: één rij per maand van de periode; anders 12 rijen met het maximum over de jaren.
+    """
+    maandnr, dag_van_maand = _kalender(grid)
+    if per_jaar:
+        rij = maandnr - maandnr[0] if len(maandnr) else maandnr
+        n_rijen = int(rij[-1]) + 1 if len(rij) else 0
+        met_jaar = _meerdere_jaren(maandnr)
+        labels = tuple(_maandlabel(maandnr[0] + r, met_jaar) for r in range(n_rijen))
+    else:
+        rij = maandnr % 12
+        n_rijen = 12
+        labels = MAANDEN
+    waarden = max_per_cel(rij, dag_van_maand, piek_per_dag, n_rijen, 31)
+    return PiekMatrix(waarden, np.arange(n_rijen), labels, np.arange(31), tuple(str(d) for d in range(1, 32)),
+                      "Maand", "Dag van maand")
+
+
+def kwartierpieken_dag_x_kwartier(waarden: np.ndarray, grid: QuarterGrid, per_jaar: bool = True) -> PiekMatrix:
+    """
+    Kwartierwaarden als dag × kwartier-van-de-dag (96 kolommen). per_jaar: één rij per dag van de periode;
+    anders 366 rijen (dag van een schrikkeljaar) met het maximum over de jaren.
+    """
+    maandnr, dag_van_maand = _kalender(grid)
+    if per_jaar:
+        rij = grid.dag_code
+        n_rijen = grid.n_dagen
+        # tick op de eerste van elke maand in de periode (en op de eerste dag als die midden in een maand valt)
+        eerste = np.flatnonzero((dag_van_maand == 0) | (np.arange(n_rijen) == 0))
+        met_jaar = _meerdere_jaren(maandnr)
+        labels = tuple(_maandlabel(maandnr[d], met_jaar and (maandnr[d] % 12 == 0 or d == 0)) for d in eerste)
+        posities = eerste
+    else:
+        dag_in_jaar = _MAAND_START_SCHRIKKEL[maandnr % 12] + dag_van_maand
+        rij = dag_in_jaar[grid.dag_code]
+        n_rijen = DAGEN_SCHRIKKELJAAR
+        posities, labels = _MAAND_START_SCHRIKKEL, MAANDEN
+    matrix = max_per_cel(rij, grid.kwartier_van_dag, waarden, n_rijen, KWARTIEREN_PER_DAG)
+    uren = np.arange(0, KWARTIEREN_PER_DAG, 8)
+    return PiekMatrix(matrix, np.asarray(posities), tuple(labels), uren, tuple(f"{u // 4:02d}:00" for u in uren),
+                      "Dag", "Kwartier van de dag")
@@ -2,56 +2,49 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-import os
 from copy import deepcopy
-import gc
-import matplotlib.image as mpimg
-class PlotManager:
-    @st.cache_data
-    def plot_belastingduurkromme(_self, _verbruiken: list[float]):
-        punten = PlotManager._bereken_belastingduurkromme(_verbruiken)
-        BASE_DIR = os.path.dirname(__file__)
+from figuurcache import logo, toon_figuur, vingerafdruk
+from kwartiergrid import QuarterGrid, uitlijnen_met_grid
+from interactieve_grafieken import energiebalans_dag_grafiek, reeksen_grafiek
+from verdunning import verdun_indices
+from belastingduur import bereken_belastingduurkromme
 
-        # pad naar het logo
-        logo_path = os.path.join(BASE_DIR, "LO-Bind-FC-RGB.png")
+class PlotManager:
+    def plot_belastingduurkromme(_self, _verbruiken, _opbrengst=None, n_punten=1000):
+        kromme = PlotManager._bereken_belastingduurkromme(_verbruiken, _opbrengst, n_punten)
 
-        logo = mpimg.imread(logo_path)
-        
-        
-        
-        if not punten:
+        if not kromme.namen:
             st.warning("Geen data om te plotten.")
             return
-        duur, belasting = zip(*punten)
-        
-        fig, ax = plt.subplots(figsize=(8, 5))
-        
-        ax.plot(duur, belasting, marker='o', label="Belastingduurkromme")
-        ax.set_xlabel('Duur (%)')
-        ax.set_ylabel('Belasting (verbruik)')
-        ax.set_title('Belastingduurkromme')
-        ax.grid(True)
-        ax.legend()
-        logo_ax = fig.add_axes([0.72, 0.65, 0.18, 0.18], anchor='NE', zorder=1)
-        logo_ax.imshow(logo)
-        logo_ax.axis('off')
-        st.pyplot(fig)
-        plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-        gc.collect()
-
-    def _bereken_belastingduurkromme(verbruiken):
-        n = len(verbruiken)
-        if n == 0:
-            return []
-        gesorteerd = sorted(verbruiken, reverse=True)
-        resultaat = []
-        for i, waarde in enumerate(gesorteerd):
-            duur = i / n * 100
-            resultaat.append((duur, waarde))
-        return resultaat
+
+        def teken():
+            fig, ax = plt.subplots(figsize=(8, 5))
+            for naam, belasting in zip(kromme.namen, kromme.waarden):
+                ax.plot(kromme.duur, belasting, label=f"Belastingduurkromme {naam}")
+            ax.set_xlabel('Duur (%)')
+            ax.set_ylabel('Belasting (verbruik)')
+            ax.set_title('Belastingduurkromme')
+            ax.grid(True)
+            ax.legend()
+            logo_ax = fig.add_axes([0.72, 0.65, 0.18, 0.18], anchor='NE', zorder=1)
+            logo_ax.imshow(logo())
+            logo_ax.axis('off')
+            return fig
+
+        # alleen bij een nieuwe kromme wordt de figuur opnieuw getekend
+        toon_figuur(vingerafdruk("belastingduurkromme", list(kromme.namen), kromme.duur, kromme.waarden), teken)
+        st.caption("Belasting die gedurende het gegeven percentage van de tijd gehaald of overschreden wordt")
+        st.dataframe(kromme.sleutelwaarden.round(2), use_container_width=True)
+
+    def _bereken_belastingduurkromme(verbruiken, opbrengst=None, n_punten=1000):
+        return bereken_belastingduurkromme(verbruiken, n_punten=n_punten, opbrengst=opbrengst)
     
     
-    def plot_energiebalans_dag(_self, _verbruik: pd.DataFrame, _opbrengst: pd.DataFrame, _max_afname, _max_teruglevering, _positief='positief', _accu_vermogen=0, _toon_verbruik=True, _toon_opbrengst=True, _toon_saldo=False, _toon_saldo_beperkt=True, _toon_limieten=True, _toon_limiet_overschrijdingen=False):
+    def plot_energiebalans_dag(_self, _verbruik: pd.DataFrame, _opbrengst: pd.DataFrame, _max_afname, _max_teruglevering, _positief='positief', _accu_vermogen=0, _toon_verbruik=True, _toon_opbrengst=True, _toon_saldo=False, _toon_saldo_beperkt=True, _toon_limieten=True, _toon_limiet_overschrijdingen=False, _interactief=False):
+        """
+        Verbruik, opbrengst en saldo op één dag met de limieten. _interactief=True tekent in de browser
+        (interactieve_grafieken); de _toon_-vlaggen bepalen dan welke reeksen bij openen aan staan.
+        """
         if _positief == 'positief':
             pos = 1
         else: 
@@ -61,12 +54,6 @@ class PlotManager:
             accu = _accu_vermogen
         else: 
             accu = 0
-        BASE_DIR = os.path.dirname(__file__)
-
-        # pad naar het logo
-        logo_path = os.path.join(BASE_DIR, "LO-Bind-FC-RGB.png")
-
-        logo = mpimg.imread(logo_path)
         min_len = min(len(_verbruik), len(_opbrengst))
         verbruik = _verbruik.iloc[:min_len]
         opbrengst = _opbrengst.iloc[:min_len]
@@ -103,122 +90,128 @@ class PlotManager:
         toon_limieten = _toon_limieten
         toon_limiet_overschrijdingen = _toon_limiet_overschrijdingen
 
-        
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-        if toon_verbruik:
-            ax.plot(tijdstappen, verbruik_s, label='Verbruik', color='red')
-        if toon_opbrengst:
-            ax.plot(tijdstappen, pos*opbrengst_s, label='Opbrengst', color='green')
-        if toon_saldo_beperkt:
-            ax.plot(tijdstappen, saldo_beperkt, label='Saldo (beperkt)', color='blue')
-        if toon_saldo:
-            ax.plot(tijdstappen, saldo, label='Saldo', color='orange')
-        ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
-        if toon_limieten:
-            ax.axhline(_max_afname, color='red', linewidth=0.8, linestyle=':', label='Max afname')
-            ax.axhline(pos*_max_teruglevering, color='purple', linewidth=0.8, linestyle=':', label='Max teruglevering')
-        if toon_limiet_overschrijdingen:
-            ax.fill_between(tijdstappen, saldo, saldo_beperkt, where=(np.array(saldo) > np.array(saldo_beperkt)), color='yellow', alpha=0.5, label='Limiet overschreden afname')
-            ax.fill_between(tijdstappen, saldo, saldo_beperkt, where=(np.array(saldo) < np.array(saldo_beperkt)), color='orange', alpha=0.5, label='Limiet overschreden teruglevering')
-        ax.set_xlabel('Tijdstip')
-        ax.set_ylabel('Energie')
-        ax.set_title(f'Energiebalans dag (totaal saldo: {totaal_saldo:.2f} kWh)')
-        ax.legend()
-        ax.grid(True)
-        logo_ax = fig.add_axes([0.8, 0.08, 0.18, 0.18], anchor='NE', zorder=1)
-        logo_ax.imshow(logo)
-        logo_ax.axis('off')
-        fig.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-        gc.collect()
+        def teken():
+            fig, ax = plt.subplots(figsize=(10, 6))
+            if toon_verbruik:
+                ax.plot(tijdstappen, verbruik_s, label='Verbruik', color='red')
+            if toon_opbrengst:
+                ax.plot(tijdstappen, pos*opbrengst_s, label='Opbrengst', color='green')
+            if toon_saldo_beperkt:
+                ax.plot(tijdstappen, saldo_beperkt, label='Saldo (beperkt)', color='blue')
+            if toon_saldo:
+                ax.plot(tijdstappen, saldo, label='Saldo', color='orange')
+            ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
+            if toon_limieten:
+                ax.axhline(_max_afname, color='red', linewidth=0.8, linestyle=':', label='Max afname')
+                ax.axhline(pos*_max_teruglevering, color='purple', linewidth=0.8, linestyle=':', label='Max teruglevering')
+            if toon_limiet_overschrijdingen:
+                ax.fill_between(tijdstappen, saldo, saldo_beperkt, where=(np.array(saldo) > np.array(saldo_beperkt)), color='yellow', alpha=0.5, label='Limiet overschreden afname')
+                ax.fill_between(tijdstappen, saldo, saldo_beperkt, where=(np.array(saldo) < np.array(saldo_beperkt)), color='orange', alpha=0.5, label='Limiet overschreden teruglevering')
+            ax.set_xlabel('Tijdstip')
+            ax.set_ylabel('Energie')
+            ax.set_title(f'Energiebalans dag (totaal saldo: {totaal_saldo:.2f} kWh)')
+            ax.legend()
+            ax.grid(True)
+            logo_ax = fig.add_axes([0.8, 0.08, 0.18, 0.18], anchor='NE', zorder=1)
+            logo_ax.imshow(logo())
+            logo_ax.axis('off')
+            fig.tight_layout()
+            return fig
+
+        if _interactief:
+            zichtbaar = [naam for naam, aan in (("Verbruik", toon_verbruik), ("Opbrengst", toon_opbrengst),
+                                                ("Saldo (beperkt)", toon_saldo_beperkt), ("Saldo", toon_saldo)) if aan]
+            energiebalans_dag_grafiek(verbruik, opbrengst, _max_afname, _max_teruglevering, pos, zichtbaar=zichtbaar,
+                                      toon_limieten=toon_limieten, toon_limiet_overschrijdingen=toon_limiet_overschrijdingen)
+        else:
+            sleutel = vingerafdruk("energiebalans_dag", verbruik, opbrengst, _max_afname, _max_teruglevering, pos,
+                                   toon_verbruik, toon_opbrengst, toon_saldo, toon_saldo_beperkt, toon_limieten,
+                                   toon_limiet_overschrijdingen)
+            toon_figuur(sleutel, teken)
         st.markdown(f"""
                 <p style="font-size:18px;">
                 <h1>Overschrijding afname: {overmatige_afname.sum() * 0.25:.2f} kWh </h1><br>
                 <h1>Overschrijding teruglevering: {overmatige_teruglevering.sum() * 0.25:.2f} kWh </h1>
                 </p>
                 """, unsafe_allow_html=True)
-    @st.cache_data
-    def plot_dagbalans_jaar(_self, _verbruik_jaar: pd.DataFrame, _opbrengst_jaar: pd.DataFrame, _max_afname, _max_teruglevering):
-        opbrengst_jaar = _opbrengst_jaar
-        verbruik_jaar = _verbruik_jaar
-
-        verbruik_jaar.index = pd.to_datetime(verbruik_jaar)
-        opbrengst_jaar.index = pd.to_datetime(opbrengst_jaar)
-        st.write(f"Aantal datapunten {len(verbruik_jaar)} verbruik, {len(opbrengst_jaar)} opbrengst, vorm: {verbruik_jaar.head()}")
-        dagen = sorted(set(verbruik_jaar.index.normalize()) & set(opbrengst_jaar.index.normalize()))
-        st.write(f"Vorm dagen: {dagen[:5]}... ({len(dagen)} totaal)")
-        dagresultaten = []
-        st.write(f"Aantal dagen met data: {len(dagen)}")
-        for dag in dagen:
-            v_dag = verbruik_jaar[verbruik_jaar.index.normalize() == dag]
-            o_dag = opbrengst_jaar[opbrengst_jaar.index.normalize() == dag]
-            min_len = min(len(v_dag), len(o_dag))
-            if min_len == 0:
-                continue
-            v_dag = v_dag.iloc[:min_len]
-            o_dag = o_dag.iloc[:min_len]
-            verbruik_s = v_dag.sum(axis=1) if isinstance(v_dag, pd.DataFrame) else v_dag
-            # Tel alle kolommen van opbrengst bij elkaar op tot één Series
-            if isinstance(o_dag, pd.DataFrame):
-                opbrengst_s = o_dag.sum(axis=1)
-            else:
-                opbrengst_s = o_dag
-            saldo = opbrengst_s - verbruik_s
-            saldo_beperkt = saldo.copy()
-            """saldo_beperkt[saldo < 0] = saldo[saldo < 0].clip(lower=-max_afname)
-            saldo_beperkt[saldo > 0] = saldo[saldo > 0].clip(upper=max_teruglevering)"""
-            dagresultaten.append({
-                'dag': dag,
-                'verbruik': verbruik_s.sum(),
-                'opbrengst': opbrengst_s.sum(),
-                'saldo': saldo_beperkt.sum()
-            })
-
-        if not dagresultaten:
+    def _bereken_dagbalans(verbruik, opbrengst, max_afname, max_teruglevering, grid: QuarterGrid | None = None) -> pd.DataFrame:
+        """
+        Dagtotalen (kWh) van verbruik, opbrengst en het begrensde saldo in één pass:
+        saldo = opbrengst - verbruik per kwartier, geclipt op [-max_afname, max_teruglevering],
+        daarna per dag opgeteld via bincount op de dagcodes. Lineair in het aantal kwartieren.
+        """
+        # Tel alle kolommen bij elkaar op tot één reeks
+        if isinstance(verbruik, pd.DataFrame):
+            verbruik = verbruik.sum(axis=1, min_count=1)
+        if isinstance(opbrengst, pd.DataFrame):
+            opbrengst = opbrengst.sum(axis=1, min_count=1)
+        v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
+
+        # limiet 0/None betekent: geen begrenzing
+        saldo_beperkt = np.clip(o - v, -(max_afname or np.inf), max_teruglevering or np.inf)
+        df = pd.DataFrame({
+            "verbruik": grid.per_dag(v * 0.25, "sum"),
+            "opbrengst": grid.per_dag(o * 0.25, "sum"),
+            "saldo": grid.per_dag(saldo_beperkt * 0.25, "sum"),
+        }, index=grid.dagen)
+        df.index.name = "dag"
+        return df.dropna(how="all")
+
+    def plot_dagbalans_jaar(_self, _verbruik_jaar: pd.DataFrame, _opbrengst_jaar: pd.DataFrame, _max_afname, _max_teruglevering, grid: QuarterGrid | None = None):
+        df_dagbalans = PlotManager._bereken_dagbalans(_verbruik_jaar, _opbrengst_jaar, _max_afname, _max_teruglevering, grid)
+        if df_dagbalans.empty:
             st.warning("Geen overlappende dagen met data gevonden.")
             return
-        st.write(f"📅 Aantal dagen met data: {len(dagresultaten)}, voorbeeld data: {dagresultaten}")
-        df_dagbalans = pd.DataFrame(dagresultaten).set_index('dag')
         show_verbruik = st.checkbox("Toon verbruik", value=True, key="jaar_verbruik")
         show_opbrengst = st.checkbox("Toon opbrengst", value=True, key="jaar_opbrengst")
         show_saldo = st.checkbox("Toon saldo", value=True, key="jaar_saldo")
 
-        fig, ax = plt.subplots(figsize=(12, 6))
-        if show_verbruik:
-            ax.plot(df_dagbalans.index, df_dagbalans['verbruik'], label='Totaal verbruik per dag', color='red')
-        if show_opbrengst:
-            ax.plot(df_dagbalans.index, df_dagbalans['opbrengst'], label='Totaal opbrengst per dag', color='green')
-        if show_saldo:
-            ax.plot(df_dagbalans.index, df_dagbalans['saldo'], label='Dagbalans (beperkt)', color='blue')
-        ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
-        ax.set_xlabel('Datum')
-        ax.set_ylabel('Energie')
-        ax.set_title('Dagelijkse energiebalans over het jaar')
-        ax.legend()
-        ax.grid(True)
-        fig.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-        gc.collect()
+        def teken():
+            fig, ax = plt.subplots(figsize=(12, 6))
+            if show_verbruik:
+                ax.plot(df_dagbalans.index, df_dagbalans['verbruik'], label='Totaal verbruik per dag', color='red')
+            if show_opbrengst:
+                ax.plot(df_dagbalans.index, df_dagbalans['opbrengst'], label='Totaal opbrengst per dag', color='green')
+            if show_saldo:
+                ax.plot(df_dagbalans.index, df_dagbalans['saldo'], label='Dagbalans (beperkt)', color='blue')
+            ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
+            ax.set_xlabel('Datum')
+            ax.set_ylabel('Energie (kWh)')
+            ax.set_title('Dagelijkse energiebalans over het jaar')
+            ax.legend()
+            ax.grid(True)
+            fig.tight_layout()
+            return fig
+
+        toon_figuur(vingerafdruk("dagbalans_jaar", df_dagbalans, show_verbruik, show_opbrengst, show_saldo), teken)
 
    
-    def plot_reeksen_en_verschil(_self, _opbrengst: pd.Series, _verbruik: pd.Series, _titel="Opbrengst vs Verbruik", show_opbrengst=True, show_verbruik=True, show_verschil=True, _max_afname=0, _max_teruglevering=0):
+    def plot_reeksen_en_verschil(_self, _opbrengst: pd.Series, _verbruik: pd.Series, _titel="Opbrengst vs Verbruik", show_opbrengst=True, show_verbruik=True, show_verschil=True, _max_afname=0, _max_teruglevering=0, _bereik=None, _interactief=False):
+        """
+        Opbrengst, verbruik en verschil als lijnen, elk verdund tot ~MAX_PUNTEN punten (min-max per bucket);
+        punten boven max_afname / onder -max_teruglevering blijven exact. _bereik = (eerste dag, laatste dag)
+        toont alleen die periode, opnieuw verdund en dus met meer detail.
+        _interactief=True stuurt de volledige reeksen één keer naar de browser (interactieve_grafieken);
+        aan/uit, zoomen en pannen gebeuren daar, de show_-vlaggen zijn dan de beginstand.
+        """
         opbrengst = _opbrengst
         verbruik = _verbruik
         titel = _titel
-        BASE_DIR = os.path.dirname(__file__)
-
-        # pad naar het logo
-        logo_path = os.path.join(BASE_DIR, "LO-Bind-FC-RGB.png")
-
-        logo = mpimg.imread(logo_path)
         max_afname = _max_afname
         max_teruglevering = _max_teruglevering
         min_len = min(len(opbrengst), len(verbruik))
         opbrengst = opbrengst.iloc[:min_len]
         verbruik = verbruik.iloc[:min_len]
+        if _bereik is not None:
+            rijen = PlotManager._rijen_in_bereik(opbrengst.index, _bereik)
+            opbrengst, verbruik = opbrengst.iloc[rijen], verbruik.iloc[rijen]
+            min_len = len(opbrengst)
+        if _interactief:
+            zichtbaar = [naam for naam, aan in (("Opbrengst", show_opbrengst), ("Verbruik", show_verbruik),
+                                                ("Verschil", show_verschil)) if aan]
+            reeksen_grafiek(opbrengst, verbruik, max_afname, max_teruglevering, titel, zichtbaar=zichtbaar)
+            return
         #st.write(f"Aantal datapunten: {len(opbrengst)} opbrengst, {len(verbruik)} verbruik")
         #st.write(opbrengst.head())
         index = opbrengst.index
@@ -227,25 +220,44 @@ class PlotManager:
         #st.write(verbruik.head(),verbruik.shape,opbrengst.head(),opbrengst.shape)#verschil.head(),verschil.shape)
 
 
-        fig, ax = plt.subplots(figsize=(12, 6))
-        if show_opbrengst:
-            ax.plot(index, -opbrengst, label="Opbrengst", color="green")
-        if show_verbruik:
-            ax.plot(index, verbruik, label="Verbruik", color="red")
-        if show_verschil:
-            ax.plot(index, verschil, label="Verschil (Verbruik - Opbrengst)", color="blue")
-        ax.axhline(max_afname, color='red', linewidth=0.8, linestyle='-', label='Max afname')
-        ax.axhline(-max_teruglevering, color='purple', linewidth=0.8, linestyle='-', label='Max teruglevering')
-        ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
-        ax.set_xlabel("Tijd")
-        ax.set_ylabel("Energie (kW)")
-        ax.set_title(titel)
-        ax.legend()
-        ax.grid(True)
-        logo_ax = fig.add_axes([0.8, 0.08, 0.18, 0.18], anchor='NE', zorder=1)
-        logo_ax.imshow(logo)
-        logo_ax.axis('off')
-        fig.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-        gc.collect()
\ No newline at end of file
+        # limiet 0/None betekent: geen begrenzing (dan ook niets extra te behouden)
+        boven = max_afname if max_afname else None
+        onder = -max_teruglevering if max_teruglevering else None
+
+        def lijn(ax, reeks: pd.Series, **opties):
+            waarden = reeks.to_numpy(np.float64)
+            i = verdun_indices(waarden, boven=boven, onder=onder)
+            ax.plot(reeks.index[i], waarden[i], **opties)
+
+        def teken():
+            fig, ax = plt.subplots(figsize=(12, 6))
+            if show_opbrengst:
+                lijn(ax, -opbrengst, label="Opbrengst", color="green")
+            if show_verbruik:
+                lijn(ax, verbruik, label="Verbruik", color="red")
+            if show_verschil:
+                lijn(ax, verschil, label="Verschil (Verbruik - Opbrengst)", color="blue")
+            ax.axhline(max_afname, color='red', linewidth=0.8, linestyle='-', label='Max afname')
+            ax.axhline(-max_teruglevering, color='purple', linewidth=0.8, linestyle='-', label='Max teruglevering')
+            ax.axhline(0, color='black', linewidth=0.8, linestyle='--')
+            ax.set_xlabel("Tijd")
+            ax.set_ylabel("Energie (kW)")
+            ax.set_title(titel)
+            ax.legend()
+            ax.grid(True)
+            logo_ax = fig.add_axes([0.8, 0.08, 0.18, 0.18], anchor='NE', zorder=1)
+            logo_ax.imshow(logo())
+            logo_ax.axis('off')
+            fig.tight_layout()
+            return fig
+
+        sleutel = vingerafdruk("reeksen_en_verschil", opbrengst, verbruik, titel, show_opbrengst, show_verbruik,
+                               show_verschil, max_afname, max_teruglevering)
+        toon_figuur(sleutel, teken)
+
+    def _rijen_in_bereik(index: pd.DatetimeIndex, bereik) -> slice:
+        """Rijen van een gesorteerde index van de eerste dag 00:00 tot en met de laatste dag van `bereik`."""
+        start, eind = pd.Timestamp(bereik[0]), pd.Timestamp(bereik[1]) + pd.Timedelta(days=1)
+        if index.tz is not None:
+            start, eind = start.tz_localize(index.tz), eind.tz_localize(index.tz)
+        return slice(index.searchsorted(start), index.searchsorted(eind))
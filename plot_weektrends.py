@@ -2,7 +2,14 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import streamlit as st
 from typing import Optional
-import gc
+import numpy as np
+from figuurcache import toon_figuur, vingerafdruk
+from kwartiergrid import QuarterGrid, KWARTIEREN_PER_WEEK, uitlijnen_met_grid
+from verdunning import verdun_indices
+from accu import (simuleer_accu, sweep_accu, simuleer_strategie, neutrale_signalen, combineer_signalen,
+                  peak_shave_beleid, pv_zelfconsumptie_beleid, soc_nacht_beleid, tarief_arbitrage_beleid)
+
+MAX_PUNTEN_WEKEN = 20_000  # totaal over alle weeklijnen; bij meerdere jaren wordt elke week verdund
 
 
 def _add_day_lines_and_labels(ax, min_len):
@@ -15,343 +22,303 @@ def _add_day_lines_and_labels(ax, min_len):
     ax.set_xticks(posities)
     ax.set_xticklabels(dagen)
 
-def plot_weektrends(verbruik: pd.Series, title="Weektrends kwartierdata", max_afname=None, max_teruglevering=None):
+def _weekmatrix(verbruik: pd.Series, grid: Optional[QuarterGrid] = None):
+    """
+    (n_weken, 672) matrix van de reeks op de weekcodes van de QuarterGrid (kolom 0 = maandag 00:00,
+    ontbrekende kwartieren NaN) plus het ISO-weeknummer per rij.
+    """
+    if grid is None or len(grid) != len(verbruik):
+        verbruik = verbruik.copy()
+        verbruik.index = pd.to_datetime(verbruik.index)
+        verbruik = verbruik.sort_index()
+        grid = QuarterGrid.from_index(verbruik.index)
+    return grid.week_matrix(verbruik.to_numpy(np.float32)), grid.iso_weeknummers
+
+def _gemiddelde_per_kolom(m: np.ndarray) -> np.ndarray:
+    aantal = (~np.isnan(m)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.nansum(m, axis=0) / aantal
+
+def plot_weektrends(verbruik: pd.Series, title="Weektrends kwartierdata", max_afname=None, max_teruglevering=None, grid: Optional[QuarterGrid] = None):
     """
     Plot per week een lijn van kwartierverbruik (52 lijnen).
     Toont ook de gemiddelde week als dikke zwarte lijn.
     Optioneel: toon limieten als stippellijn.
     """
-    # Zorg dat index datetime is
-    verbruik = verbruik.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-
-    # Groepeer per weeknummer
-    weekgroepen = verbruik.groupby(verbruik.index.isocalendar().week)
-
-    fig, ax = plt.subplots(figsize=(16, 8))
-    min_len = min(len(week.reset_index(drop=True)) for _, week in weekgroepen)
-    weekdata_arr = []
-    for weeknr, weekdata in weekgroepen:
-        # Reset index zodat x-as 0..len-1 is (kwartiernummer binnen week)
-        weekdata = weekdata.reset_index(drop=True)
-        weekdata_arr.append(weekdata.values[:min_len])
-        ax.plot(weekdata.values[:min_len], label=f"Week {weeknr}", alpha=0.5)
-    # Gemiddelde week als dikke zwarte lijn
-    mean_week = pd.DataFrame(weekdata_arr).mean(axis=0)
-    ax.plot(mean_week, label="Gemiddelde week", color="black", linewidth=3, zorder=10)
-    # Limieten als stippellijn
-    if max_afname is not None:
-        ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
-    if max_teruglevering is not None:
-        ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
-    ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
-    ax.set_ylabel("Verbruik (kW)")
-    ax.set_title(title)
-    ax.grid(True)
-    ax.legend(ncol=4, fontsize=8, loc='upper right', frameon=False)
-    _add_day_lines_and_labels(ax, min_len)
-    plt.tight_layout()
-    
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
-
-def plot_weektrends_summary(verbruik: pd.Series, title="Gemiddelde, max en min week (kwartierdata)", max_afname=None, max_teruglevering=None):
+    def teken():
+        weken, weeknrs = _weekmatrix(verbruik, grid)
+
+        fig, ax = plt.subplots(figsize=(16, 8))
+        min_len = KWARTIEREN_PER_WEEK
+        punten_per_week = max(96, MAX_PUNTEN_WEKEN // max(len(weken), 1))
+        for weeknr, weekdata in zip(weeknrs, weken):
+            # x-as = kwartiernummer binnen de week, ontbrekende kwartieren blijven gaten; pieken boven de limiet exact
+            i = verdun_indices(weekdata, punten_per_week, boven=max_afname)
+            ax.plot(i, weekdata[i], label=f"Week {weeknr}", alpha=0.5)
+        # Gemiddelde week als dikke zwarte lijn
+        mean_week = _gemiddelde_per_kolom(weken)
+        ax.plot(mean_week, label="Gemiddelde week", color="black", linewidth=3, zorder=10)
+        # Limieten als stippellijn
+        if max_afname is not None:
+            ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
+        if max_teruglevering is not None:
+            ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
+        ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
+        ax.set_ylabel("Verbruik (kW)")
+        ax.set_title(title)
+        ax.grid(True)
+        ax.legend(ncol=4, fontsize=8, loc='upper right', frameon=False)
+        _add_day_lines_and_labels(ax, min_len)
+        plt.tight_layout()
+        return fig
+
+    # de weekmatrix wordt alleen opgebouwd als de figuur nog niet gerenderd is
+    toon_figuur(vingerafdruk("weektrends", verbruik, title, max_afname, max_teruglevering), teken)
+
+def plot_weektrends_summary(verbruik: pd.Series, title="Gemiddelde, max en min week (kwartierdata)", max_afname=None, max_teruglevering=None, grid: Optional[QuarterGrid] = None):
     """
     Plot de gemiddelde week, de week met hoogste totaalverbruik en de week met laagste totaalverbruik.
     Toont ook de som van de min/max week onder de grafiek.
     """
-    verbruik = verbruik.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    weekgroepen = verbruik.groupby(verbruik.index.isocalendar().week)
-    weekdata_list = [week.reset_index(drop=True) for _, week in weekgroepen]
-    week_lengths = [len(w) for w in weekdata_list]
-    min_len = min(week_lengths)
-    weekdata_arr = [w.iloc[:min_len].values for w in weekdata_list]
-    weekdata_arr = pd.DataFrame(weekdata_arr)  # shape: (n_weeks, min_len)
-
-    mean_week = weekdata_arr.mean(axis=0)
-    max_idx = weekdata_arr.sum(axis=1).idxmax()
-    max_week = weekdata_arr.iloc[max_idx]
-    min_idx = weekdata_arr.sum(axis=1).idxmin()
-    min_week = weekdata_arr.iloc[min_idx]
-
-    fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(mean_week, label="Gemiddelde week", color="blue", linewidth=2)
-    ax.plot(max_week, label="Max week", color="red", linestyle="--", alpha=0.7)
-    ax.plot(min_week, label="Min week", color="green", linestyle="--", alpha=0.7)
-    # Limieten als stippellijn
-    if max_afname is not None:
-        ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
-    if max_teruglevering is not None:
-        ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
-    ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
-    ax.set_ylabel("Verbruik (kW)")
-    ax.set_title(title)
-    ax.grid(True)
-    ax.legend(fontsize=12)
-    _add_day_lines_and_labels(ax, min_len)
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
+    weken, _ = _weekmatrix(verbruik, grid)
+    min_len = KWARTIEREN_PER_WEEK
+
+    mean_week = _gemiddelde_per_kolom(weken)
+    # max/min week alleen uit volledige weken kiezen; een halve week heeft altijd de laagste som
+    volledig = ~np.isnan(weken).any(axis=1)
+    kandidaten = weken[volledig] if volledig.any() else weken
+    sommen = np.nansum(kandidaten, axis=1)
+    max_week = kandidaten[int(np.argmax(sommen))]
+    min_week = kandidaten[int(np.argmin(sommen))]
+
+    def teken():
+        fig, ax = plt.subplots(figsize=(16, 8))
+        ax.plot(mean_week, label="Gemiddelde week", color="blue", linewidth=2)
+        ax.plot(max_week, label="Max week", color="red", linestyle="--", alpha=0.7)
+        ax.plot(min_week, label="Min week", color="green", linestyle="--", alpha=0.7)
+        # Limieten als stippellijn
+        if max_afname is not None:
+            ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
+        if max_teruglevering is not None:
+            ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
+        ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
+        ax.set_ylabel("Verbruik (kW)")
+        ax.set_title(title)
+        ax.grid(True)
+        ax.legend(fontsize=12)
+        _add_day_lines_and_labels(ax, min_len)
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("weektrends_summary", mean_week, max_week, min_week, title, max_afname, max_teruglevering), teken)
 
     # Toon de sommen onder de grafiek
     st.info(
-        f"Som gemiddelde week: {mean_week.sum():.2f} kWh\n"
-        f"Som max week: {max_week.sum():.2f} kWh\n"
-        f"Som min week: {min_week.sum():.2f} kWh"
+        f"Som gemiddelde week: {np.nansum(mean_week):.2f} kWh\n"
+        f"Som max week: {np.nansum(max_week):.2f} kWh\n"
+        f"Som min week: {np.nansum(min_week):.2f} kWh"
     )
 
-def plot_weektrends_per_quartile_stats(verbruik: pd.Series, title="Gemiddelde, max en min per kwartier van de week", max_afname=None, max_teruglevering=None):
+def plot_weektrends_per_quartile_stats(verbruik: pd.Series, title="Gemiddelde, max en min per kwartier van de week", max_afname=None, max_teruglevering=None, grid: Optional[QuarterGrid] = None):
     """
     Plot per kwartier van de week het gemiddelde, de max en de min over alle weken.
     """
-    verbruik = verbruik.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    weekgroepen = verbruik.groupby(verbruik.index.isocalendar().week)
-    weekdata_list = [week.reset_index(drop=True) for _, week in weekgroepen]
-    week_lengths = [len(w) for w in weekdata_list]
-    min_len = min(week_lengths)
-    weekdata_arr = [w.iloc[:min_len].values for w in weekdata_list]
-    weekdata_arr = pd.DataFrame(weekdata_arr)  # shape: (n_weeks, min_len)
-
-    mean_per_quartile = weekdata_arr.mean(axis=0)
-    max_per_quartile = weekdata_arr.max(axis=0)
-    min_per_quartile = weekdata_arr.min(axis=0)
-
-    fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(mean_per_quartile, label="Gemiddelde", color="blue", linewidth=2)
-    ax.plot(max_per_quartile, label="Max", color="red", linestyle="--", alpha=0.7)
-    ax.plot(min_per_quartile, label="Min", color="green", linestyle="--", alpha=0.7)
-    # Limieten als stippellijn
-    if max_afname is not None:
+    def teken():
+        weken, _ = _weekmatrix(verbruik, grid)
+        min_len = KWARTIEREN_PER_WEEK
+
+        mean_per_quartile = _gemiddelde_per_kolom(weken)
+        max_per_quartile = np.fmax.reduce(weken, axis=0)  # fmax/fmin negeren NaN
+        min_per_quartile = np.fmin.reduce(weken, axis=0)
+
+        fig, ax = plt.subplots(figsize=(16, 8))
+        ax.plot(mean_per_quartile, label="Gemiddelde", color="blue", linewidth=2)
+        ax.plot(max_per_quartile, label="Max", color="red", linestyle="--", alpha=0.7)
+        ax.plot(min_per_quartile, label="Min", color="green", linestyle="--", alpha=0.7)
+        # Limieten als stippellijn
+        if max_afname is not None:
+            ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
+        if max_teruglevering is not None:
+            ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
+        ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
+        ax.set_ylabel("Verbruik (kW)")
+        ax.set_title(title)
+        ax.grid(True)
+        ax.legend(fontsize=12)
+        _add_day_lines_and_labels(ax, min_len)
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("weektrends_kwartier", verbruik, title, max_afname, max_teruglevering), teken)
+
+def _accu_simulatie(verbruik: pd.Series, opbrengst: pd.Series, grid: Optional[QuarterGrid], accu_capaciteit: float,
+                    max_afname: float, max_teruglevering: float, max_laden=None, max_ontladen=None, rendement=1.0, strategie=None):
+    """
+    Eén jaarsimulatie op de gedeelde grid; de weekplots zijn views hierop.
+    strategie: optioneel dict met instellingen voor accu_stand_calculator (peak_shaven, pv_zelf_consumption, ...).
+    """
+    v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
+    if strategie:
+        res = accu_stand_calculator(v, o, accu_capaciteit, max_afname=max_afname, max_teruglevering=max_teruglevering,
+                                    max_vermogen=max_laden, rendement=rendement, grid=grid, **strategie)
+    else:
+        res = simuleer_accu(v, o, accu_capaciteit, max_afname, max_teruglevering,
+                            max_laden=max_laden, max_ontladen=max_ontladen, rendement=rendement)
+    return v, o, grid, res
+
+def _plot_accu_week(v, o, res, grid: QuarterGrid, w: int, weeknr, max_afname, title):
+    rijen = slice(int(grid.week_offsets[w]), int(grid.week_offsets[w + 1]))
+    week = res.slice(rijen)
+    # x = kwartier binnen de week (0 = maandag 00:00), ook als de week niet compleet is
+    x = grid.weekdag[rijen] * 96 + grid.kwartier_van_dag[rijen]
+    v, o = v[rijen], o[rijen]
+
+    def teken():
+        fig, ax = plt.subplots(figsize=(16, 8))
+        ax.plot(x, v, label="Verbruik", color="red")
+        ax.plot(x, o, label="Opbrengst", color="green")
+        ax.plot(x, week.soc, label="Accuvermogen (kWh)", color="blue", linewidth=2)
+        ax.plot(x, week.tekort, label="Tekort (kWh)", color="black", linestyle=":", linewidth=2)
+        # Limieten als stippellijn
         ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
-    if max_teruglevering is not None:
-        ax.axhline(-max_teruglevering, color="purple", linestyle=":", linewidth=2, label="Terugleverlimiet")
-    ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
-    ax.set_ylabel("Verbruik (kW)")
-    ax.set_title(title)
-    ax.grid(True)
-    ax.legend(fontsize=12)
-    _add_day_lines_and_labels(ax, min_len)
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
-
-def plot_accu_week_simulatie(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, max_afname: float, max_teruglevering: float, title="Accu simulatie week"):
+        ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
+        ax.set_ylabel("Vermogen / Energie")
+        ax.set_title(f"{title} (week {weeknr})")
+        ax.grid(True)
+        _add_day_lines_and_labels(ax, KWARTIEREN_PER_WEEK)
+        ax.legend(fontsize=12)
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("accu_week", x, v, o, week.soc, week.tekort, max_afname, title, weeknr), teken)
+    st.info(
+        f"Week {weeknr}: totaal verbruik {np.nansum(v):.2f} kWh, totaal opbrengst {np.nansum(o):.2f} kWh, "
+        f"max acculading {week.soc.max(initial=0):.2f} kWh, totaal tekort {week.tekort.sum():.2f} kWh, "
+        f"afgetopt {week.afgetopt.sum():.2f} kWh"
+    )
+
+def plot_accu_week_simulatie(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, max_afname: float, max_teruglevering: float, title="Accu simulatie week", grid: Optional[QuarterGrid] = None, max_laden=None, max_ontladen=None, rendement=1.0, strategie=None):
     """
-    Simuleer en plot een week met hoog verbruik en lage opbrengst, inclusief accuvermogen.
+    Plot de week met hoog verbruik en lage opbrengst, inclusief accuvermogen.
     Toont ook het tekort als verbruik > afnamelimiet en accu leeg is.
+    De accu wordt over de hele periode gesimuleerd (accu.simuleer_accu); de week is een slice daarvan.
     """
-    # Zorg dat indexen gelijk en datetime zijn
-    verbruik = verbruik.copy()
-    opbrengst = opbrengst.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    opbrengst.index = pd.to_datetime(opbrengst.index)
-    min_len = min(len(verbruik), len(opbrengst))
-    verbruik = verbruik.iloc[:min_len]
-    opbrengst = opbrengst.iloc[:min_len]
-
-    # Zoek week met hoogste totaalverbruik en relatief lage opbrengst
-    weekgroepen = verbruik.groupby(verbruik.index.isocalendar().week)
-    weekdata_list = []
-    weekopbrengst_list = []
-    weeknr_list = []
-    for (weeknr, weekdata), (_, weekopbrengst) in zip(weekgroepen, opbrengst.groupby(opbrengst.index.isocalendar().week)):
-        weekdata = weekdata.reset_index(drop=True)
-        weekopbrengst = weekopbrengst.reset_index(drop=True)
-        weekdata_list.append(weekdata)
-        weekopbrengst_list.append(weekopbrengst)
-        weeknr_list.append(weeknr)
+    v, o, grid, res = _accu_simulatie(verbruik, opbrengst, grid, accu_capaciteit, max_afname, max_teruglevering, max_laden, max_ontladen, rendement, strategie)
     # Selecteer week met hoogste verbruik / laagste opbrengst
-    scores = [vd.sum() - vo.sum() for vd, vo in zip(weekdata_list, weekopbrengst_list)]
-    idx = max(range(len(scores)), key=lambda i: scores[i])
-    v = weekdata_list[idx]
-    o = weekopbrengst_list[idx]
-    weeknr = weeknr_list[idx]
-    n = len(v)
-
-    # Simuleer accuvermogen per kwartier + tekort
-    accu = [0.0] * n
-    tekort = [0.0] * n
-    accuv = 0.0
-    for i in range(n):
-        overschot = o[i] - v[i]
-        # Laad accu met overschot (max teruglevering)
-        if overschot > 0:
-            laad = min(overschot, max_teruglevering, accu_capaciteit - accuv)
-            accuv += laad * 0.25  # kwartier naar kWh
-        # Ontlaad accu als verbruik > max_afname
-        elif v[i] > max_afname:
-            nodig = v[i] - max_afname
-            ontlaad = min(nodig, accuv / 0.25)
-            accuv -= ontlaad * 0.25
-            # Tekort als accu leeg is
-            if ontlaad < nodig:
-                tekort[i] = (nodig - ontlaad) * 0.25  # kWh tekort dit kwartier
-        # Accu mag niet negatief/te vol
-        accuv = max(0.0, min(accuv, accu_capaciteit))
-        accu[i] = accuv
-
-    fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(v.values, label="Verbruik", color="red")
-    ax.plot(o.values, label="Opbrengst", color="green")
-    ax.plot(accu, label="Accuvermogen (kWh)", color="blue", linewidth=2)
-    ax.plot(tekort, label="Tekort (kWh)", color="black", linestyle=":", linewidth=2)
-    # Limieten als stippellijn
-    ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
-    ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
-    ax.set_ylabel("Vermogen / Energie")
-    ax.set_title(f"{title} (week {weeknr})")
-    ax.grid(True)
-    _add_day_lines_and_labels(ax, n)
-    ax.legend(fontsize=12)
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
-    st.info(
-        f"Week {weeknr}: totaal verbruik {v.sum():.2f} kWh, totaal opbrengst {o.sum():.2f} kWh, "
-        f"max acculading {max(accu):.2f} kWh, totaal tekort {sum(tekort):.2f} kWh"
-    )
+    scores = np.nan_to_num(grid.per_week(v) - grid.per_week(o), nan=-np.inf)
+    w = int(np.argmax(scores))
+    _plot_accu_week(v, o, res, grid, w, grid.iso_weeknummers[w], max_afname, title)
 
-def plot_accu_week_simulatie_select(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, max_afname: float, max_teruglevering: float, title="Accu simulatie week"):
+def plot_accu_week_simulatie_select(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, max_afname: float, max_teruglevering: float, title="Accu simulatie week", grid: Optional[QuarterGrid] = None, max_laden=None, max_ontladen=None, rendement=1.0, strategie=None):
     """
     Streamlit interface om een week te kiezen voor de accu-simulatie.
     Toont ook welke week het hoogste verbruik heeft en welke week het meest gemiddeld is.
     """
-    verbruik = verbruik.copy()
-    opbrengst = opbrengst.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    opbrengst.index = pd.to_datetime(opbrengst.index)
-    min_len = min(len(verbruik), len(opbrengst))
-    verbruik = verbruik.iloc[:min_len]
-    opbrengst = opbrengst.iloc[:min_len]
-
-    # Groepeer per week
-    weekgroepen_v = list(verbruik.groupby(verbruik.index.isocalendar().week))
-    weekgroepen_o = list(opbrengst.groupby(opbrengst.index.isocalendar().week))
-    weeknrs = [wnr for wnr, _ in weekgroepen_v]
-    weekdata_list = [week.reset_index(drop=True) for _, week in weekgroepen_v]
-    weekopbrengst_list = [week.reset_index(drop=True) for _, week in weekgroepen_o]
+    v, o, grid, res = _accu_simulatie(verbruik, opbrengst, grid, accu_capaciteit, max_afname, max_teruglevering, max_laden, max_ontladen, rendement, strategie)
+    weeknrs = grid.iso_weeknummers
+    maandagen = grid.weken
 
     # Bepaal week met hoogste verbruik en meest gemiddelde week
-    weekverbruik_sommen = [w.sum() for w in weekdata_list]
-    max_idx = int(pd.Series(weekverbruik_sommen).idxmax())
-    mean_val = pd.Series(weekverbruik_sommen).mean()
-    mean_idx = int((pd.Series(weekverbruik_sommen) - mean_val).abs().idxmin())
+    weekverbruik_sommen = grid.per_week(v).astype(np.float64)
+    max_idx = int(np.nanargmax(weekverbruik_sommen))
+    mean_idx = int(np.nanargmin(np.abs(weekverbruik_sommen - np.nanmean(weekverbruik_sommen))))
 
     st.markdown(f"**Week met hoogste verbruik:** {weeknrs[max_idx]} (totaal: {weekverbruik_sommen[max_idx]:.2f} kWh)")
     st.markdown(f"**Week met gemiddeld verbruik:** {weeknrs[mean_idx]} (totaal: {weekverbruik_sommen[mean_idx]:.2f} kWh)")
 
-    # Streamlit weekkeuze
-    gekozen_weeknr = st.number_input("Kies weeknummer voor simulatie", min_value=int(min(weeknrs)), max_value=int(max(weeknrs)), value=int(weeknrs[mean_idx]), step=1)
-    if gekozen_weeknr in weeknrs:
-        idx = weeknrs.index(gekozen_weeknr)
-    else:
-        idx = mean_idx  # fallback
-
-    v = weekdata_list[idx]
-    o = weekopbrengst_list[idx]
-    n = len(v)
-
-    # Simuleer accuvermogen per kwartier + tekort
-    accu = [0.0] * n
-    tekort = [0.0] * n
-    accuv = 0.0
-    for i in range(n):
-        overschot = o[i] - v[i]
-        # Laad accu met overschot (max teruglevering)
-        if overschot > 0:
-            laad = min(overschot, max_teruglevering, accu_capaciteit - accuv)
-            accuv += laad * 0.25  # kwartier naar kWh
-        # Ontlaad accu als verbruik > max_afname
-        elif v[i] > max_afname:
-            nodig = v[i] - max_afname
-            ontlaad = min(nodig, accuv / 0.25)
-            accuv -= ontlaad * 0.25
-            # Tekort als accu leeg is
-            if ontlaad < nodig:
-                tekort[i] = (nodig - ontlaad) * 0.25  # kWh tekort dit kwartier
-        # Accu mag niet negatief/te vol
-        accuv = max(0.0, min(accuv, accu_capaciteit))
-        accu[i] = accuv
-
-    fig, ax = plt.subplots(figsize=(16, 8))
-    ax.plot(v.values, label="Verbruik", color="red")
-    ax.plot(o.values, label="Opbrengst", color="green")
-    ax.plot(accu, label="Accuvermogen (kWh)", color="blue", linewidth=2)
-    ax.plot(tekort, label="Tekort (kWh)", color="black", linestyle=":", linewidth=2)
-    ax.axhline(max_afname, color="orange", linestyle=":", linewidth=2, label="Afnamelimiet")
-    ax.set_xlabel("Kwartiernummer binnen week (0=maandag 00:00)")
-    ax.set_ylabel("Vermogen / Energie")
-    ax.set_title(f"{title} (week {weeknrs[idx]})")
-    ax.grid(True)
-    _add_day_lines_and_labels(ax, n)
-    ax.legend(fontsize=12)
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)  # Sluit de figuur om geheugen vrij te maken
-    gc.collect()
-    st.info(
-        f"Week {weeknrs[idx]}: totaal verbruik {v.sum():.2f} kWh, totaal opbrengst {o.sum():.2f} kWh, "
-        f"max acculading {max(accu):.2f} kWh, totaal tekort {sum(tekort):.2f} kWh"
+    # Streamlit weekkeuze op week_code, zodat ook periodes over de jaargrens eenduidig zijn
+    idx = st.selectbox(
+        "Kies week voor simulatie", options=list(range(grid.n_weken)), index=mean_idx,
+        format_func=lambda w: f"Week {weeknrs[w]} ({maandagen[w]:%d-%m-%Y})", key="accu_week",
     )
+    _plot_accu_week(v, o, res, grid, idx, weeknrs[idx], max_afname, title)
 
-def accu_stand_calculator(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, peak_shaven=False, pv_zelf_consumption=False, state_of_charge=False, var_tarieven=False, min_vermogen_accu=20, grenswaarde=50, max_laden = 5):
+def plot_accu_sweep(verbruik: pd.Series, opbrengst: pd.Series, capaciteiten, vermogens, max_afname: float, max_teruglevering: float, rendement=1.0, grid: Optional[QuarterGrid] = None):
     """
-    Simuleer de accu-stand over een periode gegeven een startwaarde.
-    Toont ook het tekort als verbruik > afnamelimiet en accu leeg is.
+    Dimensioneringscurve: tekort en zelfconsumptie als functie van de accucapaciteit, één lijn per vermogen.
+    Alle configuraties worden in één run over de hele periode gesimuleerd (accu.sweep_accu).
+    """
+    v, o, _ = uitlijnen_met_grid(verbruik, opbrengst, grid)
+    resultaat = sweep_accu(v, o, capaciteiten, vermogens, max_afname, max_teruglevering, rendement=rendement)
+
+    def teken():
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+        for vermogen, df in resultaat.groupby("vermogen_kw", sort=True):
+            label = "onbeperkt" if vermogen == 0 else f"{vermogen:g} kW"
+            ax1.plot(df["capaciteit_kwh"], df["tekort_kwh"], marker=".", label=label)
+            ax2.plot(df["capaciteit_kwh"], df["zelfconsumptie_pct"], marker=".", label=label)
+        ax1.set_xlabel("Accucapaciteit (kWh)")
+        ax1.set_ylabel("Tekort boven afnamelimiet (kWh/periode)")
+        ax1.set_title("Tekort per accugrootte")
+        ax2.set_xlabel("Accucapaciteit (kWh)")
+        ax2.set_ylabel("Zelfconsumptie (%)")
+        ax2.set_title("Zelfconsumptie per accugrootte")
+        for ax in (ax1, ax2):
+            ax.grid(True)
+            ax.legend(title="Vermogen", fontsize=9)
+        plt.tight_layout()
+        return fig
+
+    toon_figuur(vingerafdruk("accu_sweep", resultaat), teken)
+    st.dataframe(resultaat.round(2), use_container_width=True, hide_index=True)
+    return resultaat
+
+def accu_stand_calculator(verbruik: pd.Series, opbrengst: pd.Series, accu_capaciteit: float, peak_shaven=False, pv_zelf_consumption=False, state_of_charge=False, var_tarieven=False, min_vermogen_accu=20, grenswaarde=50, max_laden = 5,
+                          max_afname=None, max_teruglevering=None, max_vermogen=None, rendement=1.0, soc_doel=None, tarieven=None, grid: Optional[QuarterGrid] = None):
     """
-    # Zorg dat indexen gelijk en datetime zijn
-    verbruik = verbruik.copy()
-    opbrengst = opbrengst.copy()
-    verbruik.index = pd.to_datetime(verbruik.index)
-    opbrengst.index = pd.to_datetime(opbrengst.index)
-    min_len = min(len(verbruik), len(opbrengst))
-    verbruik = verbruik.iloc[:min_len]
-    opbrengst = opbrengst.iloc[:min_len]
-
-    n = len(verbruik)
-
-    # Simuleer accuvermogen per kwartier + tekort
-    # Rekenregels voor verschillende strategieën; 
-    # pv zelf_consumptie; wannneer pv zelfconsumptie het doel is eerst eigen gebruik simuleren en daarna pas laden met overschot, 's nachts ontladen. 
-    # peak shaven; wanneer piekafname het doel is eerst ontladen bij verbruik boven grenswaarde, daarna pas laden met overschot grenswaarde moet zvm gehaald worden op pieken op te vangen. 
-    # var_tarieven; wanneer variabele tarieven het doel is, ontladen bij hoge tarieven en laden bij lage tarieven.
-    # 's nachts wordt de stand van de accu gecheckt en opgeladen tot een bepaald punt (bijv. 6 uur 's ochtends) om de ochtendpiek op te vangen. 
-    for kwartier in verbruik: 
-        a = 0
-
-
-def instellingen_accu(peak_shave="uit", pv_zelf_consumption="uit", state_of_charge="uit", var_tarieven="uit", grenswaarde_ontladen=50, accu_capaciteit=100, max_laden_uit_net=0):
+    Simuleer de accu-stand over de hele periode volgens de gekozen strategieën (accu.simuleer_strategie).
+    - peak_shaven: ontlaad boven grenswaarde (kW), houd min_vermogen_accu (kWh) achter de hand
+    - pv_zelf_consumption: overschot opslaan en gebruiken bij netafname
+    - state_of_charge: 's nachts bijladen tot soc_doel (kWh, standaard de hele accu)
+    - var_tarieven: laden bij lage en ontladen bij hoge tarieven (24 uur-, 96 kwartier- of volledig tariefprofiel)
+    max_laden is het maximale laadvermogen uit het net (kW), max_vermogen het laad/ontlaadvermogen van de accu.
+    Geeft een AccuResultaat (arrays per kwartier) terug.
+    """
+    v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
+    signalen = instellingen_accu(
+        grid,
+        peak_shave="aan" if peak_shaven else "uit",
+        pv_zelf_consumption="aan" if pv_zelf_consumption else "uit",
+        state_of_charge="aan" if state_of_charge else "uit",
+        var_tarieven="aan" if var_tarieven else "uit",
+        grenswaarde_ontladen=grenswaarde, min_vermogen_accu=min_vermogen_accu, accu_capaciteit=accu_capaciteit,
+        max_laden_uit_net=max_laden, soc_doel=soc_doel, tarieven=tarieven,
+    )
+    afname_limiet = max_afname if max_afname is not None else (grenswaarde if peak_shaven else None)
+    return simuleer_strategie(v, o, signalen, accu_capaciteit, afname_limiet, max_teruglevering,
+                              max_laden=max_vermogen, max_ontladen=max_vermogen, rendement=rendement)
+
+
+def instellingen_accu(grid: QuarterGrid, peak_shave="uit", pv_zelf_consumption="uit", state_of_charge="uit", var_tarieven="uit", grenswaarde_ontladen=50, accu_capaciteit=100, max_laden_uit_net=0,
+                      min_vermogen_accu=0, soc_doel=None, tarieven=None):
     """
     Hulpfunctie accu module om te bepalen hoe de accu zich gedraagt over de dag.
+    Combineert de strategieën die "aan" staan tot één set dispatch-signalen per kwartier, in de volgorde
+    peak shaven, pv zelfconsumptie, state of charge, variabele tarieven. Zonder strategie doet de accu niets.
     """
-    if max_laden_uit_net == 0:
-        max_laden_uit_net = False
+    n = len(grid)
+    max_laden_uit_net = max_laden_uit_net or 0.0  # 0 = niet laden uit het net
+    strategieen = []
     if peak_shave == "aan":
-        peak_shaven = grenswaarde_ontladen
-
-def peak_shave(grenswaarde_ontladen:int, grenswaarde_opladen:int):
-        """We gaan het zo aanpakken, we checken eerst of peak shaven aan staat, deze bepaalt het minimale vermogen wat in de accu mag zitten. Pv-zelfconsumptie betekent gewoon dat ze niet terugleveren en gewoon overschotten opsparen en later gebruiken. 
-        State of charge betekent dat we 's nachts de stand van de accu checken en opladen tot een bepaald punt (bijv. 6 uur 's ochtends) om de ochtendpiek op te vangen, deze is relatief duur. Combineren kan door eerst peak shaven te doen, daarna pv zelfconsumptie en dan state of charge. 
-        State of charge zit pv_zelfconsumptie ook niet echt in de weg."""
-        accu_stand = 0
-        afnamelimiet = 5
-        verbruik = 10
-        opbrengst = 0
-        if accu_stand < grenswaarde_ontladen:
-            # Accu opladen tot grenswaarde
-            max_laden = afnamelimiet-(verbruik-opbrengst)
-            if max_laden > 0:
-                laden = min(max_laden, grenswaarde_opladen)
-            else: 
-                laden = 0
-            accu_stand = accu_stand + laden
-        elif accu_stand > grenswaarde_ontladen:
-            # Accu ontladen bij verbruik boven grenswaarde
-            
-            accu_stand = accu_stand - (verbruik-opbrengst)
\ No newline at end of file
+        # de parameter peak_shave overschaduwt de functie peak_shave hieronder
+        strategieen.append(peak_shave_beleid(n, grenswaarde_ontladen, reserve_kwh=min_vermogen_accu, max_netladen=max_laden_uit_net))
+    if pv_zelf_consumption == "aan":
+        strategieen.append(pv_zelfconsumptie_beleid(n))
+    if state_of_charge == "aan" and max_laden_uit_net > 0:
+        doel = accu_capaciteit if soc_doel is None else soc_doel
+        strategieen.append(soc_nacht_beleid(grid, doel, max_netladen=max_laden_uit_net))
+    if var_tarieven == "aan" and tarieven is not None:  # ook zonder netladen: ontladen in dure kwartieren
+        strategieen.append(tarief_arbitrage_beleid(grid, tarieven, accu_capaciteit, max_netladen=max_laden_uit_net))
+    if not strategieen:
+        return neutrale_signalen(n)
+    return combineer_signalen(*strategieen)
+
+def peak_shave(grenswaarde_ontladen: float, grenswaarde_opladen: float, n: int, reserve_kwh: float = 0.0):
+        """Peak shaven bepaalt het minimale vermogen wat in de accu mag zitten: boven grenswaarde_ontladen (kW) wordt
+        ontladen, en zolang de accu onder reserve_kwh zit wordt met max. grenswaarde_opladen (kW) uit het net bijgeladen
+        zonder zelf boven de grenswaarde uit te komen. Pv-zelfconsumptie betekent gewoon dat ze niet terugleveren en
+        overschotten opsparen en later gebruiken. State of charge betekent dat we 's nachts de stand van de accu checken
+        en opladen tot een bepaald punt (bijv. 6 uur 's ochtends) om de ochtendpiek op te vangen, deze is relatief duur.
+        Combineren kan door eerst peak shaven te doen, daarna pv zelfconsumptie en dan state of charge; de reserve van
+        peak shaven blijft daarbij buiten bereik van de andere strategieën."""
+        return peak_shave_beleid(n, grenswaarde_ontladen, reserve_kwh=reserve_kwh, max_netladen=grenswaarde_opladen)
@@ -1,52 +1,45 @@
 import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
-import gc
 import numpy as np
+from figuurcache import render_figuur, vingerafdruk
+from kwartiergrid import QuarterGrid, uitlijnen_met_grid
+from piekheatmap import PiekMatrix, dagpieken_maand_x_dag, kwartierpieken_dag_x_kwartier
 
-def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series):
+
+def _toon(png: bytes) -> None:
+    """Gerenderde figuur in Streamlit tonen (als aanwezig); de caller krijgt de bytes ook terug."""
+    try:
+        import streamlit as st
+        st.image(png, width="stretch")
+    except Exception:
+        pass
+
+
+def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series, grid: QuarterGrid | None = None):
     """
     Maakt:
     - Daglijnen (kWh/dag) voor verbruik, opbrengst (onder 0 voor visuele scheiding) en verschil (verbruik - opbrengst)
     - Maandstaven (kWh/maand) voor verbruik, opbrengst en overschot (max(opbrengst - verbruik, 0) per kwartier)
     Aannames:
     - Input is kwartierwaarden in kW → kWh = kW * 0,25
-    Retourneert: (fig1, fig2, samenvatting_dict)
+    - grid: optionele QuarterGrid van de (gealigneerde) reeksen, anders wordt die hier opgebouwd
+    Retourneert: (png1, png2, samenvatting_dict); de figuren als PNG-bytes uit de figuurcache (png2 None zonder maanddata)
     """
 
     # --- 1) Timestamps normaliseren & alignen op intersectie ---
-    v = verbruik.copy()
-    o = opbrengst.copy()
-    if not isinstance(v.index, pd.DatetimeIndex):
-        v.index = pd.to_datetime(v.index)
-    if not isinstance(o.index, pd.DatetimeIndex):
-        o.index = pd.to_datetime(o.index)
-
-    v = v.sort_index()
-    o = o.sort_index()
-
-    # Neem alleen overlappende timestamps (inner join)
-    common_idx = v.index.intersection(o.index)
-    if common_idx.empty:
-        raise ValueError("Geen overlappende timestamps tussen verbruik en opbrengst.")
-
-    v = v.loc[common_idx].astype(float)
-    o = o.loc[common_idx].astype(float)
+    v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
 
     # --- 2) kW kwartier → kWh kwartier ---
-    df = pd.DataFrame({
-        "verbruik_kW": v,
-        "opbrengst_kW": o,
-    })
     # geef NaN’s geen kans om alles stuk te maken
-    df = df.replace([np.inf, -np.inf], np.nan)
-
-    df["verbruik_kWh"]  = df["verbruik_kW"]  * 0.25
-    df["opbrengst_kWh"] = df["opbrengst_kW"] * 0.25
-
-    # --- 3) Dagtotalen ---
-    # min_count=1 voorkomt dat lege dagen 0 worden; ze blijven NaN (betere diagnose)
-    dag = df[["verbruik_kWh", "opbrengst_kWh"]].resample("D").sum(min_count=1)
+    v_kWh = np.where(np.isfinite(v), v, np.nan).astype(np.float32) * np.float32(0.25)
+    o_kWh = np.where(np.isfinite(o), o, np.nan).astype(np.float32) * np.float32(0.25)
+
+    # --- 3) Dagtotalen (bincount op de dagcodes) ---
+    # lege dagen blijven NaN (betere diagnose), zoals resample(...).sum(min_count=1)
+    dag = pd.DataFrame({
+        "verbruik_kWh": grid.per_dag(v_kWh, "sum"),
+        "opbrengst_kWh": grid.per_dag(o_kWh, "sum"),
+    }, index=grid.dagen)
     dag["verschil_kWh"] = dag["verbruik_kWh"] - dag["opbrengst_kWh"]
 
     # Als alles NaN is, stoppen
@@ -54,12 +47,12 @@ def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series):
         raise ValueError("Na resampling is er geen bruikbare dagdata (allemaal NaN). Controleer je inputreeksen.")
 
     # --- 4) Maandtotalen ---
-    df["overschot_kWh_kwartier"] = (df["opbrengst_kWh"] - df["verbruik_kWh"]).clip(lower=0)
+    overschot_kWh_kwartier = np.clip(o_kWh - v_kWh, 0, None)
     maand = pd.DataFrame({
-        "verbruik_kWh":  df["verbruik_kWh"].resample("M").sum(min_count=1),
-        "opbrengst_kWh": df["opbrengst_kWh"].resample("M").sum(min_count=1),
-        "overschot_kWh": df["overschot_kWh_kwartier"].resample("M").sum(min_count=1),
-    })
+        "verbruik_kWh":  grid.per_maand(v_kWh, "sum"),
+        "opbrengst_kWh": grid.per_maand(o_kWh, "sum"),
+        "overschot_kWh": grid.per_maand(overschot_kWh_kwartier, "sum"),
+    }, index=grid.maanden)
 
     # --- 5) Totale sommen ---
     totaal_verbruik  = dag["verbruik_kWh"].sum(skipna=True)
@@ -67,22 +60,23 @@ def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series):
     totaal_verschil  = totaal_verbruik - totaal_opbrengst
 
     # --- 6) Plot: daglijnen (kWh/dag) ---
-    fig1, ax1 = plt.subplots(figsize=(12, 5))
-    ax1.plot(dag.index, dag["verbruik_kWh"], label="Verbruik per dag (kWh)")
-    # opbrengst negatief tekenen voor visuele scheiding
-    ax1.plot(dag.index, dag["opbrengst_kWh"], label="Opbrengst per dag (kWh, negatief getekend)")
-    ax1.plot(dag.index, dag["verschil_kWh"], label="Verschil (verbruik − opbrengst) per dag (kWh)")
-    ax1.axhline(0, linewidth=0.8, linestyle="--")
-    ax1.set_xlabel("Datum")
-    ax1.set_ylabel("kWh per dag")
-    ax1.set_title("Dagtotalen (kWh)")
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-    fig1.tight_layout()
+    def teken_dagen():
+        fig1, ax1 = plt.subplots(figsize=(12, 5))
+        ax1.plot(dag.index, dag["verbruik_kWh"], label="Verbruik per dag (kWh)")
+        # opbrengst negatief tekenen voor visuele scheiding
+        ax1.plot(dag.index, dag["opbrengst_kWh"], label="Opbrengst per dag (kWh, negatief getekend)")
+        ax1.plot(dag.index, dag["verschil_kWh"], label="Verschil (verbruik − opbrengst) per dag (kWh)")
+        ax1.axhline(0, linewidth=0.8, linestyle="--")
+        ax1.set_xlabel("Datum")
+        ax1.set_ylabel("kWh per dag")
+        ax1.set_title("Dagtotalen (kWh)")
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
+        fig1.tight_layout()
+        return fig1
 
     # --- 7) Plot: maandstaven (kWh/maand) ---
-    fig2 = None
-    if not maand.dropna(how="all").empty:
+    def teken_maanden():
         x = maand.index
         labels = [d.strftime("%Y-%m") for d in x]
         width = 0.28
@@ -100,20 +94,16 @@ def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series):
         ax2.legend()
         ax2.grid(True, axis="y", alpha=0.3)
         fig2.tight_layout()
+        return fig2
 
-    # --- 8) Automatisch tonen in Streamlit (als beschikbaar) ---
-    try:
-        import streamlit as st
-        st.pyplot(fig1)
-        if fig2 is not None:
-            st.pyplot(fig2)
-    except Exception:
-        # niet in Streamlit? dan laat de caller het maar tonen/opslaan
-        pass
-
-    # Optioneel: niet sluiten hier; laat de caller bepalen
-    # plt.close(fig1); 
-    # if fig2: plt.close(fig2)
+    # --- 8) Renderen via de figuurcache en tonen in Streamlit (als beschikbaar) ---
+    png1 = render_figuur(vingerafdruk("dagtotalen", dag), teken_dagen)
+    png2 = None
+    if not maand.dropna(how="all").empty:
+        png2 = render_figuur(vingerafdruk("maandtotalen", maand), teken_maanden)
+    _toon(png1)
+    if png2 is not None:
+        _toon(png2)
 
     summary = {
         "totaal_verbruik_kWh": float(totaal_verbruik),
@@ -122,96 +112,186 @@ def plot_dag_en_maand(verbruik: pd.Series, opbrengst: pd.Series):
         "dagen": int(len(dag)),
         "maanden": int(len(maand)),
     }
-    return fig1, fig2, summary
+    return png1, png2, summary
+
+def dag_met_grootste_piek(verbruik: pd.Series, opbrengst: pd.Series, grid: QuarterGrid | None = None):
+    """Datum met de hoogste kwartierpiek van verbruik - opbrengst (None als er geen data is)."""
+    v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
+    piek_per_dag = grid.per_dag(v - o, "max")
+    if np.isnan(piek_per_dag).all():
+        return None
+    return grid.dagen[int(np.nanargmax(piek_per_dag))].date()
+
+
+HEATMAP_WEERGAVEN = {
+    "maand_dag": "Max kwartierverbruik per dag (% van max afname)",
+    "dag_kwartier": "Kwartierverbruik per dag en tijdstip (% van max afname)",
+}
+MAX_ANNOTATIE_CELLEN = 400  # één jaar maand × dag (372 cellen) krijgt nog getallen, grotere matrices niet
+
 
 def plot_max_dagpiek_heatmap(verbruik: pd.Series,
                              opbrengst: pd.Series,
                              max_afname: float,
-                             logo_bytes=None):
+                             logo_bytes=None,
+                             grid: QuarterGrid | None = None,
+                             weergave: str = "maand_dag",
+                             per_jaar: bool = True):
+    """
+    Heatmap van verbruik - opbrengst als % van max_afname. weergave "maand_dag": dagpiek per maand × dag;
+    "dag_kwartier": elk kwartier, dag × tijdstip (365 × 96). per_jaar=False vouwt de jaren op de kalender
+    (maximum over de jaren). Geeft de dag met de grootste piek terug (None zonder data).
+    """
     # --- Validatie & aligneren ---
     if max_afname is None or not np.isfinite(max_afname) or max_afname <= 0:
         raise ValueError("max_afname moet een positief getal > 0 zijn.")
+    if weergave not in HEATMAP_WEERGAVEN:
+        raise ValueError(f"Onbekende weergave '{weergave}', kies uit {', '.join(HEATMAP_WEERGAVEN)}.")
+
+    # Zorg voor dezelfde tijdstempels (intersectie) + kalenderindex
+    v, o, grid = uitlijnen_met_grid(verbruik, opbrengst, grid)
+
+    # --- Berekeningen (dichte matrix via de dag-/kwartiercodes) ---
+    perc = (v - o) * np.float32(100.0 / float(max_afname))
+    # dagmax (kwartierpiek per dag) via de dagcodes
+    perc_per_dag = grid.per_dag(perc, "max")
+    if weergave == "maand_dag":
+        matrix = dagpieken_maand_x_dag(perc_per_dag, grid, per_jaar=per_jaar)
+    else:
+        matrix = kwartierpieken_dag_x_kwartier(perc, grid, per_jaar=per_jaar)
+    titel = HEATMAP_WEERGAVEN[weergave] + ("" if per_jaar else " — max over de jaren")
+
+    # Streamlit tonen (als aanwezig); tekenen alleen bij een nieuwe invoer
+    sleutel = vingerafdruk("max_dagpiek_heatmap", matrix, titel, logo_bytes)
+    _toon(render_figuur(sleutel, lambda: _teken_piek_heatmap(matrix, titel, logo_bytes)))
 
-    # Zorg voor datetime index en dezelfde tijdstempels
-    verbruik = verbruik.copy()
-    opbrengst = opbrengst.copy()
-    if not isinstance(verbruik.index, pd.DatetimeIndex):
-        verbruik.index = pd.to_datetime(verbruik.index)
-    if not isinstance(opbrengst.index, pd.DatetimeIndex):
-        opbrengst.index = pd.to_datetime(opbrengst.index)
-
-    # Align op de intersectie van timestamps
-    ix = verbruik.index.intersection(opbrengst.index)
-    verbruik = verbruik.loc[ix].astype("float32")
-    opbrengst = opbrengst.loc[ix].astype("float32")
-
-    if verbruik.empty or opbrengst.empty:
-        raise ValueError("Geen overlappende timestamps tussen verbruik en opbrengst.")
-
-    # --- Berekeningen ---
-    verschil = verbruik - opbrengst
-    # dagmax (kwartierpiek per dag)
-    piek_per_dag = verschil.resample("D").max()
-    # % van limiet (kan NaN opleveren als dag leeg was)
-    perc_per_dag = (piek_per_dag / float(max_afname)) * 100.0
-    perc_per_dag = perc_per_dag.replace([np.inf, -np.inf], np.nan)
-
-    # DataFrame voor pivot
-    df = pd.DataFrame({"perc": perc_per_dag})
-    df["day"] = df.index.day
-    df["month"] = df.index.month
-
-    # Pivot: maand x dag
-    pivot = df.pivot_table(index="month",
-                           columns="day",
-                           values="perc",
-                           aggfunc="mean",
-                           observed=False)
-    pivot = pivot.replace([np.inf, -np.inf], np.nan)
-
-    # --- Annotaties als strings (leeg bij NaN) ---
-    def _fmt_int_or_empty(x):
-        if pd.isna(x):
-            return ""
-        try:
-            return f"{int(round(float(x)))}"
-        except Exception:
-            return ""
-
-    annot = pivot.applymap(_fmt_int_or_empty)
-
-    # --- Plot ---
-    fig, ax = plt.subplots(figsize=(12, 6))
-    sns.heatmap(pivot, annot=annot, fmt="", cmap="YlOrRd",
-                linewidths=0.5, ax=ax, cbar_kws={'label': '% van limiet'})
-    ax.set_xlabel("Dag van maand")
-    ax.set_ylabel("Maand")
-    ax.set_title("Max kwartierverbruik per dag (% van max afname)")
+    # --- Resultaat (grootste dag) ---
+    if np.isnan(perc_per_dag).all():
+        return None
+    return grid.dagen[int(np.nanargmax(perc_per_dag))].date()
+
+
+def _teken_piek_heatmap(matrix: PiekMatrix, titel: str, logo_bytes=None):
+    """Eén imshow voor de hele matrix; getallen en celranden alleen bij kleine matrices."""
+    waarden = matrix.waarden
+    n_rijen, n_kolommen = waarden.shape
+    klein = matrix.n_cellen <= MAX_ANNOTATIE_CELLEN
+    cmap = plt.get_cmap("YlOrRd").copy()
+    cmap.set_bad("white")  # dagen/kwartieren zonder data
+    vmax = np.nanmax(waarden) if np.isfinite(waarden).any() else 100.0
+    onder_nul = np.nanmin(waarden) < 0 if np.isfinite(waarden).any() else False
+
+    hoogte = 6 if klein or n_rijen <= 24 else 8
+    fig, ax = plt.subplots(figsize=(12, hoogte))
+    beeld = ax.imshow(waarden, aspect="auto", interpolation="nearest", cmap=cmap, vmin=0, vmax=max(vmax, 1.0))
+    fig.colorbar(beeld, ax=ax, label="% van limiet", extend="min" if onder_nul else "neither")
+    ax.set_xticks(matrix.kolom_posities, matrix.kolom_labels)
+    ax.set_yticks(matrix.rij_posities, matrix.rij_labels)
+    ax.set_xlabel(matrix.kolom_titel)
+    ax.set_ylabel(matrix.rij_titel)
+    ax.set_title(titel)
+
+    if klein:
+        ax.set_xticks(np.arange(n_kolommen + 1) - 0.5, minor=True)
+        ax.set_yticks(np.arange(n_rijen + 1) - 0.5, minor=True)
+        ax.grid(which="minor", color="white", linewidth=0.5)
+        ax.tick_params(which="minor", length=0)
+        for r, k in np.argwhere(np.isfinite(waarden)):
+            w = waarden[r, k]
+            ax.text(k, r, f"{int(round(float(w)))}", ha="center", va="center", fontsize=7,
+                    color="white" if w > 0.6 * vmax else "black")
     fig.tight_layout(rect=[0, 0.08, 1, 1])
 
     # Logo onder de plot (optioneel)
     if logo_bytes:
-        import matplotlib.offsetbox as offsetbox
         from PIL import Image
         import io as _io
         logo_img = Image.open(_io.BytesIO(logo_bytes))
         ax_logo = fig.add_axes([0.4, 0.01, 0.2, 0.07])
         ax_logo.axis('off')
         ax_logo.imshow(logo_img)
+    return fig
 
-    # Streamlit tonen (als aanwezig), anders laat je de caller het fig zelf gebruiken
-    try:
-        import streamlit as st
-        st.pyplot(fig)
-    except Exception:
-        pass
+ORIENTATIE_KENGETALLEN = {
+    "opbrengst_kwh": ("Jaaropbrengst (kWh)", "YlOrRd", "max"),
+    "zelfconsumptie_pct": ("Zelfconsumptie (%)", "YlGn", "max"),
+    "uren_boven_teruglevering": ("Uren boven max teruglevering", "PuRd", "min"),
+}
 
-    plt.close(fig); gc.collect()
 
-    # --- Resultaat (grootste dag) ---
-    if perc_per_dag.dropna().empty:
-        grootste_dag = None
-    else:
-        grootste_dag = perc_per_dag.idxmax().date()
+def kiezer_graden(azimuth):
+    """pvlib-azimut naar de hoek op de oriëntatiekiezer in de zijbalk (die geeft kiezer − 180 door aan pvlib)."""
+    return (np.asarray(azimuth, dtype=np.float64) + 180) % 360
+
+def plot_orientatie_heatmap(resultaat: pd.DataFrame, kengetal: str = "opbrengst_kwh", huidig=None):
+    """
+    Heatmap hellingshoek × azimut van één kengetal uit pv_optimalisatie.optimaliseer_orientatie.
+    De azimut-as staat in kiezertermen (kiezer_graden), zodat die overeenkomt met de oriëntatiekiezer.
+    Markeert de beste cel (ster) en optioneel de huidige keuze (huidig = (pvlib-azimuth, hellingshoek), kruis).
+    Geeft de rij van de beste cel terug (azimuth in pvlib-termen).
+    """
+    label, cmap, beste = ORIENTATIE_KENGETALLEN[kengetal]
+    rij = resultaat.loc[resultaat[kengetal].idxmax() if beste == "max" else resultaat[kengetal].idxmin()]
+    sleutel = vingerafdruk("orientatie_heatmap", resultaat[["azimuth", "hellingshoek", kengetal]], kengetal,
+                           None if huidig is None else tuple(float(h) for h in huidig))
+    _toon(render_figuur(sleutel, lambda: _teken_orientatie(resultaat, kengetal, rij, huidig)))
+    return rij
+
+
+def _teken_orientatie(resultaat: pd.DataFrame, kengetal: str, rij: pd.Series, huidig):
+    label, cmap, _ = ORIENTATIE_KENGETALLEN[kengetal]
+    kiezer = resultaat.assign(kiezer=kiezer_graden(resultaat["azimuth"]))
+    azimuths = np.unique(kiezer["kiezer"].to_numpy())
+    hellingen = np.unique(resultaat["hellingshoek"].to_numpy())
+    # resultaat is per hellingshoek (rij) alle azimuts (kolom): direct te reshapen, geen pivot nodig
+    waarden = (kiezer.sort_values(["hellingshoek", "kiezer"])[kengetal]
+               .to_numpy().reshape(len(hellingen), len(azimuths)))
+
+    stap_az = azimuths[1] - azimuths[0] if len(azimuths) > 1 else 1
+    stap_h = hellingen[1] - hellingen[0] if len(hellingen) > 1 else 1
+    extent = [azimuths[0] - stap_az / 2, azimuths[-1] + stap_az / 2, hellingen[0] - stap_h / 2, hellingen[-1] + stap_h / 2]
+
+    fig, ax = plt.subplots(figsize=(12, 5))
+    im = ax.imshow(waarden, origin="lower", aspect="auto", cmap=cmap, extent=extent, interpolation="nearest")
+    fig.colorbar(im, ax=ax, label=label)
+    ax.plot(kiezer_graden(rij["azimuth"]), rij["hellingshoek"], marker="*", color="black", markersize=16, label=f"Beste ({rij[kengetal]:.0f})")
+    if huidig is not None:
+        ax.plot(kiezer_graden(huidig[0]), huidig[1], marker="X", color="blue", markersize=12, linestyle="none", label="Huidige keuze")
+    ax.set_xticks([0, 90, 180, 270])
+    ax.set_xticklabels(["N (0°)", "O (90°)", "Z (180°)", "W (270°)"])
+    ax.set_xlabel("Oriëntatie (kiezer)")
+    ax.set_ylabel("Hellingshoek (°)")
+    ax.set_title(f"{label} per oriëntatie")
+    ax.legend(loc="upper right")
+    fig.tight_layout()
+    return fig
+
+
+def plot_weerjaren(resultaat, max_afname: float, max_teruglevering: float):
+    """
+    Histogrammen van weerjaren.simuleer_weerjaren: jaaropbrengst met P50/P90 en de verdeling van het
+    aantal uren boven max_afname en max_teruglevering.
+    """
+    sleutel = vingerafdruk("weerjaren", resultaat, max_afname, max_teruglevering)
+    _toon(render_figuur(sleutel, lambda: _teken_weerjaren(resultaat, max_afname, max_teruglevering)))
+
+
+def _teken_weerjaren(resultaat, max_afname: float, max_teruglevering: float):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 4.5))
+    ax1.hist(resultaat.opbrengst_kwh, bins=50, color="#f2a900", alpha=0.8)
+    ax1.axvline(resultaat.p50_kwh, color="black", linestyle="-", label=f"P50: {resultaat.p50_kwh:.0f} kWh")
+    ax1.axvline(resultaat.p90_kwh, color="black", linestyle="--", label=f"P90: {resultaat.p90_kwh:.0f} kWh")
+    ax1.set_xlabel("Jaaropbrengst (kWh)")
+    ax1.set_ylabel("Aantal jaren")
+    ax1.set_title(f"Opbrengst over {len(resultaat)} weerjaren")
+    ax1.legend()
 
-    return grootste_dag
\ No newline at end of file
+    ax2.hist(resultaat.uren_boven_afname, bins=40, color="tab:red", alpha=0.6, label=f"> max afname ({max_afname:g} kW)")
+    ax2.hist(resultaat.uren_boven_teruglevering, bins=40, color="tab:green", alpha=0.6,
+             label=f"> max teruglevering ({max_teruglevering:g} kW)")
+    ax2.set_xlabel("Uren per jaar boven de grens")
+    ax2.set_ylabel("Aantal jaren")
+    ax2.set_title("Overschrijdingsuren")
+    ax2.legend()
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,143 @@
+import difflib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pvlib
+
+from kwartierdata_io import lees_arrow, schrijf_arrow
+
+# De CEC-databases (tienduizenden modules/omvormers) worden per proces één keer geladen. De eerste keer
+# komt dat uit de pvlib-CSV; daarna uit een getypeerd Arrow-bestand (één rij per component) dat
+# memory-mapped wordt ingelezen. Opzoeken gaat via een vooraf opgebouwde index op exacte en genormaliseerde naam.
+CACHE_DIR = Path(os.environ.get("PV_CATALOGUS_CACHE_DIR", Path(__file__).parent / ".cache" / "pv_catalogus"))
+CACHE_VERSIE = 1  # ophogen als de opslagindeling verandert
+
+# Keuzelijst in de app: CEC-naam -> nominaal vermogen (Wp)
+MODULE_KEUZE = {
+    "Topsun_TS_S400SA1": 400,
+    "Grape_Solar_GS_S_420_KR3": 420,
+    "SunPower_SPR_E20_440_COM": 440,
+    "ENN_Solar_Energy_EST_460": 460,
+    "SunPower_SPR_X22_475_COM": 475,
+    "Sunpower_SPR_X22_480_COM": 480,
+    "Sunpreme_Inc__SNPM_GxB_500": 500
+}
+
+
+def normaliseer_naam(naam) -> str:
+    """Kleine letters, alle niet-alfanumerieke tekens als één '_' ("SunPower SPR-X22" == "sunpower_spr_x22")."""
+    return re.sub(r"[^0-9a-z]+", "_", str(naam).strip().lower()).strip("_")
+
+
+@dataclass(frozen=True, eq=False)
+class Componentcatalogus:
+    """
+    Eén CEC-database als tabel met één rij per component (numerieke kolommen float64, overige tekst)
+    plus een index naam -> rij voor exacte en genormaliseerde namen.
+    """
+    soort: str
+    tabel: pd.DataFrame
+    exact: dict
+    genormaliseerd: dict
+
+    @classmethod
+    def from_tabel(cls, soort: str, tabel: pd.DataFrame) -> "Componentcatalogus":
+        namen = tabel.index.tolist()
+        exact = {naam: i for i, naam in enumerate(namen)}
+        genormaliseerd = {}
+        for i, naam in enumerate(namen):
+            genormaliseerd.setdefault(normaliseer_naam(naam), i)  # bij dubbele normalisatie wint de eerste
+        return cls(soort, tabel, exact, genormaliseerd)
+
+    def __len__(self) -> int:
+        return len(self.tabel)
+
+    def __contains__(self, naam) -> bool:
+        return self._rij(naam) is not None
+
+    @property
+    def namen(self) -> pd.Index:
+        return self.tabel.index
+
+    def _rij(self, naam):
+        i = self.exact.get(str(naam))
+        return i if i is not None else self.genormaliseerd.get(normaliseer_naam(naam))
+
+    def zoek(self, naam, fuzzy: bool = True) -> str:
+        """
+        CEC-naam bij een (bijna) exacte naam. Als laatste redmiddel een fuzzy match, maar alleen binnen
+        de namen met dezelfde fabrikant (eerste naamdeel), niet over de hele database.
+        """
+        i = self._rij(naam)
+        if i is None and fuzzy:
+            sleutel = normaliseer_naam(naam)
+            fabrikant = sleutel.split("_", 1)[0]
+            kandidaten = [n for n in self.genormaliseerd if n.split("_", 1)[0] == fabrikant]
+            match = difflib.get_close_matches(sleutel, kandidaten, n=1, cutoff=0.8)
+            if match:
+                i = self.genormaliseerd[match[0]]
+        if i is None:
+            raise KeyError(
+                f"'{naam}' niet gevonden in de {self.soort} database. "
+                f"Probeer een exacte CEC-naam of gebruik PVWatts fallback."
+            )
+        return self.tabel.index[i]
+
+    def parameters(self, naam) -> pd.Series:
+        """Parameters van één component als Series, zoals een kolom van pvlib.pvsystem.retrieve_sam."""
+        key = self.zoek(naam)
+        rij = self.tabel.iloc[self.exact[key]]
+        return pd.Series(rij.to_numpy(dtype=object), index=self.tabel.columns, name=key)
+
+
+def _cache_pad(soort: str) -> Path:
+    return CACHE_DIR / f"{soort}_pvlib{pvlib.__version__}_v{CACHE_VERSIE}.arrow"
+
+
+def _laad_tabel(soort: str) -> pd.DataFrame:
+    pad = _cache_pad(soort)
+    if not pad.exists():
+        ruw = pvlib.pvsystem.retrieve_sam(soort).T  # retrieve_sam: kolom per component
+        tabel = pd.DataFrame(index=ruw.index.astype(str))
+        for c in ruw.columns:
+            getallen = pd.to_numeric(ruw[c], errors="coerce")
+            if getallen.notna().sum() == ruw[c].notna().sum():
+                tabel[c] = getallen.astype(np.float64)
+            else:
+                tabel[c] = ruw[c].map(lambda x: None if pd.isna(x) else str(x))
+        schrijf_arrow(tabel, pad)
+    return lees_arrow(pad)
+
+
+_CATALOGI = {}
+_LOCK = threading.Lock()
+
+
+def catalogus(soort: str = "CECMod") -> Componentcatalogus:
+    """Procesbrede, lazy geladen catalogus ('CECMod' of 'CECInverter'); alle sessies delen dezelfde instantie."""
+    cat = _CATALOGI.get(soort)
+    if cat is None:
+        with _LOCK:
+            cat = _CATALOGI.get(soort)
+            if cat is None:
+                cat = _CATALOGI[soort] = Componentcatalogus.from_tabel(soort, _laad_tabel(soort))
+    return cat
+
+
+def pv_moduletypes() -> dict:
+    """De keuzelijst (naam -> nominaal Wp), beperkt tot modules die in de geïnstalleerde CEC-database staan."""
+    modules = catalogus("CECMod")
+    return {naam: wp for naam, wp in MODULE_KEUZE.items() if naam in modules}
+
+
+def power_to_types() -> dict:
+    """Nominaal vermogen (Wp) -> lijst CEC-modulenamen, op volgorde van vermogen."""
+    uit = {}
+    for naam, wp in sorted(pv_moduletypes().items(), key=lambda kv: kv[1]):
+        uit.setdefault(wp, []).append(naam)
+    return uit
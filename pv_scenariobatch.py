@@ -0,0 +1,121 @@
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from pv_catalogus import catalogus
+from pv_simulatie import simuleer_vlakken
+from zonnegeometrie import Zonnegeometrie, zonnegeometrie
+
+# Een batch scenario's deelt één zonnegeometrie (zonnestand, luchtmassa, clear-sky) en één verbruiksreeks.
+# Die staan als float32-blok in gedeeld geheugen; workers koppelen er een view aan in plaats van ze per
+# scenario opnieuw te berekenen of te picklen. Per scenario gaat alleen de configuratie heen en komen
+# alleen de kengetallen terug.
+STANDAARD_OMVORMER = "ABB__PVI_3_0_OUTD_S_US__208V_"  # zelfde standaard als pvlib_init.get_parameters
+# een worker opstarten (spawn, pvlib en catalogus importeren) kost enkele seconden, een scenario op gedeelde
+# geometrie ~0,06 s: pas vanaf enkele tientallen scenario's per worker wint de pool het van dit proces
+MIN_SCENARIOS_PER_WORKER = 32
+
+
+@dataclass(frozen=True)
+class PVScenario:
+    """Eén te vergelijken configuratie: paneeltype (CEC-naam), dakvlakken (PVVlak) en omvormer."""
+    naam: str
+    type_paneel: str
+    vlakken: tuple
+    omvormer: str = STANDAARD_OMVORMER
+
+
+def _kengetallen(ac: np.ndarray, verbruik: np.ndarray, max_teruglevering: float) -> dict:
+    """Kengetallen van één AC-reeks (kW per kwartier) tegen het verbruik (kW, NaN = geen meting)."""
+    boven = np.maximum(ac - verbruik - max_teruglevering, 0)  # NaN waar geen verbruik bekend is
+    return {
+        "jaaropbrengst_kwh": float(ac.sum() / 4),
+        "piek_kw": float(ac.max(initial=0.0)),
+        "teruglevering_boven_limiet_kwh": float(np.nansum(boven) / 4),
+        "uren_boven_limiet": float((boven > 0).sum() / 4),
+    }
+
+
+def _verbruik_op_tijdas(verbruik: pd.Series | None, times: pd.DatetimeIndex) -> np.ndarray:
+    """Verbruik (kW) op de tijdas van de geometrie (koppeling UTC-naief, zoals align_to_common_15min_grid)."""
+    uit = np.full(len(times), np.nan, dtype=np.float32)
+    if verbruik is None:
+        uit[:] = 0.0
+        return uit
+    naief = lambda idx: (idx.tz_convert(None) if idx.tz is not None else idx).as_unit("ns").asi8
+    _, pos, v_pos = np.intersect1d(naief(times), naief(pd.DatetimeIndex(verbruik.index)),
+                                   assume_unique=True, return_indices=True)
+    uit[pos] = np.asarray(verbruik, dtype=np.float32)[v_pos]
+    return uit
+
+
+# --- worker-kant ---
+# Alleen in gespawnde workers gevuld (één per proces). In dit proces gaan geometrie en verbruik expliciet
+# mee: Streamlit draait elke sessie in een eigen thread, een gedeelde dict zou vergelijkingen door elkaar halen.
+_GEDEELD = {}
+
+
+def _init_worker(shm_naam: str, kolommen: list, times: pd.DatetimeIndex):
+    shm = shared_memory.SharedMemory(name=shm_naam)
+    blok = np.ndarray((len(kolommen) + 1, len(times)), dtype=np.float32, buffer=shm.buf)
+    # blok[:-1].T is een view; pandas bewaart kolommen van één dtype zelf ook als (kolommen, n)
+    waarden = pd.DataFrame(blok[:-1].T, columns=kolommen, copy=False)
+    _GEDEELD.update(shm=shm, geo=Zonnegeometrie(times, waarden), verbruik=blok[-1])
+
+
+def _reken_scenario(taak, geo: Zonnegeometrie | None = None, verbruik: np.ndarray | None = None) -> dict:
+    """Eén scenario; zonder geo/verbruik (in een worker) uit het gedeelde geheugen van _init_worker."""
+    if geo is None:
+        geo, verbruik = _GEDEELD["geo"], _GEDEELD["verbruik"]
+    vlakken, module, inverter, temperature_parameters, location, start, end, verliesfactor, max_teruglevering = taak
+    resultaat = simuleer_vlakken(location, module, inverter, temperature_parameters, list(vlakken), start, end,
+                                 verliesfactor=verliesfactor, geometrie=geo)
+    kengetallen = _kengetallen(resultaat.totaal.to_numpy(), verbruik, max_teruglevering)
+    kengetallen["kwp"] = sum(float(module["STC"]) * v.panelen_per_reeks * v.reeksen_per_omvormer * v.aantal
+                             for v in vlakken if v.actief) / 1000
+    return kengetallen
+
+
+def vergelijk_scenarios(location, scenarios, start, end, temperature_parameters, verbruik: pd.Series | None = None,
+                        max_teruglevering: float = np.inf, verliesfactor: float = 0.65,
+                        max_workers: int | None = None) -> pd.DataFrame:
+    """
+    Reken een lijst PVScenario's door en geef een vergelijkingstabel (één rij per scenario): kWp,
+    jaaropbrengst (kWh), piekvermogen (kW), teruglevering boven max_teruglevering (kWh, tegen `verbruik`)
+    en het aantal uren daarboven. Zonnegeometrie en verbruik worden één keer bepaald en via gedeeld
+    geheugen over een procespool verdeeld; kleine batches (of één core) rekenen in dit proces.
+    """
+    scenarios = list(scenarios)
+    geo = zonnegeometrie(location, start, end)
+    modules, omvormers = catalogus("CECMod"), catalogus("CECInverter")
+    taken = [(tuple(s.vlakken), modules.parameters(s.type_paneel), omvormers.parameters(s.omvormer),
+              temperature_parameters, location, start, end, verliesfactor, max_teruglevering) for s in scenarios]
+
+    v_kw = _verbruik_op_tijdas(verbruik, geo.times)
+    workers = min(len(taken) // MIN_SCENARIOS_PER_WORKER, max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        rijen = list(map(partial(_reken_scenario, geo=geo, verbruik=v_kw), taken))
+    else:
+        kolommen = list(geo.waarden.columns)
+        blok_vorm = (len(kolommen) + 1, len(geo))
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(blok_vorm)) * 4)
+        try:
+            blok = np.ndarray(blok_vorm, dtype=np.float32, buffer=shm.buf)
+            blok[:-1] = geo.waarden.to_numpy(np.float32).T
+            blok[-1] = v_kw
+            del blok  # geen views openlaten, anders kan shm niet sluiten
+            # spawn: ook veilig vanuit de (multithreaded) Streamlit-server en gelijk op Windows
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                     initializer=_init_worker, initargs=(shm.name, kolommen, geo.times)) as pool:
+                rijen = list(pool.map(_reken_scenario, taken, chunksize=-(-len(taken) // workers)))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    tabel = pd.DataFrame(rijen, index=pd.Index([s.naam for s in scenarios], name="scenario"))
+    return tabel[["kwp", "jaaropbrengst_kwh", "piek_kw", "teruglevering_boven_limiet_kwh", "uren_boven_limiet"]]
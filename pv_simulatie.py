@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pvlib
+
+from zonnegeometrie import Zonnegeometrie, zonnegeometrie
+
+
+@dataclass(frozen=True)
+class PVVlak:
+    """
+    Eén dakvlak: oriëntatie (pvlib-conventie, 180 = zuid) en stringopbouw per omvormer.
+    aantal = hoeveel van deze omvormer+strings-combinaties er op het vlak liggen (de oude 'Reeksen').
+    """
+    hellingshoek: float
+    azimuth: float
+    panelen_per_reeks: int = 1
+    reeksen_per_omvormer: int = 1
+    aantal: int = 1
+    naam: str | None = None
+
+    @property
+    def actief(self) -> bool:
+        return self.aantal > 0 and self.panelen_per_reeks > 0 and self.reeksen_per_omvormer > 0
+
+
+@dataclass(frozen=True)
+class PVResultaat:
+    """AC-vermogen in kW per tijdstap: één kolom per vlak (incl. aantal en verliesfactor) en het totaal."""
+    per_vlak: pd.DataFrame
+    totaal: pd.Series
+
+    def jaaropbrengst_kwh(self) -> pd.Series:
+        return self.per_vlak.sum() / 4
+
+
+def _vlak_namen(vlakken) -> list:
+    return [v.naam or f"Vlak {i + 1}" for i, v in enumerate(vlakken)]
+
+
+def simuleer_vlakken(location, module, inverter, temperature_parameters, vlakken, start, end,
+                     verliesfactor: float = 1.0, geometrie: Zonnegeometrie | None = None) -> PVResultaat:
+    """
+    Simuleer alle dakvlakken in één gevectoriseerde (vlakken × tijd) doorrekening op gedeelde
+    zonnegeometrie en clear-sky instraling. Zelfde keten als de pvlib ModelChain van de oorspronkelijke app
+    (haydavies-transpositie, aoi/spectraal no_loss, SAPM-celtemperatuur bij 20 °C en windstil,
+    CEC single-diode, Sandia-omvormer per vlak); elk extra vlak kost alleen één rij extra.
+    """
+    namen = _vlak_namen(vlakken)
+    geo = geometrie if geometrie is not None else zonnegeometrie(location, start, end)
+    n = len(geo)
+    actief = [i for i, v in enumerate(vlakken) if v.actief]
+    ac = np.zeros((len(vlakken), n))
+
+    if actief:
+        vl = [vlakken[i] for i in actief]
+        kolom = lambda waarden: np.asarray(waarden, dtype=np.float64)[:, None]
+        g = geo.waarden
+        zon = {c: g[c].to_numpy(np.float64) for c in ("apparent_zenith", "azimuth", "ghi", "dni", "dhi", "airmass_relative")}
+
+        poa = pvlib.irradiance.get_total_irradiance(
+            kolom([v.hellingshoek for v in vl]), kolom([v.azimuth for v in vl]),
+            zon["apparent_zenith"], zon["azimuth"], zon["dni"], zon["ghi"], zon["dhi"],
+            dni_extra=pvlib.irradiance.get_extra_radiation(geo.times).to_numpy(),
+            airmass=zon["airmass_relative"], model="haydavies",
+        )
+        ee = np.nan_to_num(np.asarray(poa["poa_global"], dtype=np.float64), nan=0.0)
+        temp_cel = pvlib.temperature.sapm_cell(ee, 20.0, 0.0, **temperature_parameters)
+
+        # single-diode alleen waar licht is; 's nachts is het DC-vermogen 0
+        p_mp = np.zeros_like(ee)
+        v_mp = np.zeros_like(ee)
+        licht = ee > 0
+        if licht.any():
+            params = pvlib.pvsystem.calcparams_cec(
+                ee[licht], temp_cel[licht], module["alpha_sc"], module["a_ref"], module["I_L_ref"],
+                module["I_o_ref"], module["R_sh_ref"], module["R_s"], module["Adjust"],
+            )
+            diode = pvlib.pvsystem.singlediode(*params, method="newton")
+            p_mp[licht] = np.asarray(diode["p_mp"])
+            v_mp[licht] = np.asarray(diode["v_mp"])
+
+        panelen = kolom([v.panelen_per_reeks for v in vl])
+        reeksen = kolom([v.reeksen_per_omvormer for v in vl])
+        p_ac = pvlib.inverter.sandia(v_mp * panelen, p_mp * panelen * reeksen, inverter) / 1000  # naar kW
+        ac[actief] = p_ac * kolom([v.aantal for v in vl]) * verliesfactor
+
+    per_vlak = pd.DataFrame(ac.T, index=geo.times, columns=namen)
+    return PVResultaat(per_vlak=per_vlak, totaal=per_vlak.sum(axis=1).rename("ac"))
@@ -3,6 +3,7 @@ import numpy as np
 import streamlit as st
 import matplotlib.pyplot as plt
 import gc
+from pv_catalogus import MODULE_KEUZE as PV_MODULETYPES  # keuzelijst modules, gedefinieerd bij de CEC-catalogus
 
 def mem_optimize_df(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -18,18 +19,80 @@ def mem_optimize_df(df: pd.DataFrame) -> pd.DataFrame:
             df[c] = df[c].astype("category")
     return df
 
-@st.cache_data(show_spinner=False, ttl=3600, max_entries=6)
-def read_excel_smart(file, index_col=0, parse_dates=True) -> pd.DataFrame: 
-    df = pd.read_excel(file, index_col=index_col, parse_dates=parse_dates,
-        engine="openpyxl", engine_kwargs={"data_only": True})
-    if parse_dates and not pd.api.types.is_datetime64_any_dtype(df.index):
-        df.index = pd.to_datetime(df.index, errors="coerce")
-    return mem_optimize_df(df)
-
 def as_float32_series(s: pd.Series) -> pd.Series: 
     s = pd.Series(pd.to_numeric(s, errors="coerce"), index=s.index, name=s.name)
     return s.astype("float32")
 
+_KWARTIER_NS = 900_000_000_000  # 15 minuten in ns
+
+
+def _kwartier_epoch(s) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Series -> (int64 epoch-ns gefloord op 15 min, float32 waarden):
+    - index naar datetime, NaT eruit
+    - tz-info weg (via UTC)
+    """
+    idx = s.index
+    if not isinstance(idx, pd.DatetimeIndex):  # to_datetime op een DatetimeIndex kost een volle iteratie
+        idx = pd.to_datetime(idx, errors="coerce")
+    if isinstance(idx, pd.DatetimeIndex) and idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    if getattr(idx, "unit", "ns") != "ns":  # asi8 moet in ns zijn
+        idx = idx.as_unit("ns")
+    vals = pd.to_numeric(getattr(s, "values", s), errors="coerce")
+    vals = np.asarray(vals, dtype=np.float32)
+
+    ns = idx.asi8
+    geldig = ~idx.isna()
+    if not geldig.all():
+        ns, vals = ns[geldig], vals[geldig]
+    return (ns // _KWARTIER_NS) * _KWARTIER_NS, vals
+
+
+def dedup_kwartier_kernel(ns: np.ndarray, vals: np.ndarray, how: str = "mean") -> tuple[np.ndarray, np.ndarray]:
+    """
+    Eén sortering + één reduceat-pass: dubbele (gefloorde) tijdstempels samenvoegen.
+    NaN telt niet mee (zoals groupby): mean van alleen-NaN = NaN, sum = 0.
+    Geeft gesorteerde unieke int64 ns en float32 waarden terug.
+    """
+    if len(ns) and np.any(ns[1:] < ns[:-1]):
+        order = np.argsort(ns, kind="stable")
+        ns, vals = ns[order], vals[order]
+    if len(ns) == 0:
+        return ns.astype(np.int64), vals.astype(np.float32)
+
+    starts = np.flatnonzero(np.r_[True, ns[1:] != ns[:-1]])
+    if len(starts) == len(ns):  # geen dubbelen: niets samen te voegen
+        uit = vals if how != "sum" else np.nan_to_num(vals, nan=0.0)
+        return ns, uit.astype(np.float32, copy=False)
+
+    nan = np.isnan(vals)
+    sommen = np.add.reduceat(np.where(nan, np.float32(0), vals), starts)
+    if how == "sum":
+        return ns[starts], sommen.astype(np.float32, copy=False)
+    aantallen = np.add.reduceat(~nan, starts, dtype=np.int32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gem = sommen / aantallen
+    return ns[starts], gem.astype(np.float32, copy=False)
+
+
+def align_kwartier_kernel(v_ns, v_vals, o_ns, o_vals) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Intersectie van twee gesorteerde, unieke kwartiergrids via searchsorted (geen extra sort),
+    daarna rijen met NaN in één van beide eruit. Geeft (ns, v, o) terug, v/o als float32.
+    """
+    pos = np.searchsorted(o_ns, v_ns)
+    pos_c = np.minimum(pos, max(len(o_ns) - 1, 0))
+    match = (pos < len(o_ns)) & (o_ns[pos_c] == v_ns) if len(o_ns) else np.zeros(len(v_ns), dtype=bool)
+    ns = v_ns[match]
+    v = v_vals[match]
+    o = o_vals[pos_c[match]]
+    geldig = ~(np.isnan(v) | np.isnan(o))
+    if not geldig.all():
+        ns, v, o = ns[geldig], v[geldig], o[geldig]
+    return ns, v, o
+
+
 def dedup_quarterly_series(s: pd.Series, how: str = "mean") -> pd.Series:
     """
     Zorg dat een Series een nette 15-minuten tijdreeks wordt:
@@ -38,48 +101,20 @@ def dedup_quarterly_series(s: pd.Series, how: str = "mean") -> pd.Series:
     - indices naar 15 min afronden
     - dubbelen samenvoegen (mean of sum)
     """
-    idx = pd.to_datetime(s.index, errors="coerce")
-    s = pd.Series(pd.to_numeric(getattr(s, "values", s), errors="coerce"), index=idx, name=getattr(s, "name", None))
-    s = s[~s.index.isna()]
-
-    # verwijder timezone
-    if isinstance(s.index, pd.DatetimeIndex) and s.index.tz is not None:
-        s.index = s.index.tz_convert("UTC").tz_localize(None)
-
-    # floor naar 15 min
-    ns = s.index.asi8
-    step = 900_000_000_000  # 15 minuten in ns
-    floored = (ns // step) * step
-    s.index = pd.to_datetime(floored)
-
-    # dubbelen samenvoegen
-    if how == "sum":
-        s = s.groupby(s.index).sum()
-    else:
-        s = s.groupby(s.index).mean()
-
-    return s.sort_index().astype("float32")
+    ns, vals = dedup_kwartier_kernel(*_kwartier_epoch(s), how=how)
+    return pd.Series(vals, index=pd.to_datetime(ns), name=getattr(s, "name", None))
 
 def align_to_common_15min_grid(v: pd.Series, o: pd.Series) -> tuple[pd.Series, pd.Series]:
     """
     Zet verbruik (v) en opbrengst (o) op dezelfde 15-minuten grid
     en snijdt bij tot de overlappende periode.
     """
-    v = dedup_quarterly_series(v, how="mean")
-    o = dedup_quarterly_series(o, how="mean")
-
-    start = max(v.index.min(), o.index.min())
-    end   = min(v.index.max(), o.index.max())
-    if pd.isna(start) or pd.isna(end) or start >= end:
-        aligned = pd.DataFrame({"v": v, "o": o}).dropna()
-        return aligned["v"].astype("float32"), aligned["o"].astype("float32")
+    v_ns, v_vals = dedup_kwartier_kernel(*_kwartier_epoch(v), how="mean")
+    o_ns, o_vals = dedup_kwartier_kernel(*_kwartier_epoch(o), how="mean")
+    ns, v_al, o_al = align_kwartier_kernel(v_ns, v_vals, o_ns, o_vals)
 
-    grid = pd.date_range(start=start, end=end, freq="15min")
-    v = v.reindex(grid)
-    o = o.reindex(grid)
-
-    aligned = pd.DataFrame({"v": v, "o": o}).dropna()
-    return aligned["v"].astype("float32"), aligned["o"].astype("float32")
+    index = pd.DatetimeIndex(ns.view("datetime64[ns]"))
+    return pd.Series(v_al, index=index, name="v"), pd.Series(o_al, index=index, name="o")
 
 def angle_picker(label: str, default: int = 90, key: str | None = None):
     # quick presets
@@ -157,13 +192,3 @@ def tilt_picker(label: str = "Hellingshoek (°)", default: int = 13, key: str |
     st.pyplot(fig)
     plt.close(fig); del fig; gc.collect()
     return angle
-
-PV_MODULETYPES = {
-    "Topsun_TS_S400SA1": 400,
-    "Grape_Solar_GS_S_420_KR3": 420,
-    "SunPower_SPR_E20_440_COM": 440,
-    "ENN_Solar_Energy_EST_460": 460,
-    "SunPower_SPR_X22_475_COM": 475,
-    "Sunpower_SPR_X22_480_COM": 480,
-    "Sunpreme_Inc__SNPM_GxB_500": 500
-}
\ No newline at end of file
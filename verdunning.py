@@ -0,0 +1,89 @@
+import numpy as np
+
+# Lijnplots van een heel jaar (35.040 kwartieren, bij meerdere jaren een veelvoud) hebben veel meer punten
+# dan pixels. Verdunnen kiest per reeks een paar duizend punten die er op het scherm hetzelfde uitzien:
+# min-max per bucket (elke piek en elk dal blijft) of LTTB (largest triangle three buckets, behoudt de vorm).
+# Punten boven `boven` of onder `onder` (de netlimieten) blijven altijd exact staan, met hun buren, zodat
+# elke overschrijding op de juiste hoogte en plaats wordt getekend. NaN-gaten blijven gaten.
+MAX_PUNTEN = 3000  # per reeks; ruim boven de breedte van een plot in pixels
+
+
+def _minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Per bucket de index van het minimum en het maximum (NaN genegeerd), in één gevectoriseerde pass."""
+    n = len(y)
+    breedte = -(-n // n_buckets)
+    n_buckets = -(-n // breedte)
+    blok = np.full(n_buckets * breedte, np.nan)
+    blok[:n] = y
+    blok = blok.reshape(n_buckets, breedte)
+    geldig = ~np.isnan(blok)
+    heeft_data = geldig.any(axis=1)
+    start = np.arange(n_buckets) * breedte
+    i_max = start + np.where(geldig, blok, -np.inf).argmax(axis=1)
+    i_min = start + np.where(geldig, blok, np.inf).argmin(axis=1)
+    return np.concatenate([i_min[heeft_data], i_max[heeft_data]])
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_punten: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets op de eindige punten: per bucket het punt dat met het vorige gekozen punt
+    en het gemiddelde van de volgende bucket de grootste driehoek vormt. Eén lus over de buckets, numpy per bucket.
+    """
+    eindig = np.flatnonzero(np.isfinite(y))
+    if len(eindig) <= n_punten:
+        return eindig
+    xs, ys = x[eindig].astype(np.float64), y[eindig]
+    grenzen = np.linspace(1, len(eindig) - 1, n_punten - 1).astype(np.int64)
+    # gemiddelde per bucket in één keer (voor de 'volgende bucket'-hoek van de driehoek)
+    som_x, som_y = np.add.reduceat(xs[:-1], grenzen[:-1]), np.add.reduceat(ys[:-1], grenzen[:-1])
+    aantal = np.diff(grenzen)
+    gem_x, gem_y = np.append(som_x / aantal, xs[-1]), np.append(som_y / aantal, ys[-1])
+
+    gekozen = np.empty(n_punten, dtype=np.int64)
+    gekozen[0], gekozen[-1] = 0, len(eindig) - 1
+    a = 0
+    for b in range(n_punten - 2):
+        lo, hi = grenzen[b], grenzen[b + 1]
+        oppervlak = np.abs((xs[a] - gem_x[b + 1]) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (gem_y[b + 1] - ys[a]))
+        a = lo + int(oppervlak.argmax())
+        gekozen[b + 1] = a
+    return eindig[gekozen]
+
+
+def verdun_indices(y, n_punten: int = MAX_PUNTEN, x=None, methode: str = "minmax",
+                   boven: float | None = None, onder: float | None = None) -> np.ndarray:
+    """
+    Gesorteerde indices van de punten van `y` die getekend moeten worden (alle indices als de reeks al kort is).
+    methode: "minmax" (n_punten/2 buckets met min en max) of "lttb" (op `x`, standaard de positie).
+    boven/onder: punten boven resp. onder deze waarde (bv. max_afname, -max_teruglevering) plus hun buren
+    blijven altijd staan, ook boven n_punten.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_punten:
+        return np.arange(n)
+    if methode == "minmax":
+        gekozen = _minmax_indices(y, max(n_punten // 2, 1))
+    elif methode == "lttb":
+        gekozen = _lttb_indices(np.arange(n) if x is None else np.asarray(x), y, n_punten)
+    else:
+        raise ValueError(f"Onbekende methode '{methode}', kies 'minmax' of 'lttb'")
+
+    behouden = np.zeros(n, dtype=bool)
+    behouden[gekozen] = True
+    behouden[[0, n - 1]] = True
+    leeg = np.isnan(y)
+    behouden[1:] |= leeg[1:] & ~leeg[:-1]  # eerste NaN van elk gat, zodat de lijn daar onderbroken blijft
+    behouden[0] |= leeg[0]
+    buiten = np.zeros(n, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if boven is not None:
+            buiten |= y > boven
+        if onder is not None:
+            buiten |= y < onder
+    if buiten.any():
+        # ook de buren, zodat de lijn de grens op de juiste plek kruist
+        behouden |= buiten
+        behouden[1:] |= buiten[:-1]
+        behouden[:-1] |= buiten[1:]
+    return np.flatnonzero(behouden)
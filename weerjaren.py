@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from kwartiergrid import KWARTIEREN_PER_DAG, QuarterGrid
+from zonnepanelen_scenarios import SCENARIO_RELATIEF, SEIZOEN_VAN_MAAND, profiel_kwartieren
+
+# Monte-Carlo weerjaren: elke dag krijgt één van de weerscenario's (goed/slecht/bewolkt/wisselvallig),
+# getrokken uit een kansverdeling per seizoen met persistentie van dag op dag (Markov-keten: met kans
+# PERSISTENTIE blijft het weer van gisteren, anders een nieuwe trekking). De berekende (clear-sky)
+# opbrengst wordt per kwartier vermenigvuldigd met de relatieve factor van dat scenario. Jaren worden in
+# batches doorgerekend, zodat het geheugen begrensd blijft bij duizenden jaren.
+
+# kans per scenario (SCENARIO_NAMEN) per seizoen (winter, lente, zomer, herfst)
+SCENARIO_KANSEN = np.array([
+    [0.15, 0.35, 0.35, 0.15],
+    [0.35, 0.15, 0.25, 0.25],
+    [0.45, 0.10, 0.20, 0.25],
+    [0.25, 0.30, 0.30, 0.15],
+])
+PERSISTENTIE = 0.6
+MAX_GEHEUGEN_MB = 64  # per batch, voor de (jaren × dagen × 96)-tussenresultaten
+
+
+@dataclass(frozen=True)
+class WeerjarenResultaat:
+    """Per gesimuleerd jaar: opbrengst (kWh) en uren boven max_afname / max_teruglevering."""
+    opbrengst_kwh: np.ndarray
+    uren_boven_afname: np.ndarray
+    uren_boven_teruglevering: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.opbrengst_kwh)
+
+    @property
+    def p50_kwh(self) -> float:
+        return float(np.percentile(self.opbrengst_kwh, 50))
+
+    @property
+    def p90_kwh(self) -> float:
+        """Opbrengst die in 90% van de jaren wordt gehaald (10e percentiel)."""
+        return float(np.percentile(self.opbrengst_kwh, 10))
+
+    def samenvatting(self) -> pd.DataFrame:
+        """P50/P90 per kengetal (P90 = in 90% van de jaren gehaald, dus voor overschrijdingen juist het 90e percentiel)."""
+        rijen = {
+            "opbrengst_kwh": (np.percentile(self.opbrengst_kwh, 50), np.percentile(self.opbrengst_kwh, 10)),
+            "uren_boven_afname": (np.percentile(self.uren_boven_afname, 50), np.percentile(self.uren_boven_afname, 90)),
+            "uren_boven_teruglevering": (np.percentile(self.uren_boven_teruglevering, 50),
+                                         np.percentile(self.uren_boven_teruglevering, 90)),
+        }
+        return pd.DataFrame.from_dict(rijen, orient="index", columns=["P50", "P90"])
+
+
+def trek_weerdagen(rng: np.random.Generator, n_jaren: int, dag_seizoen: np.ndarray,
+                   persistentie: float = PERSISTENTIE, kansen: np.ndarray = SCENARIO_KANSEN) -> np.ndarray:
+    """
+    (n_jaren × dagen) int8 scenario-index per dag. Nieuwe trekkingen per seizoen uit `kansen`; met kans
+    `persistentie` wordt het scenario van de vorige dag aangehouden (via een lopend maximum, geen lus per dag).
+    """
+    n_dagen = len(dag_seizoen)
+    cdf = np.cumsum(kansen, axis=1)[dag_seizoen, :-1]  # (dagen, scenario's - 1)
+    nieuw = (rng.random((n_jaren, n_dagen))[:, :, None] >= cdf[None]).sum(axis=2).astype(np.int8)
+    blijft = rng.random((n_jaren, n_dagen)) < persistentie
+    blijft[:, 0] = False
+    # index van de laatste dag met een nieuwe trekking, per dag
+    bron = np.maximum.accumulate(np.where(blijft, 0, np.arange(n_dagen)), axis=1)
+    return np.take_along_axis(nieuw, bron, axis=1)
+
+
+def simuleer_weerjaren(verbruik, opbrengst, grid: QuarterGrid, max_afname: float, max_teruglevering: float,
+                       n_jaren: int = 1000, seed: int = 0, persistentie: float = PERSISTENTIE,
+                       max_geheugen_mb: float = MAX_GEHEUGEN_MB) -> WeerjarenResultaat:
+    """
+    Reken n_jaren synthetische weerjaren door op de tijdas van `grid`. `opbrengst` is de berekende opbrengst
+    bij goed weer (kW), `verbruik` in kW; beide gelijk gealigneerd. Dezelfde seed (en max_geheugen_mb)
+    geeft dezelfde jaren.
+    """
+    v = grid.dag_matrix(verbruik)                  # NaN waar geen meting
+    o = np.nan_to_num(grid.dag_matrix(opbrengst))  # (dagen, 96)
+    dag_maand = (grid.eerste_maand + grid.maand_code[np.minimum(grid.dag_offsets[:-1], len(grid) - 1)]) % 12
+    dag_seizoen = SEIZOEN_VAN_MAAND[dag_maand]
+    # profiel per dag op de zonnetijd van de opbrengst (de tijdas kan UTC of zomertijd zijn)
+    kwartier = profiel_kwartieren(o, dag_seizoen)[None]  # (1, dagen, 96)
+
+    per_jaar = grid.n_dagen * KWARTIEREN_PER_DAG * 4 * 3  # factor, opbrengst en netto in float32
+    batch = int(max(1, min(n_jaren, max_geheugen_mb * 1e6 // per_jaar)))
+    rng = np.random.default_rng(seed)
+    opbrengst_kwh = np.empty(n_jaren)
+    boven_afname = np.empty(n_jaren)
+    boven_teruglevering = np.empty(n_jaren)
+
+    for b in range(0, n_jaren, batch):
+        n = min(batch, n_jaren - b)
+        scenario = trek_weerdagen(rng, n, dag_seizoen, persistentie)
+        pv = SCENARIO_RELATIEF[scenario[:, :, None], dag_seizoen[None, :, None], kwartier]  # (n, dagen, 96)
+        pv *= o
+        netto = v - pv
+        opbrengst_kwh[b:b + n] = pv.sum(axis=(1, 2), dtype=np.float64) / 4
+        boven_afname[b:b + n] = (netto > max_afname).sum(axis=(1, 2)) / 4
+        boven_teruglevering[b:b + n] = (netto < -max_teruglevering).sum(axis=(1, 2)) / 4
+
+    return WeerjarenResultaat(opbrengst_kwh, boven_afname, boven_teruglevering)
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pvlib
+from pvlib.location import Location
+
+from kwartierdata_io import lees_arrow, schrijf_arrow
+
+# Zonnestand, luchtmassa en clear-sky instraling hangen alleen af van locatie en periode, niet van
+# hellingshoek/oriëntatie. Ze worden per (lat, lon, hoogte, tz, start, eind, freq) één keer berekend,
+# als float32 in het geheugen gehouden en als Arrow-bestand op schijf bewaard voor volgende sessies.
+CACHE_DIR = Path(os.environ.get("ZONNEGEOMETRIE_CACHE_DIR", Path(__file__).parent / ".cache" / "zonnegeometrie"))
+CACHE_VERSIE = 1  # ophogen als de opslagindeling of de modellen veranderen
+MAX_IN_GEHEUGEN = 8  # aantal locatie/periode-combinaties per proces
+
+ZONNESTAND_KOLOMMEN = ("apparent_zenith", "zenith", "apparent_elevation", "elevation", "azimuth", "equation_of_time")
+LUCHTMASSA_KOLOMMEN = ("airmass_relative", "airmass_absolute")
+CLEARSKY_KOLOMMEN = ("ghi", "dni", "dhi")
+
+
+@dataclass(frozen=True, eq=False)
+class Zonnegeometrie:
+    """
+    Zonnestand, luchtmassa en clear-sky GHI/DNI/DHI per tijdstap (float32-kolommen in `waarden`)
+    voor één locatie en periode. De DataFrame-methodes geven dezelfde vorm als pvlib
+    (Location.get_solarposition / get_airmass / get_clearsky), als float64.
+    """
+    times: pd.DatetimeIndex
+    waarden: pd.DataFrame
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _frame(self, kolommen) -> pd.DataFrame:
+        return pd.DataFrame({c: self.waarden[c].to_numpy(np.float64) for c in kolommen}, index=self.times)
+
+    def solar_position(self) -> pd.DataFrame:
+        return self._frame(ZONNESTAND_KOLOMMEN)
+
+    def airmass(self) -> pd.DataFrame:
+        return self._frame(LUCHTMASSA_KOLOMMEN)
+
+    def clearsky(self) -> pd.DataFrame:
+        return self._frame(CLEARSKY_KOLOMMEN)
+
+
+def geometrie_sleutel(latitude, longitude, altitude, tz, start, end, freq="15min") -> tuple:
+    return (round(float(latitude), 6), round(float(longitude), 6), round(float(altitude or 0), 2), str(tz),
+            pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat(), str(freq))
+
+
+def _bereken(sleutel: tuple) -> pd.DataFrame:
+    lat, lon, alt, tz, start, end, freq = sleutel
+    location = Location(latitude=lat, longitude=lon, tz=tz, altitude=alt)
+    times = pd.date_range(start=start, end=end, freq=freq, tz=tz)
+    zonnestand = location.get_solarposition(times)
+    luchtmassa = location.get_airmass(solar_position=zonnestand)
+    clearsky = location.get_clearsky(times, solar_position=zonnestand)
+    kolommen = {c: zonnestand[c] for c in ZONNESTAND_KOLOMMEN}
+    kolommen.update({c: luchtmassa[c] for c in LUCHTMASSA_KOLOMMEN})
+    kolommen.update({c: clearsky[c] for c in CLEARSKY_KOLOMMEN})
+    return pd.DataFrame({c: s.to_numpy(np.float32) for c, s in kolommen.items()})
+
+
+def _cache_pad(sleutel: tuple) -> Path:
+    h = hashlib.sha256(f"v{CACHE_VERSIE}|pvlib{pvlib.__version__}|{sleutel}".encode()).hexdigest()
+    return CACHE_DIR / f"{h}.arrow"
+
+
+_GEHEUGEN = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def zonnegeometrie(location: Location, start, end, freq="15min") -> Zonnegeometrie:
+    """
+    Gecachete zonnegeometrie voor een pvlib Location en periode (zelfde tijdas als
+    pd.date_range(start, end, freq=freq, tz=location.tz)). Volgorde: procesgeheugen, schijf, berekenen.
+    """
+    sleutel = geometrie_sleutel(location.latitude, location.longitude, location.altitude, location.tz, start, end, freq)
+    with _LOCK:
+        geo = _GEHEUGEN.get(sleutel)
+        if geo is not None:
+            _GEHEUGEN.move_to_end(sleutel)
+            return geo
+
+    pad = _cache_pad(sleutel)
+    if pad.exists():
+        waarden = lees_arrow(pad).reset_index(drop=True)
+    else:
+        waarden = _bereken(sleutel)
+        schrijf_arrow(waarden, pad)
+    geo = Zonnegeometrie(pd.date_range(start=sleutel[4], end=sleutel[5], freq=freq, tz=location.tz), waarden)
+
+    with _LOCK:
+        _GEHEUGEN[sleutel] = geo
+        while len(_GEHEUGEN) > MAX_IN_GEHEUGEN:
+            _GEHEUGEN.popitem(last=False)
+    return geo
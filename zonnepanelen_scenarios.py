@@ -1,40 +1,132 @@
 # Scenario's voor zonnepanelen-opbrengst per dag (kwartier-profiel, waarden tussen 0 en 1)
+#
+# Alle profielen worden bij het importeren één keer opgebouwd in een alleen-lezen float32-register
+# (scenario × seizoen × kwartier). Opvragen geeft een view, toepassen op een jaar opbrengst is één
+# gather op het register plus een vermenigvuldiging (geen lus per dag, geen lijsten).
+# De vensters zijn zonnetijd; een tijdas in UTC of met zomertijd ligt daar 1-2 uur naast. Bij het toepassen
+# wordt het profiel daarom per dag verschoven naar het zwaartepunt van de werkelijke opbrengst.
 from typing import Literal
 
+import numpy as np
+
+from kwartiergrid import KWARTIEREN_PER_DAG, QuarterGrid
+
+SCENARIO_NAMEN = ("goed_weer", "slecht_weer", "bewolkt", "wisselvallig")
+SEIZOENEN = ("winter", "lente", "zomer", "herfst")
+SEIZOEN_VAN_MAAND = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0], dtype=np.int8)  # jan..dec -> SEIZOENEN
+
+# Zonsopkomst/-ondergang (kwartier) per seizoen; de zomer is het oorspronkelijke venster 5:30 - 21:30
+SEIZOEN_VENSTERS = {"winter": (35, 67), "lente": (27, 81), "zomer": (22, 86), "herfst": (29, 77)}
+SEIZOEN_MIDDEN = np.array([(a + b) // 2 for a, b in (SEIZOEN_VENSTERS[s] for s in SEIZOENEN)])  # top van het profiel
+
+
+def _dagprofiel(piek=1.0, breedte=32, start=22, eind=86) -> np.ndarray:
+    """Gausscurve tussen start en eind (kwartieren), top halverwege; breedte is de FWHM in kwartieren."""
+    kwartieren = np.arange(KWARTIEREN_PER_DAG)
+    midden = (start + eind) // 2
+    sigma = breedte / 2.355  # FWHM naar sigma
+    profiel = piek * np.exp(-0.5 * ((kwartieren - midden) / sigma) ** 2)
+    return np.where((kwartieren >= start) & (kwartieren < eind), profiel, 0.0)
+
+
+def _scenarios(start, eind) -> np.ndarray:
+    """De vier scenario's (4 × 96) voor één venster; breedtes schalen mee met de daglengte."""
+    kwartieren = np.arange(KWARTIEREN_PER_DAG)
+    schaal = (eind - start) / (86 - 22)
+    variatie = 0.7 + 0.3 * np.sin(kwartieren / 6) + 0.2 * np.random.RandomState(42).randn(96)
+    return np.stack([
+        _dagprofiel(piek=1.0, breedte=40 * schaal, start=start, eind=eind),
+        _dagprofiel(piek=0.25, breedte=40 * schaal, start=start, eind=eind) * 0.7,
+        _dagprofiel(piek=0.35, breedte=60 * schaal, start=start, eind=eind) * 0.9,
+        (_dagprofiel(piek=0.7, breedte=40 * schaal, start=start, eind=eind) * variatie).clip(0, 1),
+    ])
+
+
+def _bouw_register():
+    register = np.stack([_scenarios(*SEIZOEN_VENSTERS[s]) for s in SEIZOENEN], axis=1).astype(np.float32)
+    # t.o.v. goed weer: 1 voor goed weer zelf; buiten het venster (goed weer 0) de energieverhouding van het
+    # scenario binnen het venster, zodat werkelijke opbrengst daar niet op 0 wordt gezet
+    goed = register[0]
+    energie = register.sum(axis=2, keepdims=True) / goed.sum(axis=1, keepdims=True)[None]
+    relatief = np.where(goed > 0, register / np.where(goed > 0, goed, 1), energie).astype(np.float32)
+    jaarrond = _scenarios(22, 86).astype(np.float32)
+    for a in (register, relatief, jaarrond):
+        a.flags.writeable = False
+    return register, relatief, jaarrond
+
+
+# SCENARIO_REGISTER[scenario, seizoen, kwartier]; SCENARIO_RELATIEF idem gedeeld door goed weer;
+# SCENARIO_PROFIELEN[scenario, kwartier] zijn de oorspronkelijke (seizoensloze) profielen
+SCENARIO_REGISTER, SCENARIO_RELATIEF, SCENARIO_PROFIELEN = _bouw_register()
+
+
+def scenario_index(scenario_naam) -> int:
+    if scenario_naam not in SCENARIO_NAMEN:
+        raise ValueError(f"Scenario '{scenario_naam}' niet gevonden. Kies uit: {list(SCENARIO_NAMEN)}")
+    return SCENARIO_NAMEN.index(scenario_naam)
+
+
 def get_zonnepanelen_scenarios_kwartier():
     """
     Geeft een dict met vier scenario's voor zonnepanelen-opbrengst per dag.
-    Elke waarde is een lijst van 96 vermenigvuldigingsfactoren (één per kwartier).
-    """
-    import numpy as np
-
-    kwartieren = np.arange(96)
-    # Zonsopkomst rond 5:30 (kwartier 22), hoogste punt rond 13:00 (kwartier 52), zonsondergang rond 21:30 (kwartier 86)
-    def dagprofiel(piek=1.0, breedte=32, start=22, eind=86):
-        profiel = np.zeros(96)
-        midden = (start + eind) // 2
-        sigma = breedte / 2.355  # FWHM naar sigma
-        for i in range(start, eind):
-            profiel[i] = piek * np.exp(-0.5 * ((i - midden) / sigma) ** 2)
-        return profiel
-
-    return {
-        "goed_weer": dagprofiel(piek=1.0, breedte=40, start=22, eind=86).tolist(),
-        "slecht_weer": (dagprofiel(piek=0.25, breedte=40, start=22, eind=86) * 0.7).tolist(),
-        "bewolkt": (dagprofiel(piek=0.35, breedte=60, start=22, eind=86) * 0.9).tolist(),
-        "wisselvallig": (
-            dagprofiel(piek=0.7, breedte=40, start=22, eind=86) *
-            (0.7 + 0.3 * np.sin(kwartieren / 6) + 0.2 * np.random.RandomState(42).randn(96))
-        ).clip(0, 1).tolist()
-    }
-
-def get_zonnepanelen_scenario_profiel(scenario_naam: Literal['goed_weer', 'slecht_weer', 'bewolkt', 'wisselvallig']):
-    """
-    Geeft het kwartierprofiel voor de opgegeven scenario-naam.
+    Elke waarde is een (alleen-lezen) array van 96 vermenigvuldigingsfactoren (één per kwartier).
+    """
+    return dict(zip(SCENARIO_NAMEN, SCENARIO_PROFIELEN))
+
+
+def get_zonnepanelen_scenario_profiel(scenario_naam: Literal['goed_weer', 'slecht_weer', 'bewolkt', 'wisselvallig'],
+                                      seizoen: Literal['winter', 'lente', 'zomer', 'herfst'] | None = None):
+    """
+    Geeft het kwartierprofiel voor de opgegeven scenario-naam, optioneel voor één seizoen.
     :param scenario_naam: 'goed_weer', 'slecht_weer', 'bewolkt', of 'wisselvallig'
-    :return: lijst van 96 waarden (vermenigvuldigingsfactoren)
+    :return: view op 96 waarden (vermenigvuldigingsfactoren)
+    """
+    i = scenario_index(scenario_naam)
+    if seizoen is None:
+        return SCENARIO_PROFIELEN[i]
+    return SCENARIO_REGISTER[i, SEIZOENEN.index(seizoen)]
+
+
+def profiel_kwartieren(dag_matrix: np.ndarray, dag_seizoen: np.ndarray) -> np.ndarray:
+    """
+    (dagen, 96) kwartier van het registerprofiel per kwartier van de dag: het profiel verschoven zodat zijn
+    top op het zwaartepunt van de opbrengst van die dag valt (dag_matrix: (dagen, 96) opbrengst, NaN mag).
+    Zo ligt het venster op de zonnetijd van de data, ongeacht tijdzone of zomertijd van de tijdas.
+    Dagen zonder opbrengst schuiven niet.
+    """
+    w = np.clip(np.nan_to_num(np.asarray(dag_matrix, dtype=np.float64)), 0, None)
+    totaal = w.sum(axis=1)
+    kwartieren = np.arange(KWARTIEREN_PER_DAG)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zwaartepunt = w @ kwartieren / totaal
+    verschuiving = np.where(totaal > 0, np.rint(zwaartepunt - SEIZOEN_MIDDEN[dag_seizoen]), 0).astype(np.int64)
+    return np.clip(kwartieren[None, :] - verschuiving[:, None], 0, KWARTIEREN_PER_DAG - 1)
+
+
+def _dag_seizoen(grid: QuarterGrid) -> np.ndarray:
+    dag_maand = (grid.eerste_maand + grid.maand_code[np.minimum(grid.dag_offsets[:-1], len(grid) - 1)]) % 12
+    return SEIZOEN_VAN_MAAND[dag_maand]
+
+
+def scenario_factoren(scenario_naam, grid: QuarterGrid, relatief: bool = True, opbrengst=None) -> np.ndarray:
+    """
+    Factor per kwartier van `grid` (seizoen uit de maand, kwartier uit de dag), als één gather op het
+    register. relatief=True geeft de factor t.o.v. goed weer, om een berekende opbrengst mee te schalen.
+    Met `opbrengst` (op de tijdas van grid) ligt het profiel per dag op de zonnetijd van die opbrengst
+    (profiel_kwartieren); zonder wordt de kloktijd van grid gebruikt.
+    """
+    tabel = (SCENARIO_RELATIEF if relatief else SCENARIO_REGISTER)[scenario_index(scenario_naam)]
+    seizoen = SEIZOEN_VAN_MAAND[(grid.eerste_maand + grid.maand_code) % 12]
+    kwartier = grid.kwartier_van_dag
+    if opbrengst is not None:
+        kwartier = profiel_kwartieren(grid.dag_matrix(opbrengst), _dag_seizoen(grid))[grid.dag_code, kwartier]
+    return tabel[seizoen, kwartier]
+
+
+def pas_scenario_toe(opbrengst: np.ndarray, scenario_naam, grid: QuarterGrid, relatief: bool = True) -> np.ndarray:
+    """
+    Opbrengst (op de tijdas van `grid`) onder een weerscenario: één gather op het register (met het profiel
+    per dag op de zonnetijd van de opbrengst) en één vermenigvuldiging.
     """
-    scenario_dict = get_zonnepanelen_scenarios_kwartier()
-    if scenario_naam not in scenario_dict:
-        raise ValueError(f"Scenario '{scenario_naam}' niet gevonden. Kies uit: {list(scenario_dict.keys())}")
-    return scenario_dict[scenario_naam]
+    waarden = np.asarray(opbrengst, dtype=np.float32)
+    return waarden * scenario_factoren(scenario_naam, grid, relatief, opbrengst=waarden)